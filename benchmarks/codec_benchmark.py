@@ -0,0 +1,65 @@
+'''
+Micro-benchmark of the per-item cost of serializing and deserializing realistic remote items,
+comparing the previous helpers (a new `TypeSerializer`/`TypeDeserializer` per call and generic dispatch)
+with the fast paths in `src.utils.codec`.
+
+Usage (from the repository root):
+    python -m benchmarks.codec_benchmark [buttons per remote] [iterations]
+'''
+import sys
+import random
+import timeit
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from src.utils.helpers import serialize_item, deserialize_item
+
+
+def legacy_serialize_item(item: dict):
+    serializer = TypeSerializer()
+    return {k: serializer.serialize(v) for k, v in item.items()}
+
+
+def legacy_deserialize_item(dynamo_obj: dict):
+    deserializer = TypeDeserializer()
+    return {k: deserializer.deserialize(v) for k, v in dynamo_obj.items()}
+
+
+def generate_remote(total_buttons: int):
+    return {
+        "remoteName": "Living Room AC",
+        "category": "Air Conditioner",
+        "macAddress": "AA:BB:CC:DD:EE:FF",
+        "buttonClicks": "1532",
+        "orderIndex": "3",
+        "buttons": [{"buttonName": f"Button {i}",
+                     "buttonCode": str([random.randint(200, 9000) for _ in range(200)]),
+                     "commandSize": "200",
+                     "buttonState": "NO"} for i in range(total_buttons)]
+    }
+
+
+def measure(func, argument, iterations: int):
+    return min(timeit.repeat(lambda: func(argument), number=iterations, repeat=5)) / iterations * 1e6
+
+
+def main():
+    total_buttons = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    remote = generate_remote(total_buttons)
+    serialized = legacy_serialize_item(remote)
+
+    assert serialize_item(remote) == serialized
+    assert deserialize_item(serialized) == legacy_deserialize_item(serialized)
+
+    print(f"Remote item with {total_buttons} buttons, best of 5 x {iterations} iterations")
+    print(f"{'operation':>12} | {'before (us)':>11} | {'after (us)':>10} | {'speedup':>7}")
+
+    for name, before, after, argument in [("serialize", legacy_serialize_item, serialize_item, remote),
+                                          ("deserialize", legacy_deserialize_item, deserialize_item, serialized)]:
+        before_cost = measure(before, argument, iterations)
+        after_cost = measure(after, argument, iterations)
+        print(f"{name:>12} | {before_cost:>11.2f} | {after_cost:>10.2f} | {before_cost / after_cost:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
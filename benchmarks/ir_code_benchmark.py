@@ -0,0 +1,65 @@
+'''
+Micro-benchmark of validating learned IR codes, comparing the previous path (`ast.literal_eval` followed by a Python loop
+checking every element is an int) with `src.utils.ir_codec.parse_text` and with the header check of packed codes.
+
+Usage (from the repository root):
+    python -m benchmarks.ir_code_benchmark [timings per code] [iterations]
+'''
+import ast
+import sys
+import random
+import timeit
+from src.utils.ir_codec import parse_text, format_text, encode_code, code_header
+
+
+def legacy_validate(code: str, command_size: int):
+    raw_list = ast.literal_eval(code)
+    for item in raw_list:
+        if not isinstance(item, int):
+            return False
+    return len(raw_list) == command_size
+
+
+def validate(code: str, command_size: int):
+    return len(parse_text(code, command_size)) == command_size
+
+
+def validate_packed(code: bytes, command_size: int):
+    return code_header(code)[0] == command_size
+
+
+def generate_code(total_timings: int):
+    # NEC-like code: a long leader followed by short marks and short or long spaces
+    timings = [9000, 4500]
+    while len(timings) < total_timings:
+        timings += [random.randint(540, 580), random.choice([560, 1690]) + random.randint(-20, 20)]
+    return timings[:total_timings]
+
+
+def measure(func, code, command_size: int, iterations: int):
+    return min(timeit.repeat(lambda: func(code, command_size), number=iterations, repeat=5)) / iterations * 1e6
+
+
+def main():
+    total_timings = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    timings = generate_code(total_timings)
+    text, packed = format_text(timings), encode_code(timings)
+
+    assert legacy_validate(text, total_timings) and validate(text, total_timings) and validate_packed(packed, total_timings)
+    assert list(parse_text(text)) == timings
+
+    print(f"Code of {total_timings} timings ({len(text)} bytes as text, {len(packed)} bytes packed), best of 5 x {iterations} iterations")
+    print(f"{'path':>22} | {'cost (us)':>9} | {'speedup':>7}")
+
+    legacy_cost = measure(legacy_validate, text, total_timings, iterations)
+    print(f"{'literal_eval + loop':>22} | {legacy_cost:>9.2f} | {1:>6.2f}x")
+    for name, func, code in [("parse_text", validate, text),
+                             ("packed header", validate_packed, packed)]:
+        cost = measure(func, code, total_timings, iterations)
+        print(f"{name:>22} | {cost:>9.2f} | {legacy_cost / cost:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+'''
+Benchmark comparing wall-clock time of `ObjectDynamodb.parallel_scan_items` for different segment counts.
+
+By default the scans run against an in-process DynamoDB stand-in that mimics the `scan` API (1 MB pages,
+`Segment`/`TotalSegments`, `LastEvaluatedKey`) and adds a fixed round-trip latency plus a per-item read cost.
+Set `DYNAMODB_ENDPOINT` (e.g. `http://localhost:8000`) to run the same benchmark against DynamoDB Local instead,
+or `STORAGE_ENGINE` to `memory`/`sqlite` to run it against a local storage engine.
+
+Usage (from the repository root):
+    python -m benchmarks.parallel_scan_benchmark [items] [segments ...]
+'''
+import os
+import sys
+import time
+import random
+import string
+import threading
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from src.utils.aws_clients import create_client
+from src.models.mixins import ObjectDynamodb
+from src.models.engines import get_engine
+from src.utils.helpers import serialize_item
+
+TABLE_NAME = "BenchmarkRemotes"
+ROUND_TRIP_LATENCY = 0.010
+PER_ITEM_LATENCY = 0.00002
+PAGE_SIZE_BYTES = 1024 * 1024
+
+
+class LocalDynamoStandIn:
+    '''
+    Minimal thread-safe stand-in for the DynamoDB client `scan` operation used to benchmark scan strategies locally.
+    '''
+    def __init__(self, items: list, key_field: str):
+        '''
+        :param list `items`: Items in DynamoDB format stored in the table.
+        :param str `key_field`: Name of the partition key attribute.
+        '''
+        self.items = items
+        self.key_field = key_field
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.sizes = [len(str(item)) for item in items]
+        self.segments = {}
+
+    def scan(self, **kwargs):
+        total_segments = kwargs.get('TotalSegments', 1)
+        segment = kwargs.get('Segment', 0)
+
+        with self.lock:
+            self.calls += 1
+            if (segment, total_segments) not in self.segments:
+                indexes = list(range(segment, len(self.items), total_segments))
+                positions = {self.items[i][self.key_field]['S']: n for n, i in enumerate(indexes)}
+                self.segments[(segment, total_segments)] = (indexes, positions)
+        indexes, positions = self.segments[(segment, total_segments)]
+
+        start = 0
+        if 'ExclusiveStartKey' in kwargs:
+            start = positions[kwargs['ExclusiveStartKey'][self.key_field]['S']] + 1
+
+        page, page_bytes = [], 0
+        for i in indexes[start:]:
+            if page_bytes + self.sizes[i] > PAGE_SIZE_BYTES or len(page) == kwargs.get('Limit', len(indexes)):
+                break
+            page.append(self.items[i])
+            page_bytes += self.sizes[i]
+
+        time.sleep(ROUND_TRIP_LATENCY + PER_ITEM_LATENCY * len(page))
+
+        response = {'Items': page, 'Count': len(page), 'ResponseMetadata': {'HTTPStatusCode': 200}}
+        if start + len(page) < len(indexes):
+            response['LastEvaluatedKey'] = {self.key_field: page[-1][self.key_field]}
+        return response
+
+
+def generate_remote(i: int):
+    code = str([random.randint(200, 9000) for _ in range(200)])
+    return {
+        "remoteName": f"Remote {i}",
+        "category": "Air Conditioner",
+        "macAddress": "AA:BB:CC:DD:EE:FF",
+        "buttonClicks": "0",
+        "orderIndex": str(i),
+        "buttons": [{"buttonName": ''.join(random.choices(string.ascii_letters, k=8)),
+                     "buttonCode": code,
+                     "commandSize": "200",
+                     "buttonState": "NO"} for _ in range(10)]
+    }
+
+
+def build_model(remotes: list):
+    model = ObjectDynamodb(TABLE_NAME)
+    endpoint = os.getenv("DYNAMODB_ENDPOINT")
+    engine = os.getenv("STORAGE_ENGINE", "dynamodb")
+
+    if engine != "dynamodb":
+        model.dynamo_db = get_engine(engine)
+        model.dynamo_db.ensure_table(TABLE_NAME, {"partition_key": "remoteName", "sort_key": None})
+        model.batch_write(put_items=remotes)
+        return model
+
+    if not endpoint:
+        model.dynamo_db = LocalDynamoStandIn([serialize_item(remote) for remote in remotes], "remoteName")
+        return model
+
+    client = create_client('dynamodb', endpoint_url=endpoint)
+    try:
+        client.delete_table(TableName=TABLE_NAME)
+        client.get_waiter('table_not_exists').wait(TableName=TABLE_NAME)
+    except client.exceptions.ResourceNotFoundException:
+        pass
+    client.create_table(TableName=TABLE_NAME,
+                        AttributeDefinitions=[{'AttributeName': 'remoteName', 'AttributeType': 'S'}],
+                        KeySchema=[{'AttributeName': 'remoteName', 'KeyType': 'HASH'}],
+                        BillingMode='PAY_PER_REQUEST')
+    client.get_waiter('table_exists').wait(TableName=TABLE_NAME)
+    for remote in remotes:
+        client.put_item(TableName=TABLE_NAME, Item=serialize_item(remote))
+
+    model.dynamo_db = client
+    return model
+
+
+def main():
+    total_items = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    segment_counts = [int(arg) for arg in sys.argv[2:]] or [1, 2, 4, 8, 16]
+
+    model = build_model([generate_remote(i) for i in range(total_items)])
+
+    backend = os.getenv("STORAGE_ENGINE", "dynamodb")
+    backend = f"{backend} engine" if backend != "dynamodb" else ('DynamoDB Local' if os.getenv('DYNAMODB_ENDPOINT') else 'in-process stand-in')
+    print(f"Scanning {total_items} remotes ({backend})")
+    print(f"{'segments':>8} | {'wall time (s)':>13} | {'items':>6} | {'speedup':>7}")
+
+    baseline = None
+    for segments in segment_counts:
+        start = time.perf_counter()
+        response = model.parallel_scan_items(total_segments=segments, max_workers=segments)
+        elapsed = time.perf_counter() - start
+
+        if response['statusCode'] != 200:
+            raise RuntimeError(response['body'])
+
+        baseline = baseline or elapsed
+        print(f"{segments:>8} | {elapsed:>13.3f} | {len(response['body']):>6} | {baseline / elapsed:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
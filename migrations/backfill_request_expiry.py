@@ -0,0 +1,29 @@
+'''
+One-off migration setting `expiresAt` on request-pool entries written before it existed.
+
+DynamoDB TTL only deletes items with an `expiresAt`, so older requests would stay in the table forever. Reads already
+treat them as expired from their `timestamp`; this gives them the same `expiresAt` so TTL deletes them. Running it again
+is safe.
+
+Usage (from the repository root):
+    REQUEST_POOL_TABLE_NAME=<stage>RequestPool python -m migrations.backfill_request_expiry
+'''
+import os
+import sys
+from src.models import RequestPoolModel
+
+
+def main():
+    table = os.getenv("REQUEST_POOL_TABLE_NAME")
+    if not table:
+        sys.exit("REQUEST_POOL_TABLE_NAME must be set to the request pool table to migrate.")
+
+    response = RequestPoolModel(table).backfill_expires_at()
+    if response['statusCode'] != 200:
+        sys.exit(f"Migration failed: {response['body']}")
+
+    print(f"Set `expiresAt` on {response['body']} requests of {table}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+'''
+One-off migration moving the legacy `buttons` list of every remote to the buttons table.
+
+Remotes are also migrated one by one on the first write to their buttons, this moves the remotes nobody edits so reads
+no longer merge legacy lists. Every remote is moved by a single transaction, so a remote edited meanwhile keeps its list
+and is moved by the next run. Running it again is safe.
+
+Usage (from the repository root):
+    REMOTES_TABLE_NAME=<stage>IRRemotes BUTTONS_TABLE_NAME=<stage>IRButtons python -m migrations.migrate_legacy_buttons
+'''
+import os
+import sys
+from src.models import RemotesModel
+
+
+def main():
+    remotes_table, buttons_table = os.getenv("REMOTES_TABLE_NAME"), os.getenv("BUTTONS_TABLE_NAME")
+    if not remotes_table or not buttons_table:
+        sys.exit("REMOTES_TABLE_NAME and BUTTONS_TABLE_NAME must be set to the tables to migrate.")
+
+    response = RemotesModel(remotes_table, buttons_table).migrate_buttons()
+    if response['statusCode'] != 200:
+        sys.exit(f"Migration failed: {response['body']}")
+
+    print(f"Moved the buttons of {response['body']} remotes of {remotes_table} to {buttons_table}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+'''
+One-off migration removing the `connectionId` of devices where it is stored as NULL.
+
+Devices written before `connectionId-index` existed kept `connectionId: NULL` while disconnected. The index is keyed by
+`connectionId` as a string, so DynamoDB rejects every write to a device still holding a NULL `connectionId` once the
+index exists. Disconnected devices now have no `connectionId` at all, which also keeps them out of the sparse index.
+
+Rollout order:
+    1. Run this migration against the devices table of the stage.
+    2. `serverless deploy`, creating `connectionId-index` (the deployed code no longer writes NULL `connectionId`).
+    3. Run this migration again, for devices that disconnected through the previous code between steps 1 and 2.
+       Removing the attribute is the one write DynamoDB still accepts on those items.
+
+Usage (from the repository root):
+    IOT_DEVICES_TABLE_NAME=<stage>IoTDevices python -m migrations.remove_null_connection_ids
+'''
+import os
+import sys
+from src.models import DevicesModel
+
+
+def main():
+    table = os.getenv("IOT_DEVICES_TABLE_NAME")
+    if not table:
+        sys.exit("IOT_DEVICES_TABLE_NAME must be set to the devices table to migrate.")
+
+    response = DevicesModel(table).remove_null_attributes(['connectionId'], 'macAddress')
+    if response['statusCode'] != 200:
+        sys.exit(f"Migration failed: {response['body']}")
+
+    print(f"Removed NULL `connectionId` from {response['body']} devices of {table}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,11 @@
 import json
 import os
-import boto3
+from ..utils.aws_clients import LazyClient
 from datetime import datetime, timedelta, time
 from .utils import send_response, validate_input
 from http.cookies import SimpleCookie
 from ..models import RegisteredUsersModel
-cognito = boto3.client('cognito-idp')
+cognito = LazyClient('cognito-idp')
 CORS_ORIGIN = os.getenv('CORS_ORIGIN')
 USERS_MODEL = os.getenv('REGISTERED_USERS_TABLE_NAME')
 def handle(event, context):
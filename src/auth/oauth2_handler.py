@@ -1,7 +1,7 @@
 import json
 import os
 import urllib.error
-import boto3
+from ..utils.aws_clients import LazyClient
 import sys
 sys.path.insert(0, 'src/vendor')
 import jwt
@@ -12,7 +12,7 @@ import urllib.parse
 import urllib.request
 from ..models import RegisteredUsersModel
 
-cognito = boto3.client('cognito-idp')
+cognito = LazyClient('cognito-idp')
 
 def handle(event, context):
     try:
@@ -1,9 +1,9 @@
 import json
 import os
-import boto3
+from ..utils.aws_clients import LazyClient
 from .utils import send_response, validate_input
 
-cognito = boto3.client('cognito-idp')
+cognito = LazyClient('cognito-idp')
 
 def handle(event, context):
     try:
@@ -1,6 +1,6 @@
 import json
 import time
-import boto3
+from ...utils.aws_clients import get_client
 from ...models import AutomationsModel
 from ...utils.helpers import check_response
 from .eventbridge_controller import create_eventbridge_schedule, delete_eventbridge_schedule, set_eventbridge_schedule_state
@@ -8,7 +8,7 @@ from .eventbridge_controller import create_eventbridge_schedule, delete_eventbri
 
 def create_automation(automations_model : AutomationsModel, lambda_arn: str, args: dict):
     
-    scheduler = boto3.client('scheduler')
+    scheduler = get_client('scheduler')
 
     attributes = ['automationName', 'automationHour', 'automationMinutes', 'automationDays', 'buttonsList', 'cronExpression']
     
@@ -38,7 +38,7 @@ def create_automation(automations_model : AutomationsModel, lambda_arn: str, arg
     
 def delete_automation(automations_model: AutomationsModel, args: dict):
 
-    scheduler = boto3.client('scheduler')
+    scheduler = get_client('scheduler')
 
     attributes = ['automationId']
     
@@ -55,7 +55,7 @@ def delete_automation(automations_model: AutomationsModel, args: dict):
 
 def set_automation_state(automations_model: AutomationsModel, args: dict, state: str):
 
-    scheduler = boto3.client('scheduler')
+    scheduler = get_client('scheduler')
 
     attributes = ['automationId']
     
@@ -1,8 +1,8 @@
-import boto3
+from ...utils.aws_clients import get_client
 import json
 import time
 def create_eventbridge_role(lambda_arn: str):
-    iam = boto3.client('iam')
+    iam = get_client('iam')
 
     role_name = 'EventBridgeSchedulerRole'
 
@@ -1,10 +1,10 @@
 import json
 import datetime
-import boto3
+from ...utils.aws_clients import get_client
 from ...utils.helpers import check_response
 
 def get_monthly_cost():
-    client = boto3.client('ce')
+    client = get_client('ce')
 
     today = datetime.date.today()
     start_date = today.replace(day=1).strftime('%Y-%m-%d')
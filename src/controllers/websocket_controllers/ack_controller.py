@@ -1,6 +1,6 @@
 import json
 from .mixins.websocket_mixins import WebSocketMixin
-from ...models import RequestPoolModel, RemotesModel, AutomationsModel, DevicesModel
+from ...models import RequestPoolModel, RemotesModel, AutomationsModel, DevicesModel, ClientsModel
 from .validators.ack_validator import ACKValidator
 from .cmd_controller import CMDController
 from ...utils.helpers import error_handler, check_response
@@ -12,13 +12,15 @@ class ACKController(WebSocketMixin):
                  requestpool_model: RequestPoolModel,
                  remotes_model: RemotesModel,
                  devices_model: DevicesModel,
-                 automations_model: AutomationsModel):
+                 automations_model: AutomationsModel,
+                 clients_model: ClientsModel = None):
         
         self.endpoint_url = endpoint_url
         self.requestpool_model = requestpool_model
         self.remotes_model = remotes_model
         self.automations_model = automations_model
         self.devices_model = devices_model
+        self.clients_model = clients_model
 
         self.validator = ACKValidator(requestpool_model, remotes_model)
 
@@ -28,7 +30,7 @@ class ACKController(WebSocketMixin):
     @WebSocketMixin.notify_if_error
     def handle_ack_read(self, message: dict):    
         '''
-        Method that receives an acknowledgment message that request with `request_id` was carried out successfully and forwards the message to the client who requested it originally.
+        Method that receives an acknowledgment message that request with `request_id` was carried out successfully and forwards the message to the client who requested it originally, deleting the client if its connection is gone.
         :param dict `message`: Acknowledgement message that must contain `request_id`.
         :return : Response of the attempt to send the message to the websocket connection.
         '''
@@ -58,12 +60,12 @@ class ACKController(WebSocketMixin):
             'body': 'success'
         }
 
-        return self.send_message(ack_message, requestpool_entry['connectionId'])
+        return self.send_message(ack_message, requestpool_entry['connectionId'], self.clients_model)
     
     @WebSocketMixin.notify_if_error
     def handle_ack_execute(self, message: dict):    
         '''
-        Method that receives an acknowledgment message that request with `request_id` was carried out successfully and forwards the message to the client who requested it originally.
+        Method that receives an acknowledgment message that request with `request_id` was carried out successfully and forwards the message to the client who requested it originally, deleting the client if its connection is gone.
         :param dict `message`: Acknowledgement message that must contain `request_id`.
         :return : Response of the attempt to send the message to the websocket connection.
         '''
@@ -81,7 +83,7 @@ class ACKController(WebSocketMixin):
             'body': 'success'
         }
 
-        return self.send_message(ack_message, requestpool_entry['connectionId'])    
+        return self.send_message(ack_message, requestpool_entry['connectionId'], self.clients_model)
     
     
     def handle_ack_automate(self, message: dict):
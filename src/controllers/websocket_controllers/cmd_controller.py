@@ -33,7 +33,6 @@ class CMDController(WebSocketMixinV2):
         self.validator.validate_button_read(request)
 
         remote_res = self.remotes_model.get_remotes({'remoteName': request['remoteName']})
-        self.request_pool_model.clean_expired_requests()
         requestpool_res = self.request_pool_model.add_request(self.connection_id, request)
 
         iot_command = {
@@ -59,9 +58,8 @@ class CMDController(WebSocketMixinV2):
         button_res = self.remotes_model.get_button(remote_res['body'],
                                                    {'buttonName': request['buttonName']})
      
-        self.request_pool_model.clean_expired_requests()
         requestpool_res = self.request_pool_model.add_request(self.connection_id, request)
-        _ = self.remotes_model.increment_counter({'remoteName': request['remoteName']})
+        _ = self.remotes_model.record_click({'remoteName': request['remoteName']})
 
         iot_command = {
             'action': 'cmd',
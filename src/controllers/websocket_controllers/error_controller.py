@@ -1,6 +1,6 @@
 import json
 from .mixins.websocket_mixins import WebSocketMixin
-from ...models import RequestPoolModel, AutomationsModel
+from ...models import RequestPoolModel, AutomationsModel, ClientsModel
 from .validators.error_validator import ErrorValidator
 from ...utils.helpers import error_handler
 
@@ -9,10 +9,12 @@ class ErrorController(WebSocketMixin):
                  endpoint_url: str, 
                  connection_id: str,
                  request_pool_model: RequestPoolModel,
-                 automations_model: AutomationsModel):
+                 automations_model: AutomationsModel,
+                 clients_model: ClientsModel = None):
         
         self.request_pool_model = request_pool_model
         self.automations_model = automations_model
+        self.clients_model = clients_model
         self.validator = ErrorValidator(request_pool_model)
         super().__init__(endpoint_url, connection_id)
 
@@ -20,7 +22,7 @@ class ErrorController(WebSocketMixin):
     @WebSocketMixin.notify_if_error
     def handle_error_message(self, message: dict):
         '''
-        Method that receives an error message that request with `request_id` resulted in an error and forwards the message to the client who requested it originally.
+        Method that receives an error message that request with `request_id` resulted in an error and forwards the message to the client who requested it originally, deleting the client if its connection is gone.
         :param dict `message`: Error message that must contain `request_id`.
         :return : Response of the attempt to send the message to the websocket connection.
         '''
@@ -37,7 +39,7 @@ class ErrorController(WebSocketMixin):
             'requestId': message['requestId'],
             'body': message['body']
         }
-        return self.send_message(error_message, requestpool_response['body']['connectionId'])
+        return self.send_message(error_message, requestpool_response['body']['connectionId'], self.clients_model)
     
     def handle_automation_error(self, message: dict):
         
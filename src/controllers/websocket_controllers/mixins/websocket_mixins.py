@@ -1,9 +1,17 @@
+import os
 import json
-import boto3
-from ....utils.helpers import error_handler, check_response
-from ....models import DevicesModel
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from ....utils.aws_clients import get_client
+from ....utils.helpers import error_handler
+from ....models import DevicesModel, ClientsModel
+from ....models.mixins import ItemCache
 import functools
 
+BROADCAST_MAX_WORKERS = int(os.getenv("WEBSOCKET_BROADCAST_MAX_WORKERS", "16"))
+DEVICE_ROUTES_TTL = float(os.getenv("DEVICE_ROUTES_TTL", "300"))
+DEVICE_ROUTES_SIZE = int(os.getenv("DEVICE_ROUTES_SIZE", "256"))
+
 class WebSocketMixin:
     '''
     Class meant to handle connections and operations regarding WebSocket connections (such as sending messages).
@@ -15,42 +23,94 @@ class WebSocketMixin:
         :param str `endpoint_url`: String containing the url of the websocket gateway endpoint.
         :param str `connection_id`: The connection id of this connection sending the request.
         '''
-        self.api_gateway = boto3.client('apigatewaymanagementapi', endpoint_url=endpoint_url)
+        self.endpoint_url = endpoint_url
         self.connection_id = connection_id
 
+    @property
+    def api_gateway(self):
+        '''
+        Client of the websocket gateway endpoint, shared by every controller of the process and created on first use.
+        '''
+        return get_client('apigatewaymanagementapi', self.endpoint_url)
+
     
     
     @error_handler
-    def send_message(self, body: dict, connection_id: str = None):
+    def send_message(self, body: dict, connection_id: str = None, clients_model: ClientsModel = None):
         '''
         Method sending `body` through api_gateway to given `connection_id`.
 
         :param dict `body`: Message to send.
+        :param ClientsModel `clients_model`: Model the client of the connection is stored in, to delete it if its connection is gone.
         :return : Response 200 or error.
         '''
-        response = self.api_gateway.post_to_connection(
-            Data = json.dumps(body),
-            ConnectionId = self.connection_id if not connection_id else connection_id
-        )
+        connection_id = self.connection_id if not connection_id else connection_id
+        try:
+            self.api_gateway.post_to_connection(
+                Data = json.dumps(body),
+                ConnectionId = connection_id
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'GoneException' and clients_model:
+                _ = clients_model.delete_client({"connectionId": connection_id})
+            raise
+
         return {"statusCode": 200,
                 "body": "OK"}
     
     
+    def _post(self, data: str, connection_id: str):
+        '''
+        Method posting already serialized `data` to a connection, reporting the outcome instead of raising.
+
+        :param str `data`: Message to send, in JSON.
+        :param str `connection_id`: The connection to send it to.
+        :return : `"sent"`, `"gone"` if the connection no longer exists or `"failed"`.
+        '''
+        try:
+            self.api_gateway.post_to_connection(Data=data, ConnectionId=connection_id)
+        except ClientError as e:
+            return "gone" if e.response['Error']['Code'] == 'GoneException' else "failed"
+        except Exception:
+            return "failed"
+
+        return "sent"
+
     @error_handler
-    def send_broadcast(self, body: dict, clients: list):
+    def send_broadcast(self, body: dict, clients: list, clients_model: ClientsModel = None, max_workers: int = BROADCAST_MAX_WORKERS):
         '''
-        Method sending `body` to all connections contained in `response`, except `self.connection_id`.
+        Method sending `body` to all connections of `clients`, except `self.connection_id`.
+        Messages are posted concurrently, so a broadcast takes about as long as the slowest connection instead of all of them.
+        Connections that are gone are deleted from `clients_model` in batches.
 
         :param dict `body`: Message to send.
         :param list `clients` : List of clients to send message to.
-        :return: Response 200 or error.
+        :param ClientsModel `clients_model`: Model the clients are stored in, `None` to keep gone connections.
+        :param int `max_workers`: Maximum number of messages posted at the same time.
+        :return: Response 200 with the number of connections the message was `sent` to, `gone` and `failed` connections
+                 and `pruned` clients in body, or error.
         '''
-        for item in clients:
-            if item["connectionId"] != self.connection_id:
-                _ = self.send_message(body, item["connectionId"])
+        connection_ids = list(dict.fromkeys(item["connectionId"] for item in clients if item["connectionId"] != self.connection_id))
+        data = json.dumps(body)
+
+        if len(connection_ids) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(connection_ids), max_workers)) as executor:
+                outcomes = list(executor.map(lambda connection_id: self._post(data, connection_id), connection_ids))
+        else:
+            outcomes = [self._post(data, connection_id) for connection_id in connection_ids]
+
+        gone = [connection_id for connection_id, outcome in zip(connection_ids, outcomes) if outcome == "gone"]
+        pruned = 0
+        if gone and clients_model:
+            response = clients_model.delete_clients([{"connectionId": connection_id} for connection_id in gone])
+            if response["statusCode"] == 200:
+                pruned = response["body"]
 
         return {"statusCode": 200,
-                "body": "OK"}
+                "body": {"sent": outcomes.count("sent"),
+                         "gone": len(gone),
+                         "failed": outcomes.count("failed"),
+                         "pruned": pruned}}
     
     @staticmethod
     def notify_if_error(func):
@@ -72,6 +132,11 @@ class WebSocketMixin:
     
     
 class WebSocketMixinV2(WebSocketMixin):
+    # Routes from MAC address to the `connectionId` of connected devices, shared by the controllers of the warm container so
+    # messages to a device don't read the devices table. A route is dropped on `$connect`/`$disconnect` of its device and when
+    # its connection is gone, since the device may have reconnected through another container.
+    routes = ItemCache(DEVICE_ROUTES_TTL, DEVICE_ROUTES_SIZE)
+
     def __init__(self, 
                  endpoint_url: str, 
                  connection_id: str,
@@ -86,18 +151,48 @@ class WebSocketMixinV2(WebSocketMixin):
         super().__init__(endpoint_url, connection_id)
    
 
+    @classmethod
+    def forget_route(cls, mac_address: dict):
+        '''
+        Method used to drop the cached route to a device, e.g. when it connects or disconnects.
+
+        :param dict `mac_address`: Dictionary containing key-value pair `macAddress` and the mac_address of the device.
+        '''
+        cls.routes.invalidate(mac_address)
+
     def _send_message_device(self, mac_address: dict, message: dict):
         '''
         Method used to send message to a device by its' MAC address (if the device is connected).
+        The connection of the device is read from `routes`, and from the devices table on a miss or if the cached connection is gone.
 
         :param dict `mac_address`: Dictionary containing key-value pair `macAddress` and the mac_address of the device.
         :return : Response of the send command or error.
         '''
+        data = json.dumps(message)
+
+        route = self.routes.get(mac_address)
+        if route is not None:
+            outcome = self._post(data, route['connectionId'])
+            if outcome == "sent":
+                return {"statusCode": 200,
+                        "body": "OK"}
 
-        device = self.devices_model.get_devices(mac_address)
+            if outcome != "gone":
+                return {"statusCode": 500,
+                        "body": f"Couldn't send message to device with MAC address {mac_address['macAddress']}."}
+            self.forget_route(mac_address)
 
-        if check_response(device) and device["body"]['connectionId']:
-            return self.send_message(message, device["body"]['connectionId'])
+        connection = self.devices_model.get_connection(mac_address, fresh=route is not None)
+
+        if connection["statusCode"] == 200:
+            outcome = self._post(data, connection["body"])
+            if outcome == "sent":
+                self.routes.put(mac_address, {"connectionId": connection["body"]})
+                return {"statusCode": 200,
+                        "body": "OK"}
+            if outcome != "gone":
+                return {"statusCode": 500,
+                        "body": f"Couldn't send message to device with MAC address {mac_address['macAddress']}."}
         
         return {"statusCode": 500,
                 "body": f"Device with MAC address {mac_address["macAddress"]} is not connected or doesn't exist."}
@@ -1,9 +1,9 @@
 import json
-import ast
 import re
 from ....models import RequestPoolModel, RemotesModel
 from .mixins.validator_mixin import BaseRequestValidator
 from ....utils.errors import InvalidRequestError
+from ....utils.ir_codec import parse_text
 
 class ACKValidator(BaseRequestValidator):
     def __init__(self, requestpool_model: RequestPoolModel, remotes_model: RemotesModel):
@@ -28,22 +28,19 @@ class ACKValidator(BaseRequestValidator):
         except:
             raise InvalidRequestError('Unexpected issue with loading original request.')
         
-        remotes_response = self.remotes_model.get_remotes({"remoteName": orig_request["remoteName"]})
+        remotes_response = self.remotes_model.get_remotes({"remoteName": orig_request["remoteName"]}, projection=['remoteName'])
         if remotes_response['statusCode']==404 or remotes_response['statusCode']==500:
             raise InvalidRequestError('Remote no longer exists.')
 
         #Check if button code is valid 
 
         try:
-            raw_list = ast.literal_eval(request['buttonCode'])
+            command_size = int(request['commandSize'])
+            timings = parse_text(request['buttonCode'])
         except:
             raise InvalidRequestError("Code provided is not valid code in raw format.")
-        
-        for item in raw_list:
-            if not isinstance(item, int):
-                raise InvalidRequestError
-            
-        if len(raw_list) != int(request['commandSize']):
+
+        if len(timings) != command_size:
             raise InvalidRequestError(f"Code bit length provided doesn't match the requested one of {request['commandSize']} bits")
             
         
@@ -140,21 +140,21 @@ class CMDValidator(BaseRequestValidator):
         if not re.match(pattern, request['buttonName']):
             raise InvalidRequestError('Button Name is invalid.')
 
-        remote_response = self.remotes_model.get_remotes({"remoteName": request["remoteName"]})
+        remote_response = self.remotes_model.get_remotes({"remoteName": request["remoteName"]}, projection=['remoteName', 'macAddress', 'buttons'])
 
         if remote_response['statusCode']==404 or remote_response['statusCode']==500:
             raise InvalidRequestError('Remote requested does not exist.')
         
-        for btn in remote_response['body']['buttons']:
-            if request['buttonName'] == btn['buttonName']:
-                raise InvalidRequestError('Button with that name already exists.')
+        button_response = self.remotes_model.get_button(remote_response['body'], {'buttonName': request['buttonName']})
+        if button_response['statusCode'] == 200:
+            raise InvalidRequestError('Button with that name already exists.')
 
-        devices_response = self.devices_model.get_devices({"macAddress": remote_response['body']['macAddress']})
+        devices_response = self.devices_model.get_devices({"macAddress": remote_response['body']['macAddress']}, projection=['connectionId'])
 
         if devices_response["statusCode"] == 404 or devices_response["statusCode"] == 500:
             raise InvalidRequestError('Device does not exist.')
         
-        if devices_response["statusCode"] == 200 and devices_response["body"]["connectionId"] is None:
+        if devices_response["statusCode"] == 200 and devices_response["body"].get("connectionId") is None:
             raise InvalidRequestError('Device is not connected.')
         
         
@@ -164,23 +164,19 @@ class CMDValidator(BaseRequestValidator):
 
         self.check_request(request, allowed_attributes)
 
-        remote_response = self.remotes_model.get_remotes({"remoteName": request["remoteName"]})
+        remote_response = self.remotes_model.get_remotes({"remoteName": request["remoteName"]}, projection=['remoteName', 'macAddress', 'buttons'])
 
         if remote_response['statusCode']==404 or remote_response['statusCode']==500:
             raise InvalidRequestError('Remote requested does not exist.')
         
-        button_exists = False
-        for btn in remote_response['body']['buttons']:
-            if request['buttonName'] == btn['buttonName']:
-                button_exists = True
-
-        if not button_exists:
+        button_response = self.remotes_model.get_button(remote_response['body'], {'buttonName': request['buttonName']})
+        if button_response['statusCode'] != 200:
             raise InvalidRequestError('Button requested does not exist.')
 
-        devices_response = self.devices_model.get_devices({"macAddress": remote_response['body']['macAddress']})
+        devices_response = self.devices_model.get_devices({"macAddress": remote_response['body']['macAddress']}, projection=['connectionId'])
         if devices_response["statusCode"] == 404 or devices_response["statusCode"] == 500:
             raise InvalidRequestError('Device does not exist.')
         
-        if devices_response["statusCode"] == 200 and devices_response["body"]["connectionId"] is None:
+        if devices_response["statusCode"] == 200 and devices_response["body"].get("connectionId") is None:
             raise InvalidRequestError('Device is not connected.')
     
@@ -16,15 +16,21 @@ CORS_ORIGIN = os.getenv('CORS_ORIGIN')
 
 remotes, clients, devices, requestpool, automations = RemotesModel(REMOTES_TABLE), ClientsModel(CLIENTS_TABLE), DevicesModel(DEVICES_TABLE), RequestPoolModel(REQUEST_POOL_TABLE), AutomationsModel(AUTOMATIONS_TABLE)
 
-remotes = RemotesModel(REMOTES_TABLE)
-devices = DevicesModel(DEVICES_TABLE)
-automations = AutomationsModel(AUTOMATIONS_TABLE)
 statistics = StatisticsModel(STATISTICS_TABLE)
 
+def order_neighbour(key_field: str, value: str):
+    '''
+    Function used to build the key of the item a moved item is placed next to, `None` if it is moved to an end of the list.
+    '''
+    return {key_field: value} if value else None
+
 def handle(event, context):
     body = event.get('body','')
     body = json.loads(body) if body else ''
     query_params = event.get('pathParameters','')
+    fields = (event.get('queryStringParameters') or {}).get('fields')
+    # Optional `?fields=remoteName,category` lets list views read only the attributes they render (`?fields=...,buttons` to include buttons)
+    projection = [field.strip() for field in unquote(fields).split(',') if field.strip()] if fields else None
 
     route_key = event["httpMethod"] + ' ' + event['resource']
 
@@ -35,32 +41,43 @@ def handle(event, context):
 
     endpoint_router = {
         #REMOTE ENDPOINTS
-        'GET /api/remotes': lambda : remotes.get_remotes(),
+        'GET /api/remotes': lambda : remotes.get_remotes(projection=projection or RemotesModel.SUMMARY_ATTRIBUTES, with_buttons=True),
         'POST /api/remotes': lambda: remotes.add_remote(body),
         'POST /api/remotes/sort': lambda: remotes.rearrange_items(body['newOrder'], 'remoteName'),
-        'GET /api/remotes/{remoteName}': lambda : remotes.get_remotes({"remoteName" : unquote(query_params["remoteName"])}),
+        'POST /api/remotes/{remoteName}/move': lambda: remotes.move_item({"remoteName" : unquote(query_params["remoteName"])},
+                                                                         order_neighbour('remoteName', body.get('before')),
+                                                                         order_neighbour('remoteName', body.get('after'))),
+        'GET /api/remotes/{remoteName}': lambda : remotes.get_remotes({"remoteName" : unquote(query_params["remoteName"])}, with_buttons=True),
         'DELETE /api/remotes/{remoteName}': lambda : remotes.delete_remote({"remoteName" : unquote(query_params["remoteName"])}),
         'POST /api/remotes/{remoteName}/buttons': lambda: remotes.add_button({"remoteName" : unquote(query_params["remoteName"]),
                                                                               "buttonName" : body["buttonName"],
                                                                               "buttonCode" : body["buttonCode"]}),
-        'POST /api/remotes/{remoteName}/buttons/sort': lambda: remotes.rearrange_list({"remoteName" : unquote(query_params["remoteName"])}, 'buttons', body['newOrder']),                                                 
+        'POST /api/remotes/{remoteName}/buttons/sort': lambda: remotes.rearrange_buttons({"remoteName" : unquote(query_params["remoteName"])}, body['newOrder']),                                                 
         'DELETE /api/remotes/{remoteName}/buttons/{buttonName}': lambda : remotes.delete_button({"remoteName" : unquote(query_params["remoteName"]),
                                                                                                  "buttonName" : unquote(query_params["buttonName"])}),
         #DEVICE ENDPOINTS
-        'GET /api/devices': lambda : devices.get_devices(),
+        'GET /api/devices': lambda : devices.get_devices(projection=projection),
         'POST /api/devices': lambda : devices.add_unknown_device(body),
         'POST /api/devices/sort': lambda : devices.rearrange_items(body['newOrder'], "macAddress"),
+        'POST /api/devices/{macAddress}/move': lambda : devices.move_item({"macAddress" : unquote(query_params["macAddress"])},
+                                                                          order_neighbour('macAddress', body.get('before')),
+                                                                          order_neighbour('macAddress', body.get('after'))),
         'GET /api/devices/{macAddress}': lambda : devices.get_devices({"macAddress" : unquote(query_params["macAddress"])}),
         'PUT /api/devices/{macAddress}': lambda : devices.set_device_name({"macAddress" : unquote(query_params["macAddress"])},
                                                                           {"deviceName": body["deviceName"]}),
+        'GET /api/devices/{macAddress}/remotes': lambda : remotes.get_remotes_for_device({"macAddress" : unquote(query_params["macAddress"])},
+                                                                                projection=projection, with_buttons=True),
         'DELETE /api/devices/{macAddress}': lambda : devices.delete_device({"macAddress" : unquote(query_params["macAddress"])}),
         'GET /api/devices/connected': lambda : devices.get_connected_devices(),
 
         #AUTOMATION ENDPOINTS
-        'GET /api/automations': lambda : automations.get_automations(),
+        'GET /api/automations': lambda : automations.get_automations(projection=projection),
         'GET /api/automations/{automationId}': lambda : automations.get_automation({"automationId": unquote(query_params["automationId"])}),
         'POST /api/automations': lambda : create_automation(automations, AUTOMATIONS_FUNCTION_ARN, body),
         'POST /api/automations/sort': lambda : automations.rearrange_items(body['newOrder'], 'automationId'),
+        'POST /api/automations/{automationId}/move': lambda : automations.move_item({"automationId": unquote(query_params["automationId"])},
+                                                                                    order_neighbour('automationId', body.get('before')),
+                                                                                    order_neighbour('automationId', body.get('after'))),
         'DELETE /api/automations/{automationId}': lambda : delete_automation(automations, {"automationId": unquote(query_params["automationId"])}),
         'POST /api/automations/{automationId}/state': lambda : set_automation_state(automations, {"automationId": unquote(query_params["automationId"])}, body["state"]),
         'POST /api/automations/{automationId}/start': lambda : cmd_controller.automation_execute({"automationId": unquote(query_params["automationId"])}),
@@ -1,4 +1,5 @@
 from .remotes_model import RemotesModel
+from .buttons_model import ButtonsModel
 from .clients_model import ClientsModel
 from .devices_model import DevicesModel
 from .request_pool_model import RequestPoolModel
@@ -7,6 +8,7 @@ from .statistics_model import StatisticsModel
 from .registered_users_model import RegisteredUsersModel
 __all__ = [
     'RemotesModel',
+    'ButtonsModel',
     'ClientsModel',
     'DevicesModel',
     'RequestPoolModel',
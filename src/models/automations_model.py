@@ -12,14 +12,16 @@ class AutomationsModel(ObjectDynamodb):
     Class used to handle clients.
     This class provides capability to store, retrieve, update and delete clients from AWS DynamoDB.
     '''
+    KEY_SCHEMA = {"partition_key": "automationId", "sort_key": None}
+
     def __init__(self, clients_table: str):
 
         self.validator = AutomationsValidator()
 
         super().__init__(clients_table)
         
-    def get_automations(self):
-        return self.scan_items()
+    def get_automations(self, projection: list = None):
+        return self.scan_ordered_items(projection=projection)
 
     @error_handler
     def get_automation(self, key: dict):
@@ -35,24 +37,22 @@ class AutomationsModel(ObjectDynamodb):
 
         automation_id = ''.join(random.choices(string.ascii_letters + string.digits, k=3)) + '_' + str(time.timestamp())        
 
-        response = self.get_automations()
+        response = self.next_order_values('automationId')
         if response['statusCode'] != 200:
             return {
                 'statusCode': 500,
                 'body': 'Error while retrieving automations.'
             }
-        
-        new_order_index = str(len(response["body"]))
 
         attributes = {
                         "automationId": automation_id,
                         "lastTimestamp": time.isoformat(),
-                        "executedCounter": "0",
+                        "executedCounter": 0,
                         "totalButtons": str(len(automation['buttonsList'])),
                         "errorMessage": "",
                         "runError": "False",
                         "automationState": "ENABLED",
-                        "orderIndex": new_order_index
+                        **response["body"]
                      }
         automation = { 
                         **automation, 
@@ -71,7 +71,8 @@ class AutomationsModel(ObjectDynamodb):
                                                     "errorMessage",
                                                     "runError",
                                                     "automationState",
-                                                    "orderIndex"
+                                                    "orderIndex",
+                                                    "orderKey"
                                                     ])
 
         response = self.add_item(automation)
@@ -86,12 +87,7 @@ class AutomationsModel(ObjectDynamodb):
 
         self.validator.validate(key, params=['automationId'])
         
-        response = self.delete_item(key)
-        
-        if response['statusCode'] == 200:
-            _ = self.clean_order_indexes('automationId')
-
-        return response
+        return self.delete_item(key)
     
     @error_handler
     def set_automation_state(self, key: dict, state: str):
@@ -106,26 +102,28 @@ class AutomationsModel(ObjectDynamodb):
 
         self.validator.validate(key, params=['automationId'])
 
-        automations_response = self.get_automation(key)
-
         time = datetime.now()
 
+        automations_response = self.atomic_add(key, 'executedCounter', 1,
+                                               set_values={"lastTimestamp": time.isoformat()},
+                                               return_values="ALL_NEW")
+
         if not check_response(automations_response):
             return automations_response
 
         counter = int(automations_response['body']['executedCounter'])
         totalButtons = int(automations_response['body']['totalButtons'])
 
-        if counter == totalButtons - 1:
-            self.update_item(key, { "executedCounter": '0',
+        if counter >= totalButtons:
+            self.update_item(key, { "executedCounter": 0,
                                     "lastTimestamp": time.isoformat(),
                                     "errorMessage": "",
                                     "runError": "False" })
             return {"statusCode": 200,
                     "body": "Automation Finished"} 
 
-        return self.update_item(key, { "executedCounter": f"{counter + 1}",
-                                       "lastTimestamp": time.isoformat() })
+        return {"statusCode": 201,
+                "body": "Item successfully updated."}
     
     @error_handler
     def set_error_message(self, key: dict, message: str):
@@ -147,7 +145,7 @@ class AutomationsModel(ObjectDynamodb):
 
         expired_automations = []
 
-        automations_response = self.get_automations()
+        automations_response = self.parallel_scan_items(projection=['automationId', 'lastTimestamp', 'executedCounter'])
 
         if not check_response(automations_response):
             return automations_response
@@ -156,14 +154,19 @@ class AutomationsModel(ObjectDynamodb):
         for automation in automations_response["body"]:
             automation_time = datetime.fromisoformat(automation['lastTimestamp'])
             if (time - automation_time > timedelta(seconds=40)) and int(automation["executedCounter"]) != 0:
-                expired_automations.append({"automationId": automation["automationId"]})
-
-
-        for key in expired_automations:
-            _ = self.update_item(key, { "executedCounter": '0',
-                                        "lastTimestamp": time.isoformat(),
-                                        "errorMessage": "Unexpected error. Automation didn't manage to run successfully.",
-                                        "runError": "True"})
+                expired_automations.append(automation)
+
+        for automation in expired_automations:
+            # Conditional on the scanned timestamp, so an automation that ran a step since the scan isn't reset
+            update_response = self.update_item({"automationId": automation["automationId"]},
+                                               {"executedCounter": 0,
+                                                "lastTimestamp": time.isoformat(),
+                                                "errorMessage": "Unexpected error. Automation didn't manage to run successfully.",
+                                                "runError": "True"},
+                                               condition={"lastTimestamp": automation["lastTimestamp"]})
+
+            if update_response["statusCode"] not in (201, 409):
+                return update_response
 
         return {"statusCode": 200,
                 "body": "Successfully cleaned requests."}
@@ -0,0 +1,261 @@
+import os
+from botocore.exceptions import ClientError
+from .mixins import ObjectDynamodb
+from .mixins.model_mixin import TRANSACTION_SIZE
+from .validators import RemotesValidator
+from ..utils.helpers import error_handler, serialize_item, chunks
+from ..utils.ir_codec import pack_code
+from ..utils.order_keys import MAX_KEY_LENGTH, key_between, keys_between, spaced_keys, order_key_of
+
+CACHE_TTL = float(os.getenv("BUTTONS_CACHE_TTL", "10"))
+
+class ButtonsModel(ObjectDynamodb):
+    '''
+    Class used to handle the buttons of remotes.
+    Every button is its own item, partitioned by `remoteName` and sorted by `buttonName`, so single buttons are read and
+    written without touching the rest of the remote. Buttons are shown in the order of their `orderKey`.
+    '''
+    KEY_SCHEMA = {"partition_key": "remoteName", "sort_key": "buttonName"}
+
+    def __init__(self, buttons_table: str):
+
+        self.validator = RemotesValidator()
+
+        super().__init__(buttons_table, cache_ttl=CACHE_TTL)
+
+    @error_handler
+    def get_button(self, key: dict):
+        '''
+        Method used to get a button by its' key.
+        :param dict `key`: Dictionary containing `remoteName` and `buttonName`.
+        :returns: Response 200 containing the button in body, Response 404 or Response 500 error.
+        '''
+        self.validator.validate(key, params=['remoteName', 'buttonName'])
+
+        return self.get_item(key)
+
+    @error_handler
+    def get_buttons(self, remote: dict, projection: list = None):
+        '''
+        Method used to get the buttons of a remote in display order.
+        :param dict `remote`: Dictionary containing `remoteName`.
+        :param list `projection`: Attribute names to read, `None` to read whole buttons.
+        :returns: Response 200 containing the list of buttons in body or Response 500 error.
+        '''
+        self.validator.validate(remote, params=['remoteName'])
+
+        if projection and 'orderKey' not in projection:
+            projection = [*projection, 'orderKey']
+
+        response = self.query_items(None, {'remoteName': remote['remoteName']}, projection=projection)
+        if response['statusCode'] == 200:
+            response['body'].sort(key=lambda button: button.get('orderKey', ''))
+
+        return response
+
+    @error_handler
+    def add_button(self, button: dict):
+        '''
+        Method used to add a button after the other buttons of its remote, or to replace the code of an existing button in place.
+        :param dict `button`: Dictionary containing `remoteName`, `buttonName`, `buttonCode`, `commandSize` and `buttonState`.
+        :returns: Response 201 or Response 500 error.
+        '''
+        response = self.get_buttons({'remoteName': button['remoteName']}, projection=['buttonName', 'orderKey'])
+        if response['statusCode'] != 200:
+            return response
+
+        buttons = response['body']
+        existing = [btn['orderKey'] for btn in buttons if btn['buttonName'] == button['buttonName']]
+        order_key = existing[0] if existing else key_between(buttons[-1]['orderKey'] if buttons else None, None)
+
+        return self.put_buttons([button], [order_key])
+
+    def button_items(self, buttons: list, order_keys: list = None):
+        '''
+        Method used to build the validated items of buttons as they are stored, with packed codes.
+        :param list `buttons`: List of buttons containing `remoteName`, `buttonName`, `buttonCode`, `commandSize` and `buttonState`.
+        :param list `order_keys`: `orderKey` of every button, `None` to keep the keys of `buttons`.
+        :returns: List of button items.
+        '''
+        items = []
+        for button, order_key in zip(buttons, order_keys or [button.get('orderKey') for button in buttons]):
+            item = {
+                'remoteName': button['remoteName'],
+                'buttonName': button['buttonName'],
+                'buttonCode': pack_code(button['buttonCode']),
+                'commandSize': button['commandSize'],
+                'buttonState': button.get('buttonState', 'NO'),
+                'orderKey': order_key
+            }
+            self.validator.validate({'buttonCode': (item['buttonCode'], item['commandSize']),
+                                     **{k: v for k, v in item.items() if k != 'buttonCode'}},
+                                    params=['remoteName', 'buttonName', 'buttonCode', 'commandSize', 'buttonState', 'orderKey'])
+            items.append(item)
+
+        return items
+
+    @error_handler
+    def put_buttons(self, buttons: list, order_keys: list = None, with_write: dict = None):
+        '''
+        Method used to write buttons with batched writes, packing their codes.
+        :param list `buttons`: List of buttons containing `remoteName`, `buttonName`, `buttonCode`, `commandSize` and `buttonState`.
+        :param list `order_keys`: `orderKey` of every button, `None` to keep the keys of `buttons`.
+        :param dict `with_write`: Conditional `TransactWriteItems` item the buttons only exist with (e.g. removing the list they
+                                  are moved from), `None` for independent buttons. The buttons are then written by transactions.
+        :returns: Response 201, Response 409 if the condition of `with_write` failed or Response 500 error.
+        '''
+        items = self.button_items(buttons, order_keys)
+        if with_write:
+            return self._transact_buttons(items, with_write)
+
+        response = self.batch_write(put_items=items)
+        if response['statusCode'] != 200:
+            return response
+
+        return {
+            "statusCode": 201,
+            "body": "Item successfully created."
+        }
+
+    def _transact_buttons(self, items: list, write: dict):
+        '''
+        Method used to put button items in the same transaction as `write`. Items that don't fit in it are put by earlier
+        transactions of at most 100 items, and deleted again if `write` fails, so the buttons never exist without it.
+        :param list `items`: Button items, as built by `button_items`.
+        :param dict `write`: `TransactWriteItems` item.
+        :returns: Response 201, Response 409 if the condition of `write` failed or Response 500 error.
+        '''
+        def puts(chunk: list):
+            return [{'Put': {'TableName': self.table, 'Item': serialize_item(item)}} for item in chunk]
+
+        *earlier, last = chunks(items, TRANSACTION_SIZE - 1) or [[]]
+        written = []
+        try:
+            for chunk in earlier:
+                self.dynamo_db.transact_write_items(TransactItems=puts(chunk))
+                written += chunk
+            self.dynamo_db.transact_write_items(TransactItems=[*puts(last), write])
+        except ClientError as e:
+            if written:
+                self.batch_delete([{'remoteName': item['remoteName'], 'buttonName': item['buttonName']} for item in written])
+
+            reasons = e.response.get('CancellationReasons', [])
+            if not reasons or reasons[-1].get('Code') != 'ConditionalCheckFailed':
+                raise
+            return {
+                "statusCode": 409,
+                "body": "Item doesn't match condition."
+            }
+        finally:
+            for item in items:
+                self._invalidate({'remoteName': item['remoteName'], 'buttonName': item['buttonName']})
+
+        return {
+            "statusCode": 201,
+            "body": "Item successfully created."
+        }
+
+    @error_handler
+    def delete_button(self, key: dict):
+        '''
+        Method used to delete a button by its' key.
+        :param dict `key`: Dictionary containing `remoteName` and `buttonName`.
+        :returns: Response 200 or Response 500 error.
+        '''
+        self.validator.validate(key, params=['remoteName', 'buttonName'])
+
+        return self.delete_item(key)
+
+    @error_handler
+    def delete_buttons(self, remote: dict):
+        '''
+        Method used to delete every button of a remote.
+        :param dict `remote`: Dictionary containing `remoteName`.
+        :returns: Response 200 with the number of deleted buttons in body or Response 500 error.
+        '''
+        response = self.get_buttons(remote, projection=['remoteName', 'buttonName'])
+        if response['statusCode'] != 200:
+            return response
+
+        return self.batch_delete([{'remoteName': btn['remoteName'], 'buttonName': btn['buttonName']} for btn in response['body']])
+
+    @error_handler
+    def rearrange_buttons(self, remote: dict, new_order: list):
+        '''
+        Method used to reorder the buttons of a remote, only writing the `orderKey` of the buttons that moved.
+        :param dict `remote`: Dictionary containing `remoteName`.
+        :param list `new_order`: New position of every button, in current display order.
+        :returns: Response 200, Response 400 if `new_order` is invalid, Response 409 if buttons changed concurrently or Response 500 error.
+        '''
+        response = self.get_buttons(remote, projection=['remoteName', 'buttonName'])
+        if response['statusCode'] != 200:
+            return response
+
+        buttons = response['body']
+        try:
+            new_order = [int(index) for index in new_order]
+        except (TypeError, ValueError):
+            new_order = None
+
+        if new_order is None or len(buttons) != len(new_order) or set(new_order) != set(range(len(buttons))):
+            return {
+                "statusCode": 400,
+                "body": "Indices list is invalid."
+            }
+
+        ordered = [None]*len(buttons)
+        for button, index in zip(buttons, new_order):
+            ordered[index] = button
+
+        updates = self._reorder_updates(ordered, ['remoteName', 'buttonName'])
+        if not updates:
+            return {
+                "statusCode": 200,
+                "body": "List Successfully Rearranged."
+            }
+
+        response = self._order_response(self._write_order_values(updates, 'orderKey'), "List Successfully Rearranged.")
+
+        if response['statusCode'] == 200 and max(len(update["new"]) for update in updates) > MAX_KEY_LENGTH:
+            self._rebalance_buttons(remote)
+
+        return response
+
+    def _rebalance_buttons(self, remote: dict):
+        '''
+        Method used to replace the `orderKey` of every button of a remote with short evenly spaced keys, keeping their order.
+        :param dict `remote`: Dictionary containing `remoteName`.
+        :returns: Response 200, Response 409 if buttons were moved concurrently or Response 500 error.
+        '''
+        response = self.get_buttons(remote, projection=['remoteName', 'buttonName'])
+        if response['statusCode'] != 200:
+            return response
+
+        updates = [{"Key": {'remoteName': btn['remoteName'], 'buttonName': btn['buttonName']},
+                    "old": btn['orderKey'],
+                    "new": new_key}
+                   for btn, new_key in zip(response['body'], spaced_keys(len(response['body'])))
+                   if btn['orderKey'] != new_key]
+        if not updates:
+            return {
+                "statusCode": 200,
+                "body": "Nothing to rebalance."
+            }
+
+        return self._order_response(self._write_order_values(updates, 'orderKey'), "Order keys rebalanced successfully.")
+
+    def keys_before_first(self, remote: dict, count: int):
+        '''
+        Method used to get `count` increasing order keys sorting before every button of a remote, for buttons moved from the
+        legacy `buttons` list of the remote so they keep showing first.
+        :param dict `remote`: Dictionary containing `remoteName`.
+        :param int `count`: Number of keys.
+        :returns: List of order keys.
+        '''
+        response = self.get_buttons(remote, projection=['orderKey'])
+        if response['statusCode'] != 200:
+            raise ValueError(f"Error while retrieving buttons: {response['body']}")
+
+        first = order_key_of(response['body'][0]) if response['body'] else None
+
+        return keys_between(None, first, count)
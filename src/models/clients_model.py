@@ -8,6 +8,8 @@ class ClientsModel(ObjectDynamodb):
     Class used to handle clients.
     This class provides capability to store, retrieve, update and delete clients from AWS DynamoDB.
     '''
+    KEY_SCHEMA = {"partition_key": "connectionId", "sort_key": None}
+
     def __init__(self, clients_table: str):
 
         self.validator = ClientsValidator()
@@ -28,8 +30,14 @@ class ClientsModel(ObjectDynamodb):
     def add_client(self, client: dict, query_params: dict):
 
         client["deviceType"] = query_params["deviceType"]
+        params = ['connectionId', 'deviceType']
+
+        # Devices keep their MAC address on the client so `$disconnect` can find the device by key
+        if query_params["deviceType"] == "iot":
+            client["macAddress"] = query_params["macAddress"]
+            params.append('macAddress')
 
-        self.validator.validate(client, params=['connectionId', 'deviceType'])
+        self.validator.validate(client, params=params)
 
         return self.add_item(client)
     
@@ -39,6 +47,18 @@ class ClientsModel(ObjectDynamodb):
         self.validator.validate(client, params=['connectionId'])
 
         return self.delete_item(client)
+
+    @error_handler
+    def delete_clients(self, clients: list):
+        '''
+        Method used to delete many clients with batched writes, e.g. connections found gone while broadcasting.
+        :param list `clients`: List of dictionaries containing `connectionId`.
+        :returns: Response 200 with the number of deleted clients in body or Response 500 error.
+        '''
+        for client in clients:
+            self.validator.validate(client, params=['connectionId'])
+
+        return self.batch_delete(clients)
     
     @error_handler
     def set_device_type(self, client: dict, device_type: dict):
@@ -1,22 +1,40 @@
+import os
 from .mixins import ObjectDynamodb
 from .validators import DevicesValidator
 from ..utils.helpers import error_handler, check_response
 from ..utils.errors import ResponseError
+from ..utils.order_keys import order_key_of
 from ..controllers.security_controllers.utils import generate_salt, hash_token
+
+CACHE_TTL = float(os.getenv("DEVICES_CACHE_TTL", "5"))
+
 class DevicesModel(ObjectDynamodb):
+    KEY_SCHEMA = {"partition_key": "macAddress", "sort_key": None}
+
+    # Sparse index: only devices that are connected have a `connectionId`.
+    INDEXES = {
+        "connectionId-index": {"partition_key": "connectionId", "sort_key": None, "projection": "KEYS_ONLY"}
+    }
+
     def __init__(self, devices_table: str):
 
         self.validator = DevicesValidator()
 
-        super().__init__(devices_table)
+        super().__init__(devices_table, cache_ttl=CACHE_TTL)
 
-    def get_devices(self, device: dict = None):
+    def get_devices(self, device: dict = None, projection: list = None):
+        '''
+        Method used to get a device by its' key or all devices if None.
+        :param dict `device`: Dictionary containing key `macAddress`.
+        :param list `projection`: Attribute names to read, `None` to read whole devices.
+        :returns : Response 200 containing devices in body or Response 500 error.
+        '''
         if device:
             self.validator.validate(device, params=['macAddress'])
 
-            return self.get_item(device)  
+            return self.get_item(device, projection)  
         else:      
-            return self.scan_items()
+            return self.scan_ordered_items(projection=projection)
 
     @error_handler
     def add_unknown_device(self, item: dict):
@@ -28,33 +46,31 @@ class DevicesModel(ObjectDynamodb):
 
         device = {
             "macAddress": "FF:FF:FF:FF:FF:FF",
-            "connectionId": None,
             "salt": generate_salt(),
             "deviceName": item["deviceName"]
         }
 
         device["hashToken"] = hash_token(item["token"], device["salt"])     
         
-        response = self.get_devices()
-        if response['statusCode'] != 200:
-            return {
-                'statusCode': 500,
-                'body': 'Error while retrieving devices.'
-            }
-        
-        new_order_index = str(len(response["body"]))
-
-        for item in response["body"]:
-            if item["macAddress"] == "FF:FF:FF:FF:FF:FF":
-                new_order_index = str(len(response["body"])) - 1
-
-        device['orderIndex'] = new_order_index
+        # A pending temporary device is replaced in place, keeping its position.
+        response = self.get_item({"macAddress": "FF:FF:FF:FF:FF:FF"}, projection=['orderIndex', 'orderKey'])
+        if response['statusCode'] == 200:
+            device['orderIndex'] = response['body']['orderIndex']
+            device['orderKey'] = order_key_of(response['body'])
+        else:
+            response = self.next_order_values('macAddress')
+            if response['statusCode'] != 200:
+                return {
+                    'statusCode': 500,
+                    'body': 'Error while retrieving devices.'
+                }
+            device.update(response['body'])
 
         self.validator.validate(device, params=['macAddress', 
-                                                'connectionId',
                                                 'salt',
                                                 'hashToken',
                                                 'orderIndex',
+                                                'orderKey',
                                                 'deviceName'])
         
         return self.add_item(device)
@@ -89,11 +105,13 @@ class DevicesModel(ObjectDynamodb):
         
         device = saved_entry
         device['macAddress'] = item['macAddress']
+        device['orderKey'] = order_key_of(device)
+        device.pop('connectionId', None)
         
         self.validator.validate(device, params=['macAddress', 
-                                                'connectionId',
                                                 'salt',
                                                 'orderIndex',
+                                                'orderKey',
                                                 'hashToken',
                                                 'deviceName'])
 
@@ -104,52 +122,95 @@ class DevicesModel(ObjectDynamodb):
         
         self.validator.validate(device, params=['macAddress'])
 
-        response = self.delete_item(device)
-        
-        if response['statusCode'] == 200:
-            _ = self.clean_order_indexes('macAddress')
-
-        return response
+        return self.delete_item(device)
 
     @error_handler
     def get_connected_devices(self):
         '''
-        Method that scans all devices and returns an array of devices that have connection id.
+        Method that returns an array of devices that have connection id.
+        Only connected devices are in the sparse `connectionId-index`, so the index is scanned and those devices are read by key.
         '''
-        response = self.scan_items()
+        response = self.scan_items(index_name="connectionId-index")
 
-        if not check_response(response):
+        if response['statusCode'] != 200:
             raise ResponseError(f"Unexpected response error when using `scan_items`, received status code {response['statusCode']} and body {response['body']}.")
 
-        new_list = []
-        for device in response["body"]:
-            if device["connectionId"]:
-                new_list.append(device)
+        if not response["body"]:
+            return response
+
+        response = self.batch_get_items([{"macAddress": device["macAddress"]} for device in response["body"]])
 
-        response["body"] = new_list
+        if not check_response(response):
+            raise ResponseError(f"Unexpected response error when using `batch_get_items`, received status code {response['statusCode']} and body {response['body']}.")
+
+        response["body"] = [device for device in response["body"] if device and device.get("connectionId")]
             
         return response
 
     @error_handler
-    def remove_connection(self, connection: dict):
+    def get_connection(self, mac_address: dict, fresh: bool = False):
         '''
-        Method that searches for the device matching the connection and sets it to null if exists.
-        :param dict `connection`: Dictionary containing key `connectionId` and value the connection_id.
-        :returns : Response 200 or Error
+        Method used to get the connection id of a device.
+        :param dict `mac_address`: Dictionary containing key `macAddress`.
+        :param bool `fresh`: Whether to read the device from the table instead of the item cache, e.g. after its cached connection was found gone.
+        :returns : Response 200 containing the `connectionId` in body, Response 404 if the device doesn't exist or isn't connected or Error.
         '''
-        response = self.scan_items(connection)
-        
-        if not check_response(response):
-            raise ResponseError(f"Unexpected response error when using `scan_items`, received status code {response['statusCode']} and body {response['body']}.")
-        
-        device = response["body"][0]
-        mac_address = {
-            "macAddress": device["macAddress"]
+        self.validator.validate(mac_address, params=['macAddress'])
+
+        if fresh:
+            self._invalidate(mac_address)
+
+        response = self.get_item(mac_address, projection=['connectionId'])
+        if response['statusCode'] != 200:
+            return response
+
+        if not response['body'].get('connectionId'):
+            return {
+                "statusCode": 404,
+                "body": "Device isn't connected."
+            }
+
+        return {
+            "statusCode": 200,
+            "body": response['body']['connectionId']
         }
 
-        self.validator.validate(mac_address, params=['macAddress'])
+    @error_handler
+    def remove_connection(self, connection: dict, mac_address: dict = None):
+        '''
+        Method that removes the connection id of the device holding `connection`, if any.
+        :param dict `connection`: Dictionary containing key `connectionId` and value the connection_id.
+        :param dict `mac_address`: Dictionary containing key `macAddress` of the device, as recorded by the client at `$connect`.
+                                   If `None` the device is looked up through `connectionId-index`.
+        :returns : Response 200, Response 404 if no device has this connection or Error
+        '''
+        if mac_address is None:
+            response = self.query_items("connectionId-index", connection, projection=['macAddress'])
+            
+            if response['statusCode'] != 200:
+                raise ResponseError(f"Unexpected response error when using `query_items`, received status code {response['statusCode']} and body {response['body']}.")
+            
+            if not response["body"]:
+                return {
+                    "statusCode": 404,
+                    "body": "No device with this connection."
+                }
 
-        return self.update_item(mac_address, {"connectionId": None})
+            mac_address = {
+                "macAddress": response["body"][0]["macAddress"]
+            }
+
+        self.validator.validate({**mac_address, **connection}, params=['macAddress', 'connectionId'])
+
+        # Conditional so a late `$disconnect` never clears the connection of a device that has already reconnected
+        response = self.update_item(mac_address, remove=['connectionId'], condition=connection)
+        if response['statusCode'] == 409:
+            return {
+                "statusCode": 404,
+                "body": "No device with this connection."
+            }
+
+        return response
 
     @error_handler
     def set_device_name(self, mac_address: dict, device_name: dict):
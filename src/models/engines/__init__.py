@@ -0,0 +1,13 @@
+from .base import StorageEngine
+from .dynamodb_engine import DynamoDBEngine
+from .memory_engine import MemoryEngine
+from .sqlite_engine import SQLiteEngine
+from .factory import get_engine
+
+__all__ = [
+    'StorageEngine',
+    'DynamoDBEngine',
+    'MemoryEngine',
+    'SQLiteEngine',
+    'get_engine'
+]
@@ -0,0 +1,77 @@
+from abc import ABC, abstractmethod
+
+
+class StorageEngine(ABC):
+    '''
+    Interface of the storage `ObjectDynamodb` reads and writes items through.
+
+    Engines expose the subset of the low-level DynamoDB client API used by the models, with the same arguments,
+    attribute-value formats, responses and `ClientError` codes, so every model behaves the same on any engine.
+    '''
+
+    @abstractmethod
+    def ensure_table(self, table: str, key_schema: dict, indexes: dict = None):
+        '''
+        Method used to declare the schema of `table` before it is used. Engines backed by managed tables ignore it.
+
+        :param str `table`: Name of the table.
+        :param dict `key_schema`: Dictionary with the `partition_key` and `sort_key` (or `None`) attribute names of the table.
+        :param dict `indexes`: Secondary indexes of the table, as declared in `ObjectDynamodb.INDEXES`.
+        '''
+
+    @abstractmethod
+    def get_item(self, **kwargs):
+        '''
+        Method used to read a single item by `Key`, supporting `ProjectionExpression`.
+        '''
+
+    @abstractmethod
+    def put_item(self, **kwargs):
+        '''
+        Method used to create or replace an `Item`, supporting `ConditionExpression`.
+        '''
+
+    @abstractmethod
+    def update_item(self, **kwargs):
+        '''
+        Method used to update (or create) the item with `Key` through an `UpdateExpression`, including list operations
+        (`list_append`) and counters (`ADD`), supporting `ConditionExpression` and `ReturnValues`.
+        '''
+
+    @abstractmethod
+    def delete_item(self, **kwargs):
+        '''
+        Method used to delete the item with `Key`, supporting `ConditionExpression`.
+        '''
+
+    @abstractmethod
+    def scan(self, **kwargs):
+        '''
+        Method used to read a page of a table or index, supporting `FilterExpression`, `ProjectionExpression`,
+        `Limit`, `ExclusiveStartKey` and parallel `Segment`/`TotalSegments`.
+        '''
+
+    @abstractmethod
+    def query(self, **kwargs):
+        '''
+        Method used to read a page of the items of a table or index matching a `KeyConditionExpression`.
+        '''
+
+    @abstractmethod
+    def batch_get_item(self, **kwargs):
+        '''
+        Method used to read the items of several `Keys` per table in `RequestItems`.
+        '''
+
+    @abstractmethod
+    def batch_write_item(self, **kwargs):
+        '''
+        Method used to apply several `PutRequest`/`DeleteRequest` entries per table in `RequestItems`.
+        '''
+
+    @abstractmethod
+    def transact_write_items(self, **kwargs):
+        '''
+        Method used to apply `Put`, `Update`, `Delete` and `ConditionCheck` entries of `TransactItems` atomically,
+        cancelling all of them with `CancellationReasons` if any condition fails.
+        '''
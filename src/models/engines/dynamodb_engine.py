@@ -0,0 +1,55 @@
+from ...utils.aws_clients import get_client
+from .base import StorageEngine
+
+
+class DynamoDBEngine(StorageEngine):
+    '''
+    Engine storing items in AWS DynamoDB. Calls are forwarded to a boto3 DynamoDB client, tables and indexes are
+    created by the deployment (`serverless.yml`).
+    '''
+    def __init__(self, client=None):
+        '''
+        :param `client`: boto3 DynamoDB client, `None` to use the client shared by the process, created on first use.
+        '''
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_client('dynamodb')
+        return self._client
+
+    def ensure_table(self, table: str, key_schema: dict, indexes: dict = None):
+        pass
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def get_item(self, **kwargs):
+        return self.client.get_item(**kwargs)
+
+    def put_item(self, **kwargs):
+        return self.client.put_item(**kwargs)
+
+    def update_item(self, **kwargs):
+        return self.client.update_item(**kwargs)
+
+    def delete_item(self, **kwargs):
+        return self.client.delete_item(**kwargs)
+
+    def scan(self, **kwargs):
+        return self.client.scan(**kwargs)
+
+    def query(self, **kwargs):
+        return self.client.query(**kwargs)
+
+    def batch_get_item(self, **kwargs):
+        return self.client.batch_get_item(**kwargs)
+
+    def batch_write_item(self, **kwargs):
+        return self.client.batch_write_item(**kwargs)
+
+    def transact_write_items(self, **kwargs):
+        return self.client.transact_write_items(**kwargs)
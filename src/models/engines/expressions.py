@@ -0,0 +1,358 @@
+'''
+Evaluation of DynamoDB expressions against items in DynamoDB attribute-value format, used by the local storage engines.
+
+Supports the subset of the expression language `ObjectDynamodb` writes:
+conditions (`=`, `<>`, `<`, `<=`, `>`, `>=`, `BETWEEN`, `begins_with`, `attribute_exists`, `attribute_not_exists`, `attribute_type`, `AND`, `OR`, `NOT`),
+updates (`SET` with `list_append`, `if_not_exists`, `+` and `-`, `REMOVE` and `ADD`) and projections of top-level attributes.
+'''
+import re
+from decimal import Decimal
+from functools import lru_cache
+
+_TOKEN = re.compile(r"\s*(<=|>=|<>|[=<>(),+\-]|[#:]?[A-Za-z0-9_.]+)")
+_COMPARATORS = ("=", "<>", "<", "<=", ">", ">=")
+_UPDATE_CLAUSES = ("SET", "REMOVE", "ADD", "DELETE")
+
+
+class ExpressionError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+def _tokenize(expression: str):
+    tokens, position = [], 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match:
+            raise ExpressionError(f"Invalid expression `{expression}` at position {position}.")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, expression: str):
+        self.tokens = _tokenize(expression)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self, expected: str = None):
+        token = self.peek()
+        if token is None or (expected is not None and token.upper() != expected):
+            raise ExpressionError(f"Expected `{expected}`, received `{token}`.")
+        self.position += 1
+        return token
+
+    def done(self):
+        return self.position == len(self.tokens)
+
+    def condition(self):
+        node = self.conjunction()
+        while (self.peek() or '').upper() == "OR":
+            self.take()
+            node = ("or", node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.negation()
+        while (self.peek() or '').upper() == "AND":
+            self.take()
+            node = ("and", node, self.negation())
+        return node
+
+    def negation(self):
+        if (self.peek() or '').upper() == "NOT":
+            self.take()
+            return ("not", self.negation())
+        return self.primary()
+
+    def primary(self):
+        token = self.peek()
+
+        if token == "(":
+            self.take("(")
+            node = self.condition()
+            self.take(")")
+            return node
+
+        if token in ("attribute_exists", "attribute_not_exists", "attribute_type", "begins_with"):
+            self.take()
+            self.take("(")
+            arguments = [self.operand()]
+            while self.peek() == ",":
+                self.take(",")
+                arguments.append(self.operand())
+            self.take(")")
+            return (token, *arguments)
+
+        left = self.operand()
+        operator = self.take()
+        if operator.upper() == "BETWEEN":
+            lower = self.operand()
+            self.take("AND")
+            return ("between", left, lower, self.operand())
+        if operator not in _COMPARATORS:
+            raise ExpressionError(f"Unsupported operator `{operator}`.")
+        return ("compare", operator, left, self.operand())
+
+    def operand(self):
+        token = self.take()
+        if token in ("(", ")", ",") or token in _COMPARATORS:
+            raise ExpressionError(f"Expected an attribute or value, received `{token}`.")
+        return ("value", token) if token.startswith(":") else ("path", token)
+
+    def value_expression(self):
+        token = self.peek()
+        if token in ("list_append", "if_not_exists"):
+            self.take()
+            self.take("(")
+            first = self.value_expression()
+            self.take(",")
+            second = self.value_expression()
+            self.take(")")
+            node = (token, first, second)
+        else:
+            node = self.operand()
+
+        if self.peek() in ("+", "-"):
+            return (self.take(), node, self.value_expression())
+        return node
+
+    def update(self):
+        actions = []
+        while not self.done():
+            clause = self.take().upper()
+            if clause not in _UPDATE_CLAUSES:
+                raise ExpressionError(f"Unsupported update clause `{clause}`.")
+            while True:
+                path = self.operand()
+                if clause == "SET":
+                    self.take("=")
+                    actions.append(("set", path, self.value_expression()))
+                elif clause == "REMOVE":
+                    actions.append(("remove", path))
+                else:
+                    actions.append((clause.lower(), path, self.operand()))
+                if self.peek() != ",":
+                    break
+                self.take(",")
+        return actions
+
+
+@lru_cache(maxsize=512)
+def parse_condition(expression: str):
+    '''
+    Function used to parse a condition, filter or key condition expression.
+    :param str `expression`: The expression.
+    :return : Syntax tree of the expression, evaluated with `evaluate_condition`.
+    '''
+    parser = _Parser(expression)
+    node = parser.condition()
+    if not parser.done():
+        raise ExpressionError(f"Unexpected `{parser.peek()}` in `{expression}`.")
+    return node
+
+
+@lru_cache(maxsize=512)
+def parse_update(expression: str):
+    '''
+    Function used to parse an update expression.
+    :param str `expression`: The expression.
+    :return : List of actions, applied with `apply_update`.
+    '''
+    return _Parser(expression).update()
+
+
+def resolve_name(path: tuple, names: dict):
+    name = path[1]
+    if name.startswith("#"):
+        if name not in (names or {}):
+            raise ExpressionError(f"Attribute name `{name}` is not defined.")
+        return names[name]
+    return name
+
+
+def resolve_value(operand: tuple, item: dict, names: dict, values: dict):
+    if operand[0] == "value":
+        if operand[1] not in (values or {}):
+            raise ExpressionError(f"Attribute value `{operand[1]}` is not defined.")
+        return values[operand[1]]
+    return item.get(resolve_name(operand, names))
+
+
+def _number(value: dict):
+    return Decimal(value['N'])
+
+
+def format_number(number: Decimal):
+    '''
+    Function used to write a number in DynamoDB string format.
+    :param Decimal `number`: The number.
+    :return : The number as a string.
+    '''
+    if number == number.to_integral_value():
+        return str(int(number))
+    return str(number.normalize())
+
+
+def compare(left: dict, right: dict):
+    '''
+    Function used to order two attribute values of the same scalar type.
+    :param dict `left`: Attribute value.
+    :param dict `right`: Attribute value.
+    :return : Negative, zero or positive like `cmp`, `None` if they can't be ordered.
+    '''
+    if left is None or right is None:
+        return None
+
+    (left_type, left_value), = left.items()
+    (right_type, right_value), = right.items()
+    if left_type != right_type:
+        return None
+
+    if left_type == 'N':
+        left_value, right_value = Decimal(left_value), Decimal(right_value)
+    elif left_type not in ('S', 'B'):
+        return 0 if left_value == right_value else None
+
+    return (left_value > right_value) - (left_value < right_value)
+
+
+def evaluate_condition(node: tuple, item: dict, names: dict = None, values: dict = None):
+    '''
+    Function used to evaluate a parsed condition against `item`.
+    :param tuple `node`: Syntax tree returned by `parse_condition`.
+    :param dict `item`: Item in DynamoDB format (`{}` if it doesn't exist).
+    :param dict `names`: `ExpressionAttributeNames`.
+    :param dict `values`: `ExpressionAttributeValues`.
+    :return : True if the item satisfies the condition.
+    '''
+    kind = node[0]
+
+    if kind == "and":
+        return evaluate_condition(node[1], item, names, values) and evaluate_condition(node[2], item, names, values)
+    if kind == "or":
+        return evaluate_condition(node[1], item, names, values) or evaluate_condition(node[2], item, names, values)
+    if kind == "not":
+        return not evaluate_condition(node[1], item, names, values)
+    if kind == "attribute_exists":
+        return resolve_name(node[1], names) in item
+    if kind == "attribute_not_exists":
+        return resolve_name(node[1], names) not in item
+    if kind == "attribute_type":
+        value, attribute_type = resolve_value(node[1], item, names, values), resolve_value(node[2], item, names, values)
+        return value is not None and 'S' in attribute_type and attribute_type['S'] in value
+    if kind == "begins_with":
+        value, prefix = resolve_value(node[1], item, names, values), resolve_value(node[2], item, names, values)
+        return value is not None and 'S' in value and 'S' in prefix and value['S'].startswith(prefix['S'])
+    if kind == "between":
+        value = resolve_value(node[1], item, names, values)
+        lower = compare(value, resolve_value(node[2], item, names, values))
+        upper = compare(value, resolve_value(node[3], item, names, values))
+        return lower is not None and upper is not None and lower >= 0 and upper <= 0
+
+    _, operator, left, right = node
+    order = compare(resolve_value(left, item, names, values), resolve_value(right, item, names, values))
+    if operator == "<>":
+        return order != 0
+    if order is None:
+        return False
+    return {"=": order == 0, "<": order < 0, "<=": order <= 0, ">": order > 0, ">=": order >= 0}[operator]
+
+
+def key_equalities(node: tuple, names: dict = None):
+    '''
+    Function used to find the attributes a key condition matches for equality (e.g. the partition key of a query).
+    :param tuple `node`: Syntax tree returned by `parse_condition`.
+    :param dict `names`: `ExpressionAttributeNames`.
+    :return : Dictionary of attribute name to the value placeholder it must equal.
+    '''
+    if node[0] == "and":
+        return {**key_equalities(node[1], names), **key_equalities(node[2], names)}
+    if node[0] == "compare" and node[1] == "=" and node[2][0] == "path" and node[3][0] == "value":
+        return {resolve_name(node[2], names): node[3][1]}
+    return {}
+
+
+def _evaluate_value(node: tuple, item: dict, names: dict, values: dict):
+    kind = node[0]
+
+    if kind == "list_append":
+        first, second = _evaluate_value(node[1], item, names, values), _evaluate_value(node[2], item, names, values)
+        if first is None or second is None or 'L' not in first or 'L' not in second:
+            raise ExpressionError("An operand in the update expression has an incorrect data type.")
+        return {'L': first['L'] + second['L']}
+    if kind == "if_not_exists":
+        existing = resolve_value(node[1], item, names, values)
+        return existing if existing is not None else _evaluate_value(node[2], item, names, values)
+    if kind in ("+", "-"):
+        first, second = _evaluate_value(node[1], item, names, values), _evaluate_value(node[2], item, names, values)
+        if first is None or second is None or 'N' not in first or 'N' not in second:
+            raise ExpressionError("An operand in the update expression has an incorrect data type.")
+        result = _number(first) + _number(second) if kind == "+" else _number(first) - _number(second)
+        return {'N': format_number(result)}
+
+    value = resolve_value(node, item, names, values)
+    if value is None:
+        raise ExpressionError("The provided expression refers to an attribute that does not exist in the item.")
+    return value
+
+
+def apply_update(actions: list, item: dict, names: dict = None, values: dict = None):
+    '''
+    Function used to apply a parsed update expression to a copy of `item`.
+    :param list `actions`: Actions returned by `parse_update`.
+    :param dict `item`: Item in DynamoDB format.
+    :param dict `names`: `ExpressionAttributeNames`.
+    :param dict `values`: `ExpressionAttributeValues`.
+    :return : Tuple of the updated item and the names of the attributes that were set or added.
+    '''
+    updated, changed = dict(item), []
+
+    for action in actions:
+        name = resolve_name(action[1], names)
+
+        if action[0] == "set":
+            updated[name] = _evaluate_value(action[2], item, names, values)
+            changed.append(name)
+        elif action[0] == "remove":
+            updated.pop(name, None)
+        elif action[0] == "add":
+            delta = resolve_value(action[2], item, names, values)
+            existing = updated.get(name)
+            if 'N' in delta:
+                if existing is not None and 'N' not in existing:
+                    raise ExpressionError("An operand in the update expression has an incorrect data type.")
+                updated[name] = {'N': format_number((_number(existing) if existing else 0) + _number(delta))}
+            else:
+                (set_type, elements), = delta.items()
+                updated[name] = {set_type: list(dict.fromkeys((existing or {}).get(set_type, []) + elements))}
+            changed.append(name)
+        else:
+            (set_type, elements), = resolve_value(action[2], item, names, values).items()
+            if name in updated:
+                remaining = [element for element in updated[name].get(set_type, []) if element not in elements]
+                if remaining:
+                    updated[name] = {set_type: remaining}
+                else:
+                    del updated[name]
+
+    return updated, changed
+
+
+def project(item: dict, expression: str = None, names: dict = None):
+    '''
+    Function used to keep only the attributes of `item` listed in a projection expression.
+    :param dict `item`: Item in DynamoDB format.
+    :param str `expression`: `ProjectionExpression`, `None` to keep every attribute.
+    :param dict `names`: `ExpressionAttributeNames`.
+    :return : The projected item.
+    '''
+    if not expression:
+        return item
+
+    attributes = [resolve_name(("path", path.strip()), names) for path in expression.split(",")]
+    return {attribute: item[attribute] for attribute in attributes if attribute in item}
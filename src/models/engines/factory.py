@@ -0,0 +1,32 @@
+import os
+import threading
+from .dynamodb_engine import DynamoDBEngine
+from .memory_engine import MemoryEngine
+from .sqlite_engine import SQLiteEngine
+
+STORAGE_ENGINE = os.getenv("STORAGE_ENGINE", "dynamodb")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "airremote.db")
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(name: str = None):
+    '''
+    Function used to get the storage engine shared by every model of the process, creating it on first use.
+    :param str `name`: `dynamodb`, `memory` or `sqlite`, `None` to use the `STORAGE_ENGINE` environment variable.
+    :return : The storage engine.
+    '''
+    name = name or STORAGE_ENGINE
+
+    with _engines_lock:
+        if name not in _engines:
+            if name == "dynamodb":
+                _engines[name] = DynamoDBEngine()
+            elif name == "memory":
+                _engines[name] = MemoryEngine()
+            elif name == "sqlite":
+                _engines[name] = SQLiteEngine(SQLITE_PATH)
+            else:
+                raise ValueError(f"Storage engine `{name}` is not supported, expected `dynamodb`, `memory` or `sqlite`.")
+        return _engines[name]
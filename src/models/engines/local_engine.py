@@ -0,0 +1,367 @@
+import json
+import zlib
+import base64
+from abc import abstractmethod
+from bisect import bisect_right
+from functools import cmp_to_key
+from botocore.exceptions import ClientError
+from .base import StorageEngine
+from .expressions import ExpressionError, parse_condition, parse_update, evaluate_condition, apply_update, key_equalities, project, compare
+
+OK_RESPONSE = {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+
+def encode_value(value: dict):
+    '''
+    Function used to make an attribute value JSON serializable (binary values are base64 encoded).
+    :param dict `value`: Attribute value in DynamoDB format.
+    :return : JSON serializable attribute value.
+    '''
+    (value_type, data), = value.items()
+    if value_type == 'B':
+        return {'B': base64.b64encode(data).decode()}
+    if value_type == 'BS':
+        return {'BS': [base64.b64encode(element).decode() for element in data]}
+    if value_type == 'M':
+        return {'M': {k: encode_value(v) for k, v in data.items()}}
+    if value_type == 'L':
+        return {'L': [encode_value(element) for element in data]}
+    return value
+
+
+def decode_value(value: dict):
+    '''
+    Function used to revert `encode_value`.
+    :param dict `value`: JSON serializable attribute value.
+    :return : Attribute value in DynamoDB format.
+    '''
+    (value_type, data), = value.items()
+    if value_type == 'B':
+        return {'B': base64.b64decode(data)}
+    if value_type == 'BS':
+        return {'BS': [base64.b64decode(element) for element in data]}
+    if value_type == 'M':
+        return {'M': {k: decode_value(v) for k, v in data.items()}}
+    if value_type == 'L':
+        return {'L': [decode_value(element) for element in data]}
+    return value
+
+
+def dump_value(value: dict):
+    '''
+    Function used to get the canonical string of a key attribute value, used to store and order keys.
+    '''
+    return json.dumps(encode_value(value), sort_keys=True, separators=(',', ':'))
+
+
+def client_error(code: str, message: str, operation: str, **extra):
+    return ClientError({'Error': {'Code': code, 'Message': message}, **extra}, operation)
+
+
+class LocalEngine(StorageEngine):
+    '''
+    Base class of the engines storing items locally. It implements the DynamoDB request semantics (expressions,
+    pagination, segments, indexes, batches and transactions) on top of a few storage primitives implemented by subclasses.
+
+    Keys are stored as `(partition, sort)` tuples of canonical value strings (`sort` is `''` for tables without a sort key).
+    '''
+    def __init__(self):
+        self.schemas = {}
+
+    # Storage primitives
+
+    @abstractmethod
+    def _transaction(self, write: bool = True):
+        '''
+        Context manager making the storage operations inside it atomic.
+
+        :param bool `write`: Whether the operations write, `False` for reads, which engines may run concurrently.
+        '''
+
+    @abstractmethod
+    def _load(self, table: str, key: tuple):
+        '''
+        Method used to read the item stored under `key`, `None` if there is none.
+        '''
+
+    @abstractmethod
+    def _store(self, table: str, key: tuple, item: dict, previous: dict = None):
+        '''
+        Method used to store `item` under `key`, replacing `previous` in the partitions of the table and its indexes.
+        '''
+
+    @abstractmethod
+    def _remove(self, table: str, key: tuple, previous: dict):
+        '''
+        Method used to delete the item `previous` stored under `key`.
+        '''
+
+    @abstractmethod
+    def _scan_entries(self, table: str):
+        '''
+        Method used to get every `(key, item)` of `table` in key order.
+        '''
+
+    @abstractmethod
+    def _partition(self, table: str, index_name: str, partition: str):
+        '''
+        Method used to get the items whose partition key in the table (`index_name` `None`) or index is `partition`.
+        '''
+
+    # Schemas and keys
+
+    def ensure_table(self, table: str, key_schema: dict, indexes: dict = None):
+        if not key_schema:
+            raise ValueError(f"Table `{table}` needs a key schema to be stored by a local engine.")
+        self.schemas[table] = {"key": key_schema, "indexes": indexes or {}}
+
+    def _schema(self, table: str, operation: str):
+        if table not in self.schemas:
+            raise client_error('ResourceNotFoundException', f"Requested resource not found: Table: {table} not found", operation)
+        return self.schemas[table]
+
+    def _index_schema(self, table: str, index_name: str, operation: str):
+        schema = self._schema(table, operation)
+        if index_name is None:
+            return schema["key"]
+        if index_name not in schema["indexes"]:
+            raise client_error('ValidationException', f"The table does not have the specified index: {index_name}", operation)
+        return schema["indexes"][index_name]
+
+    def _key(self, table: str, attributes: dict, operation: str):
+        key_schema = self._schema(table, operation)["key"]
+        try:
+            partition = dump_value(attributes[key_schema["partition_key"]])
+            sort = dump_value(attributes[key_schema["sort_key"]]) if key_schema.get("sort_key") else ''
+        except KeyError:
+            raise client_error('ValidationException', "The provided key element does not match the schema", operation)
+        return (partition, sort)
+
+    def _key_attributes(self, table: str, item: dict, index_name: str = None):
+        names = [name for name in self.schemas[table]["key"].values() if name]
+        if index_name is not None:
+            names += [name for attribute, name in self.schemas[table]["indexes"][index_name].items()
+                      if attribute in ("partition_key", "sort_key") and name]
+        return {name: item[name] for name in dict.fromkeys(names)}
+
+    def _index_entries(self, table: str, item: dict):
+        '''
+        Method used to get the `(index name, partition)` entries of `item`, one for the table itself and one per index it has keys for.
+        '''
+        schema = self.schemas[table]
+        entries = [(None, dump_value(item[schema["key"]["partition_key"]]))]
+        for index_name, index in schema["indexes"].items():
+            if all(item.get(index[attribute]) is not None for attribute in ("partition_key", "sort_key") if index.get(attribute)):
+                entries.append((index_name, dump_value(item[index["partition_key"]])))
+        return entries
+
+    def _index_view(self, table: str, item: dict, index_name: str = None):
+        if index_name is None or self.schemas[table]["indexes"][index_name].get("projection", "ALL") == "ALL":
+            return item
+        return self._key_attributes(table, item, index_name)
+
+    # Conditions
+
+    @staticmethod
+    def _check(expression: str, item: dict, names: dict, values: dict, operation: str):
+        if not expression:
+            return True
+        try:
+            return evaluate_condition(parse_condition(expression), item or {}, names, values)
+        except ExpressionError as e:
+            raise client_error('ValidationException', str(e), operation)
+
+    def _require(self, expression: str, item: dict, names: dict, values: dict, operation: str):
+        if not self._check(expression, item, names, values, operation):
+            raise client_error('ConditionalCheckFailedException', "The conditional request failed", operation)
+
+    def _updated(self, table: str, key: dict, previous: dict, expression: str, names: dict, values: dict, operation: str):
+        try:
+            item, changed = apply_update(parse_update(expression), previous or dict(key), names, values)
+        except ExpressionError as e:
+            raise client_error('ValidationException', str(e), operation)
+
+        if any(name in changed for name in self.schemas[table]["key"].values() if name):
+            raise client_error('ValidationException', "Cannot update attribute, this attribute is part of the key", operation)
+        return item, changed
+
+    # Single item operations
+
+    def get_item(self, TableName: str, Key: dict, ProjectionExpression: str = None, ExpressionAttributeNames: dict = None, **kwargs):
+        with self._transaction(write=False):
+            item = self._load(TableName, self._key(TableName, Key, 'GetItem'))
+
+        response = dict(OK_RESPONSE)
+        if item is not None:
+            response['Item'] = project(item, ProjectionExpression, ExpressionAttributeNames)
+        return response
+
+    def put_item(self, TableName: str, Item: dict, ConditionExpression: str = None, ExpressionAttributeNames: dict = None, ExpressionAttributeValues: dict = None, **kwargs):
+        key = self._key(TableName, Item, 'PutItem')
+        with self._transaction():
+            previous = self._load(TableName, key)
+            self._require(ConditionExpression, previous, ExpressionAttributeNames, ExpressionAttributeValues, 'PutItem')
+            self._store(TableName, key, dict(Item), previous)
+        return dict(OK_RESPONSE)
+
+    def update_item(self, TableName: str, Key: dict, UpdateExpression: str, ConditionExpression: str = None, ExpressionAttributeNames: dict = None, ExpressionAttributeValues: dict = None, ReturnValues: str = "NONE", **kwargs):
+        key = self._key(TableName, Key, 'UpdateItem')
+        with self._transaction():
+            previous = self._load(TableName, key)
+            self._require(ConditionExpression, previous, ExpressionAttributeNames, ExpressionAttributeValues, 'UpdateItem')
+            item, changed = self._updated(TableName, Key, previous, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues, 'UpdateItem')
+            self._store(TableName, key, item, previous)
+
+        response = dict(OK_RESPONSE)
+        if ReturnValues == "ALL_NEW":
+            response['Attributes'] = item
+        elif ReturnValues == "UPDATED_NEW":
+            response['Attributes'] = {name: item[name] for name in changed if name in item}
+        elif ReturnValues == "ALL_OLD" and previous:
+            response['Attributes'] = previous
+        return response
+
+    def delete_item(self, TableName: str, Key: dict, ConditionExpression: str = None, ExpressionAttributeNames: dict = None, ExpressionAttributeValues: dict = None, ReturnValues: str = "NONE", **kwargs):
+        key = self._key(TableName, Key, 'DeleteItem')
+        with self._transaction():
+            previous = self._load(TableName, key)
+            self._require(ConditionExpression, previous, ExpressionAttributeNames, ExpressionAttributeValues, 'DeleteItem')
+            if previous is not None:
+                self._remove(TableName, key, previous)
+
+        response = dict(OK_RESPONSE)
+        if ReturnValues == "ALL_OLD" and previous:
+            response['Attributes'] = previous
+        return response
+
+    # Reads of many items
+
+    def _page(self, table: str, entries: list, index_name: str, start_position: int, kwargs: dict, operation: str):
+        '''
+        Method used to cut a page out of `entries` (`(key, item)` pairs in read order), applying `Limit`, filters and projections.
+        '''
+        limit = kwargs.get('Limit')
+        evaluated = entries[start_position:start_position + limit] if limit else entries[start_position:]
+        names, values = kwargs.get('ExpressionAttributeNames'), kwargs.get('ExpressionAttributeValues')
+
+        items = [self._index_view(table, item, index_name) for _, item in evaluated]
+        items = [item for item in items if self._check(kwargs.get('FilterExpression'), item, names, values, operation)]
+
+        response = {**OK_RESPONSE, 'ScannedCount': len(evaluated), 'Count': len(items)}
+        if kwargs.get('Select') != 'COUNT':
+            response['Items'] = [project(item, kwargs.get('ProjectionExpression'), names) for item in items]
+        if limit and start_position + limit < len(entries):
+            response['LastEvaluatedKey'] = self._key_attributes(table, evaluated[-1][1], index_name)
+        return response
+
+    def scan(self, TableName: str, IndexName: str = None, Segment: int = None, TotalSegments: int = None, ExclusiveStartKey: dict = None, **kwargs):
+        self._index_schema(TableName, IndexName, 'Scan')
+
+        with self._transaction(write=False):
+            entries = self._scan_entries(TableName)
+
+        if IndexName is not None:
+            entries = [(key, item) for key, item in entries if any(index == IndexName for index, _ in self._index_entries(TableName, item))]
+        if TotalSegments:
+            entries = [(key, item) for key, item in entries if zlib.crc32(key[0].encode()) % TotalSegments == Segment]
+
+        start_position = 0
+        if ExclusiveStartKey:
+            start_position = bisect_right([key for key, _ in entries], self._key(TableName, ExclusiveStartKey, 'Scan'))
+
+        return self._page(TableName, entries, IndexName, start_position, kwargs, 'Scan')
+
+    def query(self, TableName: str, KeyConditionExpression: str, IndexName: str = None, ScanIndexForward: bool = True, ExclusiveStartKey: dict = None, **kwargs):
+        key_schema = self._index_schema(TableName, IndexName, 'Query')
+        names, values = kwargs.get('ExpressionAttributeNames'), kwargs.get('ExpressionAttributeValues') or {}
+
+        try:
+            condition = parse_condition(KeyConditionExpression)
+        except ExpressionError as e:
+            raise client_error('ValidationException', str(e), 'Query')
+        partition_value = key_equalities(condition, names).get(key_schema["partition_key"])
+        if partition_value is None:
+            raise client_error('ValidationException', "Query condition missed key schema element", 'Query')
+
+        with self._transaction(write=False):
+            items = self._partition(TableName, IndexName, dump_value(values[partition_value]))
+
+        items = [item for item in items if evaluate_condition(condition, item, names, values)]
+        entries = [(self._key(TableName, item, 'Query'), item) for item in items]
+
+        sort_key = key_schema.get("sort_key")
+
+        def order(first: tuple, second: tuple):
+            by_sort_key = compare(first[1].get(sort_key), second[1].get(sort_key)) if sort_key else None
+            return by_sort_key or (first[0] > second[0]) - (first[0] < second[0])
+
+        entries.sort(key=cmp_to_key(order), reverse=not ScanIndexForward)
+
+        start_position = 0
+        if ExclusiveStartKey:
+            start_key = self._key(TableName, ExclusiveStartKey, 'Query')
+            start_position = next((position + 1 for position, (key, _) in enumerate(entries) if key == start_key), len(entries))
+
+        return self._page(TableName, entries, IndexName, start_position, kwargs, 'Query')
+
+    def batch_get_item(self, RequestItems: dict, **kwargs):
+        responses = {}
+        with self._transaction(write=False):
+            for table, request in RequestItems.items():
+                items = [self._load(table, self._key(table, key, 'BatchGetItem')) for key in request['Keys']]
+                responses[table] = [project(item, request.get('ProjectionExpression'), request.get('ExpressionAttributeNames'))
+                                    for item in items if item is not None]
+        return {**OK_RESPONSE, 'Responses': responses, 'UnprocessedKeys': {}}
+
+    # Writes of many items
+
+    def batch_write_item(self, RequestItems: dict, **kwargs):
+        with self._transaction():
+            for table, requests in RequestItems.items():
+                for request in requests:
+                    if 'PutRequest' in request:
+                        item = request['PutRequest']['Item']
+                        key = self._key(table, item, 'BatchWriteItem')
+                        self._store(table, key, dict(item), self._load(table, key))
+                    else:
+                        key = self._key(table, request['DeleteRequest']['Key'], 'BatchWriteItem')
+                        previous = self._load(table, key)
+                        if previous is not None:
+                            self._remove(table, key, previous)
+        return {**OK_RESPONSE, 'UnprocessedItems': {}}
+
+    def transact_write_items(self, TransactItems: list, **kwargs):
+        with self._transaction():
+            writes, reasons = [], []
+            for transact_item in TransactItems:
+                (action, request), = transact_item.items()
+                table = request['TableName']
+                attributes = request['Item'] if action == 'Put' else request['Key']
+                key = self._key(table, attributes, 'TransactWriteItems')
+                previous = self._load(table, key)
+
+                passed = self._check(request.get('ConditionExpression'), previous, request.get('ExpressionAttributeNames'),
+                                     request.get('ExpressionAttributeValues'), 'TransactWriteItems')
+                reasons.append({'Code': 'None'} if passed else {'Code': 'ConditionalCheckFailed', 'Message': "The conditional request failed"})
+
+                if action == 'Update':
+                    item, _ = self._updated(table, request['Key'], previous, request['UpdateExpression'],
+                                            request.get('ExpressionAttributeNames'), request.get('ExpressionAttributeValues'), 'TransactWriteItems')
+                    writes.append((table, key, item, previous))
+                elif action == 'Put':
+                    writes.append((table, key, dict(request['Item']), previous))
+                elif action == 'Delete':
+                    writes.append((table, key, None, previous))
+
+            if any(reason['Code'] != 'None' for reason in reasons):
+                raise client_error('TransactionCanceledException',
+                                   f"Transaction cancelled, please refer cancellation reasons for specific reasons [{', '.join(reason['Code'] for reason in reasons)}]",
+                                   'TransactWriteItems', CancellationReasons=reasons)
+
+            for table, key, item, previous in writes:
+                if item is not None:
+                    self._store(table, key, item, previous)
+                elif previous is not None:
+                    self._remove(table, key, previous)
+
+        return dict(OK_RESPONSE)
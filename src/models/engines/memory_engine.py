@@ -0,0 +1,65 @@
+import threading
+from contextlib import contextmanager
+from .local_engine import LocalEngine
+
+
+class MemoryEngine(LocalEngine):
+    '''
+    Engine keeping items in process memory, for benchmarks and tests.
+    Every table keeps a hash index of its partitions and of the partitions of each secondary index, so queries only
+    touch the matching items, and a sorted key list (rebuilt lazily) for paginated scans.
+    '''
+    def __init__(self):
+        super().__init__()
+        self.tables = {}
+        self.lock = threading.RLock()
+
+    @contextmanager
+    def _transaction(self, write: bool = True):
+        # Reads also take the lock, since the partition indexes are plain dicts mutated by writes
+        with self.lock:
+            yield
+
+    def _table(self, table: str):
+        if table not in self.tables:
+            self.tables[table] = {"items": {}, "partitions": {}, "sorted_keys": None}
+        return self.tables[table]
+
+    def _load(self, table: str, key: tuple):
+        return self._table(table)["items"].get(key)
+
+    def _store(self, table: str, key: tuple, item: dict, previous: dict = None):
+        storage = self._table(table)
+        if previous is not None:
+            self._unindex(table, key, previous)
+        else:
+            storage["sorted_keys"] = None
+
+        storage["items"][key] = item
+        for index_name, partition in self._index_entries(table, item):
+            storage["partitions"].setdefault(index_name, {}).setdefault(partition, set()).add(key)
+
+    def _remove(self, table: str, key: tuple, previous: dict):
+        storage = self._table(table)
+        self._unindex(table, key, previous)
+        del storage["items"][key]
+        storage["sorted_keys"] = None
+
+    def _unindex(self, table: str, key: tuple, previous: dict):
+        partitions = self._table(table)["partitions"]
+        for index_name, partition in self._index_entries(table, previous):
+            keys = partitions[index_name][partition]
+            keys.discard(key)
+            if not keys:
+                del partitions[index_name][partition]
+
+    def _scan_entries(self, table: str):
+        storage = self._table(table)
+        if storage["sorted_keys"] is None:
+            storage["sorted_keys"] = sorted(storage["items"])
+        return [(key, storage["items"][key]) for key in storage["sorted_keys"]]
+
+    def _partition(self, table: str, index_name: str, partition: str):
+        storage = self._table(table)
+        keys = storage["partitions"].get(index_name, {}).get(partition, ())
+        return [storage["items"][key] for key in keys]
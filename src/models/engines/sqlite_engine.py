@@ -0,0 +1,127 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from .local_engine import LocalEngine, encode_value, decode_value
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS items (
+    table_name TEXT NOT NULL,
+    partition_key TEXT NOT NULL,
+    sort_key TEXT NOT NULL,
+    item TEXT NOT NULL,
+    PRIMARY KEY (table_name, partition_key, sort_key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS index_entries (
+    table_name TEXT NOT NULL,
+    index_name TEXT NOT NULL,
+    index_partition TEXT NOT NULL,
+    partition_key TEXT NOT NULL,
+    sort_key TEXT NOT NULL,
+    PRIMARY KEY (table_name, index_name, index_partition, partition_key, sort_key)
+) WITHOUT ROWID;
+'''
+
+
+class SQLiteEngine(LocalEngine):
+    '''
+    Engine persisting items in a SQLite database, for self-hosted installs.
+    The database runs in WAL mode: writes are serialized on one connection, while reads run in deferred transactions on a
+    connection per thread, so they read a snapshot without waiting for writers. Secondary index entries are kept in their
+    own table so queries on an index are an index range lookup instead of a table scan.
+    '''
+    def __init__(self, path: str):
+        '''
+        :param str `path`: Path of the database file (`:memory:` for a temporary database).
+        '''
+        super().__init__()
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def _reader(self):
+        '''
+        Method used to get the read connection of the current thread, opening it on first use.
+        '''
+        reader = getattr(self.local, 'reader', None)
+        if reader is None:
+            reader = self.local.reader = sqlite3.connect(self.path, isolation_level=None)
+        return reader
+
+    @contextmanager
+    def _transaction(self, write: bool = True):
+        # A `:memory:` database only exists on its own connection, so its reads share the write connection
+        shared = write or self.path == ':memory:'
+        connection = self.connection if shared else self._reader()
+
+        if shared:
+            self.lock.acquire()
+        try:
+            connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            self.local.connection = connection
+            try:
+                yield
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            self.local.connection = None
+            if shared:
+                self.lock.release()
+
+    @property
+    def _connection(self):
+        '''
+        Connection of the transaction running on the current thread.
+        '''
+        return getattr(self.local, 'connection', None) or self.connection
+
+    @staticmethod
+    def _dumps(item: dict):
+        return json.dumps({k: encode_value(v) for k, v in item.items()}, separators=(',', ':'))
+
+    @staticmethod
+    def _loads(data: str):
+        return {k: decode_value(v) for k, v in json.loads(data).items()}
+
+    def _load(self, table: str, key: tuple):
+        row = self._connection.execute("SELECT item FROM items WHERE table_name = ? AND partition_key = ? AND sort_key = ?",
+                                      (table, *key)).fetchone()
+        return self._loads(row[0]) if row else None
+
+    def _store(self, table: str, key: tuple, item: dict, previous: dict = None):
+        self._connection.execute("INSERT OR REPLACE INTO items (table_name, partition_key, sort_key, item) VALUES (?, ?, ?, ?)",
+                                (table, *key, self._dumps(item)))
+        self._connection.execute("DELETE FROM index_entries WHERE table_name = ? AND partition_key = ? AND sort_key = ?",
+                                (table, *key))
+        self._connection.executemany("INSERT INTO index_entries (table_name, index_name, index_partition, partition_key, sort_key) VALUES (?, ?, ?, ?, ?)",
+                                    [(table, index_name, partition, *key) for index_name, partition in self._index_entries(table, item)
+                                     if index_name is not None])
+
+    def _remove(self, table: str, key: tuple, previous: dict):
+        self._connection.execute("DELETE FROM items WHERE table_name = ? AND partition_key = ? AND sort_key = ?", (table, *key))
+        self._connection.execute("DELETE FROM index_entries WHERE table_name = ? AND partition_key = ? AND sort_key = ?", (table, *key))
+
+    def _scan_entries(self, table: str):
+        rows = self._connection.execute("SELECT partition_key, sort_key, item FROM items WHERE table_name = ? ORDER BY partition_key, sort_key",
+                                       (table,))
+        return [((partition, sort), self._loads(item)) for partition, sort, item in rows]
+
+    def _partition(self, table: str, index_name: str, partition: str):
+        if index_name is None:
+            rows = self._connection.execute("SELECT item FROM items WHERE table_name = ? AND partition_key = ?", (table, partition))
+        else:
+            rows = self._connection.execute('''SELECT items.item FROM index_entries
+                                              JOIN items ON items.table_name = index_entries.table_name
+                                                        AND items.partition_key = index_entries.partition_key
+                                                        AND items.sort_key = index_entries.sort_key
+                                              WHERE index_entries.table_name = ? AND index_entries.index_name = ? AND index_entries.index_partition = ?''',
+                                           (table, index_name, partition))
+        return [self._loads(item) for item, in rows]
@@ -1,5 +1,7 @@
 from .model_mixin import ObjectDynamodb
+from .item_cache import ItemCache
 
 __all__ = [
-    'ObjectDynamodb'
+    'ObjectDynamodb',
+    'ItemCache'
 ]
\ No newline at end of file
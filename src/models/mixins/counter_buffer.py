@@ -0,0 +1,101 @@
+import time
+import threading
+
+
+class CounterBuffer:
+    '''
+    Write-behind buffer of counter increments.
+    Increments are summed per item and attribute in the warm Lambda container and written later as one `ADD` per counter,
+    so a hot item costs one write per flush instead of one write per increment.
+    Buffers are shared per table through `CounterBuffer.for_table`, like `ItemCache`.
+    '''
+    _tables = {}
+    _tables_lock = threading.Lock()
+
+    def __init__(self, flush_interval: float, max_pending: int):
+        '''
+        :param float `flush_interval`: Seconds the oldest buffered increment may wait before the buffer is due for a flush.
+        :param int `max_pending`: Number of buffered increments after which the buffer is due for a flush.
+        '''
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.deltas = {}
+        self.pending = 0
+        self.oldest = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def for_table(cls, table: str, flush_interval: float, max_pending: int):
+        '''
+        Method used to get the counter buffer of `table`, creating it on first use.
+
+        :param str `table`: Name of the table whose counters are buffered.
+        :param float `flush_interval`: Seconds the oldest buffered increment may wait before a flush is due.
+        :param int `max_pending`: Number of buffered increments after which a flush is due.
+        :return : The `CounterBuffer` of `table`.
+        '''
+        with cls._tables_lock:
+            if table not in cls._tables:
+                cls._tables[table] = cls(flush_interval, max_pending)
+            return cls._tables[table]
+
+    def add(self, key: dict, attr: str, delta: int = 1):
+        '''
+        Method used to buffer an increment of the counter `attr` of the item with `key`.
+
+        :param dict `key`: Key of the item.
+        :param str `attr`: Name of the counter attribute.
+        :param int `delta`: Amount to add.
+        :return : `True` if the buffer is due for a flush.
+        '''
+        counter = (tuple(sorted(key.items())), attr)
+        with self.lock:
+            self.deltas[counter] = self.deltas.get(counter, 0) + delta
+            self.pending += 1
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+            return self._due()
+
+    def _due(self):
+        return self.oldest is not None and (self.pending >= self.max_pending or
+                                            time.monotonic() - self.oldest >= self.flush_interval)
+
+    def due(self):
+        '''
+        Method used to check whether the size or age threshold of the buffer has been reached.
+
+        :return : `True` if the buffer is due for a flush.
+        '''
+        with self.lock:
+            return self._due()
+
+    def drain(self):
+        '''
+        Method used to take every buffered increment out of the buffer.
+
+        :return : List of `(key, attr, delta)` tuples, one per counter, without the counters whose increments cancelled out.
+        '''
+        with self.lock:
+            deltas, self.deltas = self.deltas, {}
+            self.pending, self.oldest = 0, None
+
+        return [(dict(key), attr, delta) for (key, attr), delta in deltas.items() if delta]
+
+    def restore(self, counters: list):
+        '''
+        Method used to put back increments whose write failed, so they are retried on the next flush.
+
+        :param list `counters`: List of `(key, attr, delta)` tuples as returned by `drain`.
+        '''
+        for key, attr, delta in counters:
+            self.add(key, attr, delta)
+
+    def stats(self):
+        '''
+        Method used to get the state of the buffer.
+
+        :return : Dictionary with the number of `pending` increments and of buffered `counters`.
+        '''
+        with self.lock:
+            return {"pending": self.pending,
+                    "counters": len(self.deltas)}
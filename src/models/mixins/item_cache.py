@@ -0,0 +1,121 @@
+import copy
+import time
+import threading
+from collections import OrderedDict
+
+
+class ItemCache:
+    '''
+    Least recently used cache of DynamoDB items with a time to live for every entry.
+    Caches are shared per table through `ItemCache.for_table`, so they survive across invocations of a warm Lambda container.
+    '''
+    _tables = {}
+    _tables_lock = threading.Lock()
+
+    def __init__(self, ttl: float, max_size: int):
+        '''
+        :param float `ttl`: Seconds an entry is served before it has to be read again.
+        :param int `max_size`: Maximum number of entries kept, least recently used entries are evicted first.
+        '''
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def for_table(cls, table: str, ttl: float, max_size: int):
+        '''
+        Method used to get the cache of `table`, creating it on first use.
+
+        :param str `table`: Name of the table whose items are cached.
+        :param float `ttl`: Seconds an entry is served before it has to be read again.
+        :param int `max_size`: Maximum number of entries kept.
+        :return : The `ItemCache` of `table`.
+        '''
+        with cls._tables_lock:
+            if table not in cls._tables:
+                cls._tables[table] = cls(ttl, max_size)
+            return cls._tables[table]
+
+    @staticmethod
+    def _cache_key(key: dict):
+        return tuple(sorted(key.items()))
+
+    def get(self, key: dict):
+        '''
+        Method used to get a copy of the cached item with `key`.
+
+        :param dict `key`: Key of the item.
+        :return : The cached item or `None` if it isn't cached or has expired.
+        '''
+        cache_key = self._cache_key(key)
+        with self.lock:
+            entry = self.entries.get(cache_key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[cache_key]
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(cache_key)
+            self.hits += 1
+            item = entry[1]
+
+        return copy.deepcopy(item)
+
+    def put(self, key: dict, item: dict):
+        '''
+        Method used to cache a copy of `item` under `key`.
+
+        :param dict `key`: Key of the item.
+        :param dict `item`: Item to cache.
+        '''
+        cache_key = self._cache_key(key)
+        item = copy.deepcopy(item)
+        with self.lock:
+            self.entries[cache_key] = (time.monotonic() + self.ttl, item)
+            self.entries.move_to_end(cache_key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: dict):
+        '''
+        Method used to drop the cached item with `key`, if any.
+
+        :param dict `key`: Key of the item.
+        '''
+        with self.lock:
+            self.entries.pop(self._cache_key(key), None)
+
+    def invalidate_item(self, item: dict):
+        '''
+        Method used to drop the cached entry whose key attributes all match `item`, for writes that only know the full item.
+
+        :param dict `item`: Item in python dict format.
+        '''
+        with self.lock:
+            for cache_key in [cache_key for cache_key in self.entries if all(item.get(k) == v for k, v in cache_key)]:
+                del self.entries[cache_key]
+
+    def clear(self):
+        '''
+        Method used to drop every cached item.
+        '''
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        '''
+        Method used to get the hit, miss and eviction counters of the cache.
+
+        :return : Dictionary with `hits`, `misses`, `evictions` and current `size`.
+        '''
+        with self.lock:
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "size": len(self.entries)}
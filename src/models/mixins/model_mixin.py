@@ -1,54 +1,434 @@
-import boto3
-from ...utils.helpers import serialize_item, serialize_items, deserialize_item, deserialize_items, error_handler, check_response, serialize_list, deserialize_list
+import os
+import time
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from .item_cache import ItemCache
+from .counter_buffer import CounterBuffer
+from ..engines import get_engine
+from ...utils.helpers import serialize_item, serialize_items, deserialize_item, deserialize_items, error_handler, check_response, serialize_list, deserialize_list, backoff_delay, chunks
+from ...utils.errors import ResponseError
+from ...utils.order_keys import MAX_KEY_LENGTH, key_between, keys_between, spaced_keys, order_key_of, longest_increasing_run
 
+# Scans are sequential by default, since on tables of a few 1 MB pages parallel segments only add requests.
+# Raise it for tables spanning many pages (see `benchmarks/parallel_scan_benchmark.py`).
+SCAN_SEGMENTS = int(os.getenv("DYNAMODB_SCAN_SEGMENTS", "1"))
+MAX_SCAN_WORKERS = int(os.getenv("DYNAMODB_MAX_SCAN_WORKERS", "8"))
+BATCH_GET_SIZE = 100
+BATCH_WRITE_SIZE = 25
+TRANSACTION_SIZE = 100
+BATCH_MAX_RETRIES = int(os.getenv("DYNAMODB_BATCH_MAX_RETRIES", "8"))
+VERSION_MAX_RETRIES = int(os.getenv("DYNAMODB_VERSION_MAX_RETRIES", "3"))
 
 class ObjectDynamodb:
     '''
     Class used to abstract over certain DynamoDB operations. 
     A DynamoDB resource and a table are passed and the class provides methods to add, get, update items and more.
     '''
-    def __init__(self, table: str):
+    # Key attributes of the table, declared by models as {"partition_key": attribute, "sort_key": attribute or None}.
+    # Local storage engines need it to store the table, DynamoDB reads it from the deployed table.
+    KEY_SCHEMA = None
+
+    # Global secondary indexes of the table, declared by models as
+    # {index name: {"partition_key": attribute, "sort_key": attribute or None, "projection": "ALL" or "KEYS_ONLY"}}.
+    INDEXES = {}
+
+    # Attribute holding the version of items, declared by models whose items are edited with read-modify-write (lists).
+    # Writes through `ObjectDynamodb` increment it and writes based on a read are conditional on the version that was read,
+    # so concurrent edits are retried instead of lost. `None` disables versioning.
+    VERSION_ATTRIBUTE = None
+
+    def __init__(self, table: str, cache_ttl: float = None, cache_size: int = 256, engine=None,
+                 counter_flush_interval: float = None, counter_buffer_size: int = 100):
         '''
-        :param `dynamo_db`: boto3 DynamoDB resource
         :param str `table`: Name of the table to perform operations on.
+        :param float `cache_ttl`: Seconds `get_item` results are served from the warm container cache, `None` to disable caching.
+        :param int `cache_size`: Maximum number of items kept in the cache.
+        :param `engine`: Storage engine the items are stored in (see `src.models.engines`), `None` for the engine selected by `STORAGE_ENGINE`.
+        :param float `counter_flush_interval`: Seconds `buffer_add` increments may wait in the warm container before they are written, `None` to write them immediately.
+        :param int `counter_buffer_size`: Number of buffered increments after which they are written.
         '''
-        self.dynamo_db = boto3.client('dynamodb')
+        self.dynamo_db = engine or get_engine()
         self.table = table
+        if self.KEY_SCHEMA:
+            self.dynamo_db.ensure_table(table, self.KEY_SCHEMA, self.INDEXES)
+        self.cache = ItemCache.for_table(table, cache_ttl, cache_size) if cache_ttl else None
+        self.counters = CounterBuffer.for_table(table, counter_flush_interval, counter_buffer_size) if counter_flush_interval else None
+
+    def cache_stats(self):
+        '''
+        Method used to get the hit and miss counters of the item cache of `self.table`.
+
+        :return : Dictionary with cache counters or `None` if caching is disabled.
+        '''
+        return self.cache.stats() if self.cache else None
+
+    def _invalidate(self, key: dict):
+        '''
+        Method used to drop `key` from the item cache after it was written to.
+
+        :param dict `key`: Key of the item in python dict format.
+        '''
+        if self.cache:
+            self.cache.invalidate(key)
+
+    def _version_expressions(self, read_item: dict = None):
+        '''
+        Method used to build the parts of an update expression incrementing the version of an item of a versioned model.
+
+        :param dict `read_item`: Item the write is based on, to make the write conditional on its version, `None` for blind writes.
+        :return : Tuple of the update clause, the condition expression (`None` for blind writes), attribute names and attribute values.
+                  Every part is empty if the model isn't versioned.
+        '''
+        if not self.VERSION_ATTRIBUTE:
+            return "", None, {}, {}
+
+        names, values, condition = {"#ver": self.VERSION_ATTRIBUTE}, {":one": 1}, None
+        if read_item is not None and self.VERSION_ATTRIBUTE in read_item:
+            condition = "#ver = :ver"
+            values[":ver"] = read_item[self.VERSION_ATTRIBUTE]
+        elif read_item is not None:
+            condition = "attribute_not_exists(#ver)"
+
+        return " ADD #ver :one", condition, names, values
+
+    def _retry_on_conflict(self, write):
+        '''
+        Method used to run a read-modify-write again when its conditional write fails because the item changed after it was read.
+
+        :param `write`: Function reading the item(s) and writing them back, raising `ClientError` `ConditionalCheckFailedException`
+                        (or `TransactionCanceledException`) if they changed in between.
+        :return : Response of `write`, or Response 409 if they kept changing for `VERSION_MAX_RETRIES` retries.
+        '''
+        for attempt in range(VERSION_MAX_RETRIES + 1):
+            try:
+                return write()
+            except ClientError as e:
+                if e.response['Error']['Code'] not in ('ConditionalCheckFailedException', 'TransactionCanceledException'):
+                    raise
+            if attempt < VERSION_MAX_RETRIES:
+                time.sleep(backoff_delay(attempt))
+
+        return {
+            "statusCode": 409,
+            "body": "Item was modified concurrently, try again."
+        }
 
 
     @error_handler
-    def get_item(self, key: dict):
+    def get_item(self, key: dict, projection: list = None, consistent: bool = False):
         '''
         Method used to get particular item from `self.table` specified by a key.
+        Models with a cache answer any projection from a cached item. A projected read that misses the cache reads only
+        the projection and leaves the cache untouched, only whole reads fill the cache.
 
         :param dict `key`: The key to search by.
+        :param list `projection`: Attribute names to read (key attributes are always included), `None` to read the whole item.
+        :param bool `consistent`: Whether to skip the cache and read the latest write with a strongly consistent read,
+                                  e.g. to read the version a conditional write depends on.
         :return : Response 200 with key in `body` if key exists or Response 404 or Response 500 error.
         '''
-        key = serialize_item(key)
+        if projection:
+            projection = list(dict.fromkeys(list(key.keys()) + list(projection)))
+
+        if self.cache and not consistent:
+            item = self.cache.get(key)
+            if item is not None:
+                return {"statusCode": 200,
+                        "body": self._project(item, projection)}
+
+        get_kwargs = {}
+        if projection:
+            get_kwargs = self._build_projection_kwargs(projection)
+        if consistent:
+            get_kwargs['ConsistentRead'] = True
+
         response = self.dynamo_db.get_item(
             TableName=self.table,
-            Key=key
+            Key=serialize_item(key),
+            **get_kwargs
         )            
         if not "Item" in response or not response["Item"]:
             return {"statusCode": 404,
                     "body": []}
         
+        item = deserialize_item(response["Item"])
+        if self.cache and not projection:
+            self.cache.put(key, item)
+
         return {"statusCode": 200,
-                "body": deserialize_item(response["Item"])}
+                "body": self._project(item, projection)}
     
+    @staticmethod
+    def _project(item: dict, projection: list = None):
+        '''
+        Method used to keep only the attributes of `item` listed in `projection`.
+
+        :param dict `item`: Item in python dict format.
+        :param list `projection`: Attribute names to keep, `None` to keep all of them.
+        :return : The projected item.
+        '''
+        if not projection:
+            return item
+        return {attribute: item[attribute] for attribute in projection if attribute in item}
     
     @error_handler
-    def scan_items(self, filter: dict = None):
+    def batch_get_items(self, keys: list, projection: list = None):
+        '''
+        Method used to get several items of `self.table` with as few `batch_get_item` calls as possible.
+        Keys are requested in chunks of 100 and `UnprocessedKeys` are retried with exponential backoff.
+
+        :param list `keys`: List of keys (dictionaries) to get, all using the same key attributes.
+        :param list `projection`: Attribute names to read, `None` to read whole items.
+        :return : Response 200 with a list of items in the order of `keys` (`None` for keys that don't exist) or Response 500 error.
+        '''
+        if not keys:
+            return {"statusCode": 200,
+                    "body": []}
+
+        key_fields = list(keys[0].keys())
+        key_of = lambda item: tuple(item.get(field) for field in key_fields)
+        found = {}
+
+        if self.cache and not projection:
+            for key in keys:
+                item = self.cache.get(key)
+                if item is not None:
+                    found[key_of(key)] = item
+
+        pending = list({key_of(key): key for key in keys if key_of(key) not in found}.values())
+
+        request_kwargs = {}
+        if projection:
+            request_kwargs = self._build_projection_kwargs(list(dict.fromkeys(key_fields + list(projection))))
+
+        for chunk in chunks(pending, BATCH_GET_SIZE):
+            request_items = {self.table: {'Keys': serialize_items(chunk), **request_kwargs}}
+            attempt = 0
+
+            while request_items:
+                response = self.dynamo_db.batch_get_item(RequestItems=request_items)
+
+                for item in deserialize_items(response.get('Responses', {}).get(self.table, [])):
+                    found[key_of(item)] = item
+                    if self.cache and not projection:
+                        self.cache.put({field: item[field] for field in key_fields}, item)
+
+                request_items = response.get('UnprocessedKeys')
+                if request_items:
+                    if attempt >= BATCH_MAX_RETRIES:
+                        raise ResponseError(f"Unprocessed keys remained after {BATCH_MAX_RETRIES} retries of `batch_get_item`.")
+                    time.sleep(backoff_delay(attempt))
+                    attempt += 1
+
+        return {"statusCode": 200,
+                "body": [found.get(key_of(key)) for key in keys]}
+
+    @error_handler
+    def batch_write(self, put_items: list = None, delete_keys: list = None, max_workers: int = MAX_SCAN_WORKERS):
+        '''
+        Method used to put and delete many items of `self.table` with `batch_write_item`.
+        Operations are packed 25 per request, chunks are sent concurrently and `UnprocessedItems` are retried with exponential backoff.
+
+        :param list `put_items`: Items to put (replacing existing items with the same key).
+        :param list `delete_keys`: Keys of the items to delete.
+        :param int `max_workers`: Maximum number of chunks written at the same time.
+        :return : Response 200 with the number of written operations in `body` or Response 500 error.
+        '''
+        put_items, delete_keys = put_items or [], delete_keys or []
+
+        requests = [{'PutRequest': {'Item': serialize_item(item)}} for item in put_items]
+        requests += [{'DeleteRequest': {'Key': serialize_item(key)}} for key in delete_keys]
+
+        if not requests:
+            return {"statusCode": 200,
+                    "body": 0}
+
+        request_chunks = chunks(requests, BATCH_WRITE_SIZE)
+
+        if len(request_chunks) == 1:
+            self._batch_write_chunk(request_chunks[0])
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(request_chunks), max_workers)) as executor:
+                list(executor.map(self._batch_write_chunk, request_chunks))
+
+        if self.cache:
+            for item in put_items:
+                self.cache.invalidate_item(item)
+            for key in delete_keys:
+                self.cache.invalidate(key)
+
+        return {"statusCode": 200,
+                "body": len(requests)}
+
+    def batch_delete(self, keys: list, max_workers: int = MAX_SCAN_WORKERS):
+        '''
+        Method used to delete many items of `self.table` by their keys with `batch_write_item`.
+
+        :param list `keys`: Keys of the items to delete.
+        :param int `max_workers`: Maximum number of chunks deleted at the same time.
+        :return : Response 200 with the number of deleted keys in `body` or Response 500 error.
+        '''
+        return self.batch_write(delete_keys=keys, max_workers=max_workers)
+
+    def _batch_write_chunk(self, requests: list):
+        '''
+        Method used to write a single chunk of at most 25 serialized write requests, retrying unprocessed items.
+
+        :param list `requests`: `PutRequest`/`DeleteRequest` entries in DynamoDB format.
+        '''
+        request_items = {self.table: requests}
+        attempt = 0
+
+        while request_items:
+            response = self.dynamo_db.batch_write_item(RequestItems=request_items)
+
+            request_items = response.get('UnprocessedItems')
+            if request_items:
+                if attempt >= BATCH_MAX_RETRIES:
+                    raise ResponseError(f"Unprocessed items remained after {BATCH_MAX_RETRIES} retries of `batch_write_item`.")
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+
+    def _build_projection_kwargs(self, projection: list):
+        '''
+        Method used to build the `ProjectionExpression` and `ExpressionAttributeNames` reading only the attributes in `projection`.
+
+        :param list `projection`: Attribute names to read.
+        :return : Dictionary of keyword arguments for DynamoDB read calls.
+        '''
+        names = {f"#p{i}": attribute for i, attribute in enumerate(projection)}
+        return {
+            'ProjectionExpression': ", ".join(names.keys()),
+            'ExpressionAttributeNames': names
+        }
+
+    def scan_pages(self, filter: dict = None, limit: int = None, page_size: int = None, segment: int = None, total_segments: int = None, projection: list = None, index_name: str = None):
+        '''
+        Generator used to lazily scan `self.table` page by page, following `LastEvaluatedKey` until the table is exhausted.
+
+        :param dict `filter`: Key-value pairs to use as filter expressions for items (can be left empty to scan all items).
+        :param int `limit`: Maximum number of items to yield in total, `None` to scan the whole table.
+        :param int `page_size`: Maximum number of items DynamoDB evaluates per `scan` call, `None` for the 1 MB default.
+        :param int `segment`: Segment of a parallel scan to read, `None` to scan the whole table.
+        :param int `total_segments`: Number of segments the table is split into when `segment` is given.
+        :param list `projection`: Attribute names to read, `None` to read whole items.
+        :param str `index_name`: Name of a secondary index declared in `INDEXES` to scan instead of the table, e.g. a sparse index.
+        :return : Generator yielding lists of deserialized items, one list per page.
+        '''
+        scan_kwargs = self._build_scan_kwargs(filter, projection, index_name)
+
+        if segment is not None:
+            scan_kwargs['Segment'] = segment
+            scan_kwargs['TotalSegments'] = total_segments
+
+        yield from self._paginate(self.dynamo_db.scan, scan_kwargs, limit, page_size)
+
+    def _paginate(self, operation, request_kwargs: dict, limit: int = None, page_size: int = None):
+        '''
+        Generator used to call a paginated read (`scan` or `query`) repeatedly, following `LastEvaluatedKey`.
+
+        :param `operation`: Client method to call.
+        :param dict `request_kwargs`: Keyword arguments of the first call, `ExclusiveStartKey` and `Limit` are managed here.
+        :param int `limit`: Maximum number of items to yield in total, `None` to read every page.
+        :param int `page_size`: Maximum number of items DynamoDB evaluates per call, `None` for the 1 MB default.
+        :return : Generator yielding lists of deserialized items, one list per page.
+        '''
+        remaining = limit
+
+        while remaining is None or remaining > 0:
+            if page_size or remaining is not None:
+                request_kwargs['Limit'] = min(size for size in (page_size, remaining) if size)
+
+            response = operation(**request_kwargs)
+
+            page = deserialize_items(response.get('Items', []))
+            if remaining is not None:
+                page = page[:remaining]
+                remaining -= len(page)
+
+            if page:
+                yield page
+
+            if 'LastEvaluatedKey' not in response:
+                return
+            request_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def iter_items(self, filter: dict = None, limit: int = None, page_size: int = None, projection: list = None, index_name: str = None):
+        '''
+        Generator used to lazily stream the items of `self.table` one by one. Pages are only fetched when the previous one is consumed.
+
+        :param dict `filter`: Key-value pairs to use as filter expressions for items (can be left empty to scan all items).
+        :param int `limit`: Maximum number of items to yield in total, `None` to scan the whole table.
+        :param int `page_size`: Maximum number of items DynamoDB evaluates per `scan` call.
+        :param list `projection`: Attribute names to read, `None` to read whole items.
+        :param str `index_name`: Name of a secondary index declared in `INDEXES` to scan instead of the table.
+        :return : Generator yielding deserialized items.
+        '''
+        for page in self.scan_pages(filter, limit=limit, page_size=page_size, projection=projection, index_name=index_name):
+            yield from page
+
+    @error_handler
+    def scan_items(self, filter: dict = None, limit: int = None, page_size: int = None, projection: list = None, index_name: str = None):
         '''
         Method used to get all items that match all specific key-value pairs in `filter`.
+        Every page of the scan is read, so the whole table is returned even when it exceeds 1 MB.
+
+        :param dict `filter`: Key-value pairs to use as filter expressions for items (can be left empty to scan all items).
+        :param int `limit`: Maximum number of items to return, `None` to return all of them.
+        :param int `page_size`: Maximum number of items DynamoDB evaluates per `scan` call.
+        :param list `projection`: Attribute names to read, `None` to read whole items.
+        :param str `index_name`: Name of a secondary index declared in `INDEXES` to scan instead of the table.
+        :return : Response 200 with list of items that match filtering or Response 500 error.
+        '''
+        return {"statusCode": 200,
+                "body": list(self.iter_items(filter, limit=limit, page_size=page_size, projection=projection, index_name=index_name))}
+
+    @error_handler
+    def parallel_scan_items(self, filter: dict = None, total_segments: int = SCAN_SEGMENTS, max_workers: int = MAX_SCAN_WORKERS, projection: list = None):
+        '''
+        Method used to scan the whole `self.table` by splitting it into `total_segments` segments which are read concurrently.
+        Items are returned in segment order, which is not guaranteed to match the order of a sequential scan.
 
         :param dict `filter`: Key-value pairs to use as filter expressions for items (can be left empty to scan all items).
+        :param int `total_segments`: Number of segments to split the scan into, 1 for a sequential scan.
+        :param int `max_workers`: Maximum number of segments scanned at the same time.
+        :param list `projection`: Attribute names to read, `None` to read whole items.
         :return : Response 200 with list of items that match filtering or Response 500 error.
         '''
+        if total_segments <= 1:
+            return self.scan_items(filter, projection=projection)
+
+        scan_segment = lambda segment: [item for page in self.scan_pages(filter, segment=segment, total_segments=total_segments, projection=projection) for item in page]
+
+        with ThreadPoolExecutor(max_workers=min(total_segments, max_workers)) as executor:
+            segments = list(executor.map(scan_segment, range(total_segments)))
+
+        return {"statusCode": 200,
+                "body": [item for segment_items in segments for item in segment_items]}
+
+    def _build_scan_kwargs(self, filter: dict = None, projection: list = None, index_name: str = None):
+        '''
+        Method used to build the keyword arguments of a `scan` call on `self.table`.
+
+        :param dict `filter`: Key-value pairs to use as filter expressions for items.
+        :param list `projection`: Attribute names to read, `None` to read whole items.
+        :param str `index_name`: Name of a secondary index declared in `INDEXES` to scan instead of the table.
+        :return : Dictionary of keyword arguments for `scan`.
+        '''
         scan_kwargs = {
             'TableName': self.table,
             'Select': 'ALL_ATTRIBUTES'  
         }
+
+        if index_name is not None:
+            if index_name not in self.INDEXES:
+                raise ValueError(f"Index `{index_name}` is not declared for table `{self.table}`.")
+            scan_kwargs['IndexName'] = index_name
+            scan_kwargs['Select'] = 'ALL_PROJECTED_ATTRIBUTES'
+
+        if projection:
+            scan_kwargs['Select'] = 'SPECIFIC_ATTRIBUTES'
+            scan_kwargs.update(self._build_projection_kwargs(projection))
         
         if filter:
             filter_expression = ' AND '.join([f"{k} = :{k}" for k in filter.keys()])
@@ -57,11 +437,106 @@ class ObjectDynamodb:
             scan_kwargs['FilterExpression'] = filter_expression
             scan_kwargs['ExpressionAttributeValues'] = expression_attribute_values
 
-        response = self.dynamo_db.scan(**scan_kwargs)
+        return scan_kwargs
+    
+
+    def query_pages(self, index_name: str, key_condition: dict, filter: dict = None, limit: int = None, page_size: int = None, projection: list = None, scan_forward: bool = True):
+        '''
+        Generator used to lazily query `self.table` (or one of its `INDEXES`) page by page, following `LastEvaluatedKey`.
+        Only the items matching `key_condition` are read, unlike `scan_pages` which reads the whole table.
+
+        :param str `index_name`: Name of a secondary index declared in `INDEXES`, `None` to query the table itself.
+        :param dict `key_condition`: Key attributes to match. Values are matched for equality, or given as a tuple
+                                     `(operator, *operands)` for the sort key, e.g. `(">=", x)`, `("between", x, y)` or `("begins_with", x)`.
+        :param dict `filter`: Key-value pairs the matched items must also have.
+        :param int `limit`: Maximum number of items to yield in total, `None` to read every match.
+        :param int `page_size`: Maximum number of items DynamoDB evaluates per `query` call, `None` for the 1 MB default.
+        :param list `projection`: Attribute names to read, `None` to read the attributes projected into the index.
+        :param bool `scan_forward`: Whether items are returned in ascending sort key order.
+        :return : Generator yielding lists of deserialized items, one list per page.
+        '''
+        query_kwargs = self._build_query_kwargs(index_name, key_condition, filter, projection, scan_forward)
+
+        yield from self._paginate(self.dynamo_db.query, query_kwargs, limit, page_size)
+
+    def iter_query(self, index_name: str, key_condition: dict, filter: dict = None, limit: int = None, page_size: int = None, projection: list = None, scan_forward: bool = True):
+        '''
+        Generator used to lazily stream the items matching `key_condition` one by one (see `query_pages`).
 
+        :return : Generator yielding deserialized items.
+        '''
+        for page in self.query_pages(index_name, key_condition, filter, limit=limit, page_size=page_size, projection=projection, scan_forward=scan_forward):
+            yield from page
+
+    @error_handler
+    def query_items(self, index_name: str, key_condition: dict, filter: dict = None, projection: list = None, limit: int = None, page_size: int = None, scan_forward: bool = True):
+        '''
+        Method used to get all items matching `key_condition` on `self.table` or one of its `INDEXES` (see `query_pages`).
+
+        :param str `index_name`: Name of a secondary index declared in `INDEXES`, `None` to query the table itself.
+        :param dict `key_condition`: Key attributes to match.
+        :param dict `filter`: Key-value pairs the matched items must also have.
+        :param list `projection`: Attribute names to read.
+        :param int `limit`: Maximum number of items to return, `None` to return all of them.
+        :param int `page_size`: Maximum number of items DynamoDB evaluates per `query` call.
+        :param bool `scan_forward`: Whether items are returned in ascending sort key order.
+        :return : Response 200 with list of matching items or Response 500 error.
+        '''
         return {"statusCode": 200,
-                "body": deserialize_items(response["Items"])}
-    
+                "body": list(self.iter_query(index_name, key_condition, filter, limit=limit, page_size=page_size, projection=projection, scan_forward=scan_forward))}
+
+    def _build_query_kwargs(self, index_name: str, key_condition: dict, filter: dict = None, projection: list = None, scan_forward: bool = True):
+        '''
+        Method used to build the keyword arguments of a `query` call on `self.table`.
+
+        :param str `index_name`: Name of a secondary index declared in `INDEXES`, `None` to query the table itself.
+        :param dict `key_condition`: Key attributes to match (see `query_pages`).
+        :param dict `filter`: Key-value pairs the matched items must also have.
+        :param list `projection`: Attribute names to read.
+        :param bool `scan_forward`: Whether items are returned in ascending sort key order.
+        :return : Dictionary of keyword arguments for `query`.
+        '''
+        if index_name is not None and index_name not in self.INDEXES:
+            raise ValueError(f"Index `{index_name}` is not declared for table `{self.table}`.")
+
+        query_kwargs = {
+            'TableName': self.table,
+            'ScanIndexForward': scan_forward
+        }
+        if index_name is not None:
+            query_kwargs['IndexName'] = index_name
+
+        names, values, key_expressions = {}, {}, []
+        for i, (attribute, condition) in enumerate(key_condition.items()):
+            operator, *operands = condition if isinstance(condition, tuple) else ("=", condition)
+            placeholders = [f":k{i}_{j}" for j in range(len(operands))]
+            names[f"#k{i}"] = attribute
+            values.update(zip(placeholders, operands))
+
+            if operator == "between":
+                key_expressions.append(f"#k{i} BETWEEN {placeholders[0]} AND {placeholders[1]}")
+            elif operator == "begins_with":
+                key_expressions.append(f"begins_with(#k{i}, {placeholders[0]})")
+            elif operator in ("=", "<", "<=", ">", ">="):
+                key_expressions.append(f"#k{i} {operator} {placeholders[0]}")
+            else:
+                raise ValueError(f"Key condition operator `{operator}` is not supported.")
+        query_kwargs['KeyConditionExpression'] = " AND ".join(key_expressions)
+
+        if filter:
+            names.update({f"#f{i}": attribute for i, attribute in enumerate(filter.keys())})
+            values.update({f":f{i}": value for i, value in enumerate(filter.values())})
+            query_kwargs['FilterExpression'] = " AND ".join(f"#f{i} = :f{i}" for i in range(len(filter)))
+
+        if projection:
+            projection_kwargs = self._build_projection_kwargs(projection)
+            names.update(projection_kwargs['ExpressionAttributeNames'])
+            query_kwargs['ProjectionExpression'] = projection_kwargs['ProjectionExpression']
+
+        query_kwargs['ExpressionAttributeNames'] = names
+        query_kwargs['ExpressionAttributeValues'] = serialize_item(values)
+
+        return query_kwargs
 
     @error_handler
     def add_item(self, item: dict):
@@ -71,11 +546,12 @@ class ObjectDynamodb:
         :param dict `item`: The item to add.
         :return : Response 201 or Response 500 error.
         '''
-        item = serialize_item(item)
         response = self.dynamo_db.put_item(
             TableName=self.table,
-            Item=item
+            Item=serialize_item(item)
         )
+        if self.cache:
+            self.cache.invalidate_item(item)
         if response['ResponseMetadata']['HTTPStatusCode'] == 200:
             return {
                 "statusCode": 201,
@@ -96,11 +572,11 @@ class ObjectDynamodb:
         :param dict `key`: The key of the item to delete.
         :return : Response 200 or Response 500 error.
         '''
-        key = serialize_item(key)
         response = self.dynamo_db.delete_item(
             TableName=self.table,
-            Key=key
+            Key=serialize_item(key)
         )
+        self._invalidate(key)
         if response['ResponseMetadata']['HTTPStatusCode'] == 200:
             return {
                 "statusCode": 200,
@@ -113,24 +589,58 @@ class ObjectDynamodb:
             }
         
     @error_handler
-    def update_item(self, key: dict, new_values: dict):
+    def update_item(self, key: dict, new_values: dict = None, remove: list = None, condition: dict = None):
         '''
         Method used to update an item matching `key` by changing all columns to the values specified by key-value pairs in `new_values`.
 
         :param dict `key`: Key of the item to update.
         :param dict `new_values`: New values of equivalent columns in key-value pairs.
-        :return : Response 200 or Response 500 error.
+        :param list `remove`: Names of attributes to remove from the item (e.g. attributes that are keys of a sparse index).
+        :param dict `condition`: Key-value pairs the existing item must match for the write to happen, a `None` value requiring the attribute not to exist.
+        :return : Response 200, Response 409 if `condition` failed or Response 500 error.
         '''
-        key = serialize_item(key)
-        new_values = serialize_item(new_values)
-        update_expression = "SET " + ", ".join(f"{k} = :{k}" for k in new_values.keys())
-        expression_attribute_values = {f":{k}": v for k, v in new_values.items()}
-        response = self.dynamo_db.update_item(
-            TableName=self.table,
-            Key=key,
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_attribute_values
-        )
+        new_values = serialize_item(new_values or {})
+        update_clauses = []
+        update_kwargs = {}
+        if new_values:
+            update_clauses.append("SET " + ", ".join(f"{k} = :{k}" for k in new_values.keys()))
+            update_kwargs['ExpressionAttributeValues'] = {f":{k}": v for k, v in new_values.items()}
+        if remove:
+            update_clauses.append("REMOVE " + ", ".join(remove))
+        if condition:
+            condition_names = {f"#c{i}": k for i, k in enumerate(condition.keys())}
+            update_kwargs['ConditionExpression'] = " AND ".join(f"{name} = :c{name[2:]}" if condition[k] is not None else f"attribute_not_exists({name})"
+                                                                for name, k in condition_names.items())
+            update_kwargs['ExpressionAttributeNames'] = condition_names
+            update_kwargs['ExpressionAttributeValues'] = {**update_kwargs.get('ExpressionAttributeValues', {}),
+                                                         **serialize_item({f":c{name[2:]}": condition[k] for name, k in condition_names.items() if condition[k] is not None})}
+
+        version_clause, _, version_names, version_values = self._version_expressions()
+        if version_clause:
+            update_clauses.append(version_clause.strip())
+            update_kwargs['ExpressionAttributeNames'] = {**update_kwargs.get('ExpressionAttributeNames', {}), **version_names}
+            update_kwargs['ExpressionAttributeValues'] = {**update_kwargs.get('ExpressionAttributeValues', {}), **serialize_item(version_values)}
+
+        # DynamoDB rejects empty expression values, left by conditions that only check attributes don't exist
+        if not update_kwargs.get('ExpressionAttributeValues'):
+            update_kwargs.pop('ExpressionAttributeValues', None)
+
+        try:
+            response = self.dynamo_db.update_item(
+                TableName=self.table,
+                Key=serialize_item(key),
+                UpdateExpression=" ".join(update_clauses),
+                **update_kwargs
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return {
+                "statusCode": 409,
+                "body": "Item doesn't match condition."
+            }
+        finally:
+            self._invalidate(key)
 
         if response['ResponseMetadata']['HTTPStatusCode'] == 200:
             return {
@@ -143,6 +653,211 @@ class ObjectDynamodb:
                 "body": f"Error updating item. DynamoDB returned status code {response['ResponseMetadata']['HTTPStatusCode']}."
             }
     @error_handler
+    def atomic_add(self, key: dict, attr: str, delta: int = 1, condition: dict = None, set_values: dict = None, return_values: str = "UPDATED_NEW"):
+        '''
+        Method used to add `delta` to the number attribute `attr` of an existing item in a single atomic write (`ADD`),
+        so concurrent increments are never lost. Counters still stored as strings are converted to numbers on first use.
+
+        :param dict `key`: Key of the item to update.
+        :param str `attr`: Name of the number attribute to add to.
+        :param int `delta`: Amount to add (negative to subtract).
+        :param dict `condition`: Key-value pairs the item must match for the write to happen.
+        :param dict `set_values`: Other attributes to set in the same write.
+        :param str `return_values`: `ReturnValues` of the update, `UPDATED_NEW` or `ALL_NEW`.
+        :return : Response 200 with the returned attributes in `body`, Response 409 if the item doesn't exist or `condition` failed, or Response 500 error.
+        '''
+        key_names = {f"#k{i}": k for i, k in enumerate(key.keys())}
+        condition_names = {f"#c{i}": k for i, k in enumerate((condition or {}).keys())}
+        set_names = {f"#s{i}": k for i, k in enumerate((set_values or {}).keys())}
+
+        update_expression = "ADD #attr :delta"
+        if set_values:
+            update_expression += " SET " + ", ".join(f"{name} = :s{name[2:]}" for name in set_names)
+
+        condition_expression = " AND ".join([f"attribute_exists({name})" for name in key_names] +
+                                            [f"{name} = :c{name[2:]}" for name in condition_names])
+
+        values = {":delta": delta,
+                  **{f":c{name[2:]}": condition[k] for name, k in condition_names.items()},
+                  **{f":s{name[2:]}": set_values[k] for name, k in set_names.items()}}
+
+        update_kwargs = {
+            'TableName': self.table,
+            'Key': serialize_item(key),
+            'UpdateExpression': update_expression,
+            'ConditionExpression': condition_expression,
+            'ExpressionAttributeNames': {"#attr": attr, **key_names, **condition_names, **set_names},
+            'ExpressionAttributeValues': serialize_item(values),
+            'ReturnValues': return_values
+        }
+
+        try:
+            try:
+                response = self.dynamo_db.update_item(**update_kwargs)
+            except ClientError as e:
+                # `ADD` fails with a ValidationException on counters still stored as strings
+                if e.response['Error']['Code'] != 'ValidationException' or not self._migrate_number_attribute(key, attr):
+                    raise
+                response = self.dynamo_db.update_item(**update_kwargs)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return {
+                "statusCode": 409,
+                "body": "Item doesn't exist or condition failed."
+            }
+        finally:
+            self._invalidate(key)
+
+        return {"statusCode": 200,
+                "body": deserialize_item(response.get('Attributes', {}))}
+
+    @error_handler
+    def buffer_add(self, key: dict, attr: str, delta: int = 1):
+        '''
+        Method used to add `delta` to the number attribute `attr` of an existing item without waiting for the write.
+        The increment is buffered in the warm container and written by `flush_counters`, coalesced with the other
+        increments of the same counter. Without a counter buffer the increment is written immediately with `atomic_add`.
+
+        :param dict `key`: Key of the item to update.
+        :param str `attr`: Name of the number attribute to add to.
+        :param int `delta`: Amount to add (negative to subtract).
+        :return : Response 200 with `True` in `body` if the buffer is due for a flush, or the response of `atomic_add`.
+        '''
+        if not self.counters:
+            return self.atomic_add(key, attr, delta)
+
+        return {"statusCode": 200,
+                "body": self.counters.add(key, attr, delta)}
+
+    @error_handler
+    def flush_counters(self, force: bool = True, max_workers: int = MAX_SCAN_WORKERS):
+        '''
+        Method used to write the increments buffered by `buffer_add`, one `ADD` per counter, sent concurrently.
+        Increments whose write fails are put back in the buffer for the next flush, increments of deleted items are dropped.
+
+        :param bool `force`: Whether to flush even if neither the size nor the age threshold of the buffer has been reached.
+        :param int `max_workers`: Maximum number of counters written at the same time.
+        :return : Response 200 with the number of written counters in `body`, or Response 500 error if some writes failed.
+        '''
+        if not self.counters or not (force or self.counters.due()):
+            return {"statusCode": 200,
+                    "body": 0}
+
+        counters = self.counters.drain()
+        if not counters:
+            return {"statusCode": 200,
+                    "body": 0}
+
+        def write(counter: tuple):
+            return self.atomic_add(counter[0], counter[1], counter[2])
+
+        with ThreadPoolExecutor(max_workers=min(len(counters), max_workers)) as executor:
+            responses = list(executor.map(write, counters))
+
+        failed = [counter for counter, response in zip(counters, responses) if response['statusCode'] not in (200, 409)]
+        if failed:
+            self.counters.restore(failed)
+            return {"statusCode": 500,
+                    "body": f"Failed to write {len(failed)} of {len(counters)} buffered counters: {responses[counters.index(failed[0])]['body']}"}
+
+        return {"statusCode": 200,
+                "body": len(counters)}
+
+    def _migrate_number_attribute(self, key: dict, attr: str):
+        '''
+        Method used to convert the attribute `attr` of the item with `key` from a numeric string to a native number.
+        The conversion is conditional on the string value, so a concurrent migration or write is never overwritten.
+
+        :param dict `key`: Key of the item.
+        :param str `attr`: Name of the attribute to convert.
+        :return : `True` if the attribute is now a number, `False` if it couldn't be converted.
+        '''
+        response = self.dynamo_db.get_item(
+            TableName=self.table,
+            Key=serialize_item(key),
+            ProjectionExpression="#attr",
+            ExpressionAttributeNames={"#attr": attr},
+            ConsistentRead=True
+        )
+        value = response.get("Item", {}).get(attr, {})
+
+        if 'N' in value:
+            return True
+        if not value.get('S', '').strip().lstrip('-').isdigit():
+            return False
+
+        try:
+            self.dynamo_db.update_item(
+                TableName=self.table,
+                Key=serialize_item(key),
+                UpdateExpression="SET #attr = :number",
+                ConditionExpression="#attr = :string",
+                ExpressionAttributeNames={"#attr": attr},
+                ExpressionAttributeValues={":number": {'N': str(int(value['S']))}, ":string": value}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+        return True
+
+    @error_handler
+    def migrate_number_attributes(self, attributes: list, primary_key_field: str):
+        '''
+        Method used to convert counters stored as numeric strings to native numbers across the whole table,
+        for tables that should be migrated up front instead of lazily by `atomic_add`.
+
+        :param list `attributes`: Names of the attributes to convert.
+        :param str `primary_key_field`: Primary key name of the table.
+        :return : Response 200 with the number of converted attributes in `body` or Response 500 error.
+        '''
+        converted = 0
+        for item in self.iter_items(projection=[primary_key_field, *attributes]):
+            for attr in attributes:
+                if isinstance(item.get(attr), str) and self._migrate_number_attribute({primary_key_field: item[primary_key_field]}, attr):
+                    converted += 1
+
+        return {"statusCode": 200,
+                "body": converted}
+
+    @error_handler
+    def remove_null_attributes(self, attributes: list, primary_key_field: str):
+        '''
+        Method used to remove attributes stored as NULL across the whole table, e.g. before they become the key of a secondary
+        index, since DynamoDB rejects writes to items whose index key attribute isn't of the key type.
+        Every removal is conditional on the attribute still being NULL, so values written since the scan are kept.
+
+        :param list `attributes`: Names of the attributes to remove where they are NULL.
+        :param str `primary_key_field`: Primary key name of the table.
+        :return : Response 200 with the number of removed attributes in `body` or Response 500 error.
+        '''
+        removed = 0
+        for item in self.iter_items(projection=[primary_key_field, *attributes]):
+            key = {primary_key_field: item[primary_key_field]}
+            for attr in attributes:
+                if attr not in item or item[attr] is not None:
+                    continue
+                try:
+                    self.dynamo_db.update_item(
+                        TableName=self.table,
+                        Key=serialize_item(key),
+                        UpdateExpression="REMOVE #attr",
+                        ConditionExpression="attribute_type(#attr, :null)",
+                        ExpressionAttributeNames={"#attr": attr},
+                        ExpressionAttributeValues={":null": {"S": "NULL"}}
+                    )
+                    removed += 1
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+                finally:
+                    self._invalidate(key)
+
+        return {"statusCode": 200,
+                "body": removed}
+
+    @error_handler
     def update_sort_key(self, key: dict, new_item: dict):
         '''
         Method used to update attributes of the table used as a sort key, by first deleting and then placing `new_item` in place of it.
@@ -168,6 +883,8 @@ class ObjectDynamodb:
         response = self.dynamo_db.transact_write_items(
             TransactItems=transact_items
         )
+        if self.cache:
+            self.cache.clear()
         if response['ResponseMetadata']['HTTPStatusCode'] == 200:
             return {
                 "statusCode": 201,
@@ -189,20 +906,23 @@ class ObjectDynamodb:
         :param dict `item`: Item to append to that list.
         :return : Response 200 or Response 500 error.
         '''
-        key = serialize_item(key)
         item = serialize_item(item)
+        version_clause, _, version_names, version_values = self._version_expressions()
         response = self.dynamo_db.update_item(
             TableName=self.table,
-            Key=key,
-            UpdateExpression='SET #b = list_append(#b, :item)',
+            Key=serialize_item(key),
+            UpdateExpression='SET #b = list_append(#b, :item)' + version_clause,
             ExpressionAttributeNames={
                 "#b": list_name,
+                **version_names
             },
             ExpressionAttributeValues={
                 ":item": {'L': [{'M': item}]},
+                **serialize_item(version_values)
             },
             ReturnValues="UPDATED_NEW"
         )
+        self._invalidate(key)
         if response['ResponseMetadata']['HTTPStatusCode'] == 200:
             return {
                 "statusCode": 201,
@@ -224,56 +944,81 @@ class ObjectDynamodb:
         :param dict `item`: Item to delete from `list_name`.
         :return : Response 200 or Response 500 error.
         '''
-        key = serialize_item(key)
-        
-        response = self.dynamo_db.get_item(
-            TableName=self.table,
-            Key=key
-        )            
-        if not "Item" in response or not response["Item"]:
-            return {"statusCode": 404,
-                    "body": []}        
-        
-        obj_list = deserialize_list(response['Item'][list_name])
-
         is_subset = lambda subset, superset: all(subset_key in superset and superset[subset_key].strip() == subset_value.strip() for subset_key, subset_value in subset.items())
 
-        new_obj_list = serialize_list([obj for obj in obj_list if not is_subset(item, obj)])
-        
-        response = self.dynamo_db.update_item(
-            TableName=self.table,
-            Key=key,
-            UpdateExpression='SET #lst = :val',
-            ExpressionAttributeNames={
-                "#lst": list_name,
-            },
-            ExpressionAttributeValues={
-                ':val': new_obj_list
-            }
-        )
-        
-        if response['ResponseMetadata']['HTTPStatusCode'] == 200:
-            return {
-                "statusCode": 200,
-                "body": "Item successfully deleted."
-            }
-        else:
-            return {
-                "statusCode": 500,
-                "body": f"Error deleting item. DynamoDB returned status code {response['ResponseMetadata']['HTTPStatusCode']}."
-            }
-        
+        return self._rewrite_list(key, list_name, lambda obj_list: [obj for obj in obj_list if not is_subset(item, obj)],
+                                  {"statusCode": 200, "body": "Item successfully deleted."})
+
+    def _rewrite_list(self, key: dict, list_name: str, edit, success: dict):
+        '''
+        Method used to read the list `list_name` of the item with `key`, edit it and write it back.
+        The write is conditional on the version that was read for versioned models, and retried if the item changed in between.
+
+        :param dict `key`: Key of the item to update.
+        :param str `list_name`: Name of the column containing the list.
+        :param `edit`: Function taking the current list and returning the new list, or a response to return without writing.
+        :param dict `success`: Response returned once the list is written.
+        :return : `success`, the response returned by `edit`, Response 404, Response 409 if the item kept changing or Response 500 error.
+        '''
+        serialized_key = serialize_item(key)
+
+        def write():
+            response = self.dynamo_db.get_item(
+                TableName=self.table,
+                Key=serialized_key,
+                ConsistentRead=bool(self.VERSION_ATTRIBUTE)
+            )
+            if not "Item" in response or not response["Item"] or list_name not in response["Item"]:
+                return {"statusCode": 404,
+                        "body": []}
+
+            stored = response['Item'][list_name]
+            obj_list = deserialize_list(stored)
+
+            new_list = edit(obj_list)
+            if isinstance(new_list, dict):
+                return new_list
+
+            version_clause, version_condition, version_names, version_values = self._version_expressions(deserialize_item(response['Item']))
+            response = self.dynamo_db.update_item(
+                TableName=self.table,
+                Key=serialized_key,
+                UpdateExpression='SET #lst = :val' + version_clause,
+                ExpressionAttributeNames={
+                    "#lst": list_name,
+                    **version_names
+                },
+                ExpressionAttributeValues={
+                    ':val': serialize_list(new_list),
+                    **serialize_item(version_values)
+                },
+                **({'ConditionExpression': version_condition} if version_condition else {})
+            )
+            self._invalidate(key)
+
+            if response['ResponseMetadata']['HTTPStatusCode'] == 200:
+                return success
+            else:
+                return {
+                    "statusCode": 500,
+                    "body": f"Error updating item. DynamoDB returned status code {response['ResponseMetadata']['HTTPStatusCode']}."
+                }
+
+        return self._retry_on_conflict(write)
+
     @error_handler
-    def rearrange_items(self, indices_list: list, primary_key_field: str):
+    def rearrange_items(self, indices_list: list, primary_key_field: str, retries: int = 0):
         '''
-        Function that takes as input a list of indices and rearranges the order of items in the table,
-        changing the `orderIndex` fields to new values by performing batch write.
+        Function that takes as input a list of indices and rearranges the order of items in the table.
+        Items that keep their relative order are left untouched, only the items that moved get a new `orderKey`
+        between their new neighbours, written with transactions.
         :param list `indices_list`: List of indices representing new order of items.
         :param str `primary_key_field`: Primary key name of the table.
+        :param int `retries`: Number of times the rearrangement was already retried after a concurrent reorder.
         :return : Response 200 or Response 500 error.
         '''
 
-        response = self.scan_items()
+        response = self.scan_items(projection=[primary_key_field, 'orderIndex', 'orderKey'])
 
         if not check_response(response):
             return {
@@ -283,116 +1028,308 @@ class ObjectDynamodb:
 
         items = response['body']
 
-        if 'orderIndex' not in items[0]:
+        if 'orderIndex' not in items[0] and 'orderKey' not in items[0]:
             return {
                 "statusCode": 400,
                 "body": "Table is not sortable."
             }
 
-        if len(items) != len(indices_list) or set(indices_list) != set(range(0,len(items))):
+        try:
+            indices_list = [int(index) for index in indices_list]
+        except (TypeError, ValueError):
+            indices_list = None
+
+        if indices_list is None or len(items) != len(indices_list) or set(indices_list) != set(range(0,len(items))):
             return {
                 "statusCode": 400,
                 "body": "Indices list is invalid."
             }
-        indices_list = [str(item) for item in indices_list]
 
-        items_to_update = []
+        new_order = [None]*len(items)
         for item, new_order_index in zip(items, indices_list):
-            if item['orderIndex'] == new_order_index:
-                continue
-            item_to_update = {
-                "Key": {primary_key_field: item[primary_key_field]},
-                "Item": {":orderIndex": new_order_index},
-            }
-            items_to_update.append(item_to_update)
-        
+            new_order[new_order_index] = item
+
+        items_to_update = self._reorder_updates(new_order, [primary_key_field])
+
         if len(items_to_update) == 0:
             return {
                 "statusCode": 400,
                 "body": "Invalid request, no items to rearrange."
             }
-        transaction_items = [
-            {
-                'Update': {
-                    'TableName': self.table,
-                    'Key': serialize_item(item["Key"]),
-                    'UpdateExpression': "SET orderIndex = :orderIndex",
-                    'ExpressionAttributeValues': serialize_item(item["Item"]),
-                }
+
+        response = self._order_response(self._write_order_values(items_to_update, 'orderKey'), "Items rearranged successfully.")
+
+        # Indices refer to scan order, which a concurrent reorder doesn't change, so a conflicting reorder is retried
+        # from fresh keys (also fixing up the transactions that went through)
+        if response['statusCode'] == 409 and retries < VERSION_MAX_RETRIES:
+            time.sleep(backoff_delay(retries))
+            return self.rearrange_items(indices_list, primary_key_field, retries + 1)
+
+        if response['statusCode'] == 200 and max(len(update["new"]) for update in items_to_update) > MAX_KEY_LENGTH:
+            self.rebalance_order_keys(primary_key_field)
+
+        return response
+
+    @staticmethod
+    def _reorder_updates(new_order: list, key_fields: list):
+        '''
+        Method used to compute the `orderKey` writes that put items in `new_order`.
+        Items in the longest run that is already increasing keep their keys, every gap between them
+        gets evenly spaced keys between the kept neighbours.
+
+        :param list `new_order`: Items (with their key attributes and `orderKey` or `orderIndex`) in their new order.
+        :param list `key_fields`: Names of the key attributes of the items.
+        :return : List of updates for `_write_order_values`.
+        '''
+        current_keys = [order_key_of(item) for item in new_order]
+        kept = longest_increasing_run(current_keys)
+
+        items_to_update = []
+        position = 0
+        while position < len(new_order):
+            if position in kept:
+                position += 1
+                continue
+
+            end = position
+            while end < len(new_order) and end not in kept:
+                end += 1
+
+            before = current_keys[position - 1] if position > 0 else None
+            after = current_keys[end] if end < len(new_order) else None
+            for item, new_key in zip(new_order[position:end], keys_between(before, after, end - position)):
+                items_to_update.append({
+                    "Key": {field: item[field] for field in key_fields},
+                    "old": item.get('orderKey'),
+                    "new": new_key,
+                })
+            position = end
+
+        return items_to_update
+
+    @error_handler
+    def move_item(self, key: dict, before: dict = None, after: dict = None):
+        '''
+        Method used to move the item with `key` between the items with keys `before` and `after`.
+        Only the `orderKey` of the moved item is written, the other items keep their keys.
+
+        :param dict `key`: Key of the item to move.
+        :param dict `before`: Key of the item that will precede it, `None` to move it first.
+        :param dict `after`: Key of the item that will follow it, `None` to move it last.
+        :return : Response 200, Response 400 if the neighbours are invalid, Response 404 if an item doesn't exist or Response 500 error.
+        '''
+        if not before and not after:
+            return {
+                "statusCode": 400,
+                "body": "At least one of `before` and `after` is required."
             }
-            for item in items_to_update
-        ]
-        
-        response = self.dynamo_db.transact_write_items(
-            TransactItems=transaction_items
-        )
 
-        if response["ResponseMetadata"]["HTTPStatusCode"] == 200:
+        neighbours = [neighbour for neighbour in (before, after) if neighbour]
+        if key in neighbours:
             return {
-                "statusCode": 200,
-                "body": "Items rearranged successfully."
+                "statusCode": 400,
+                "body": "An item can't be moved next to itself."
             }
-        else :
+
+        def write():
+            response = self.batch_get_items(neighbours, projection=['orderIndex', 'orderKey'])
+            if response['statusCode'] != 200:
+                return response
+            if None in response['body']:
+                return {
+                    "statusCode": 404,
+                    "body": "Neighbouring item doesn't exist."
+                }
+
+            neighbour_keys = iter([order_key_of(item) for item in response['body']])
+            lower = next(neighbour_keys) if before else None
+            upper = next(neighbour_keys) if after else None
+
+            if lower is not None and upper is not None and lower >= upper:
+                return {
+                    "statusCode": 400,
+                    "body": "Item `before` must precede item `after`."
+                }
+
+            # The neighbours must still have the keys that were read, so a concurrent move of a neighbour retries the move
+            # instead of placing the item by stale keys
+            neighbour_checks = [
+                {
+                    'ConditionCheck': {
+                        'TableName': self.table,
+                        'Key': serialize_item(neighbour),
+                        'ConditionExpression': "orderKey = :orderKey" if item.get('orderKey') else "attribute_not_exists(orderKey)",
+                        **({'ExpressionAttributeValues': serialize_item({":orderKey": item['orderKey']})} if item.get('orderKey') else {})
+                    }
+                }
+                for neighbour, item in zip(neighbours, response['body'])
+            ]
+
+            new_key = key_between(lower, upper)
+            try:
+                self.dynamo_db.transact_write_items(TransactItems=[
+                    {
+                        'Update': {
+                            'TableName': self.table,
+                            'Key': serialize_item(key),
+                            'UpdateExpression': "SET orderKey = :orderKey",
+                            'ConditionExpression': " AND ".join(f"attribute_exists({k})" for k in key.keys()),
+                            'ExpressionAttributeValues': serialize_item({":orderKey": new_key})
+                        }
+                    },
+                    *neighbour_checks
+                ])
+            except ClientError as e:
+                reasons = e.response.get('CancellationReasons', [])
+                if e.response['Error']['Code'] == 'TransactionCanceledException' and reasons and reasons[0].get('Code') == 'ConditionalCheckFailed':
+                    return {
+                        "statusCode": 404,
+                        "body": "Item doesn't exist."
+                    }
+                raise
+            finally:
+                self._invalidate(key)
+
+            if len(new_key) > MAX_KEY_LENGTH:
+                self.rebalance_order_keys(list(key.keys())[0])
+
             return {
-                "statusCode": 500,
-                "body": "Unexpected error while rearranging items."
+                "statusCode": 200,
+                "body": "Item moved successfully."
             }
 
+        return self._retry_on_conflict(write)
 
     @error_handler
-    def rearrange_list(self, key: dict, list_name: str, new_order: list):
-        key = serialize_item(key)
-        
-        response = self.dynamo_db.get_item(
-            TableName=self.table,
-            Key=key
-        )            
-        if not "Item" in response or not response["Item"]:
-            return {"statusCode": 404,
-                    "body": []}        
-        
-        items = deserialize_list(response['Item'][list_name])
+    def rebalance_order_keys(self, primary_key_field: str):
+        '''
+        Method used to replace the `orderKey` of every item with short evenly spaced keys, keeping the current order.
+        Repeated inserts at the same position make keys grow, so this runs when a written key gets longer than `MAX_KEY_LENGTH`.
+
+        :param str `primary_key_field`: Primary key name of the table.
+        :return : Response 200, Response 409 if items were moved concurrently or Response 500 error.
+        '''
+        response = self.parallel_scan_items(projection=[primary_key_field, 'orderIndex', 'orderKey'])
 
-        if len(items) != len(new_order) or set(new_order) != set(range(0,len(items))):
+        if response['statusCode'] != 200:
             return {
-                "statusCode": 400,
-                "body": "Indices list is invalid."
+                "statusCode": 500,
+                "body": "Error while retrieving items."
             }
-        
-        new_list = [items[i] for i in new_order]
-        
-        new_obj_list = serialize_list(new_list)
 
-        response = self.dynamo_db.update_item(
-            TableName=self.table,
-            Key=key,
-            UpdateExpression='SET #lst = :val',
-            ExpressionAttributeNames={
-                "#lst": list_name,
-            },
-            ExpressionAttributeValues={
-                ':val': new_obj_list
+        items = sorted(response['body'], key=order_key_of)
+
+        items_to_update = [
+            {
+                "Key": {primary_key_field: item[primary_key_field]},
+                "old": item.get('orderKey'),
+                "new": new_key,
             }
-        )
-        
-        if response['ResponseMetadata']['HTTPStatusCode'] == 200:
+            for item, new_key in zip(items, spaced_keys(len(items)))
+            if item.get('orderKey') != new_key
+        ]
+
+        if len(items_to_update) == 0:
             return {
                 "statusCode": 200,
-                "body": "List Successfully Rearranged."
+                "body": "Nothing to rebalance."
             }
-        else:
+
+        return self._order_response(self._write_order_values(items_to_update, 'orderKey'), "Order keys rebalanced successfully.")
+
+    @error_handler
+    def next_order_values(self, primary_key_field: str):
+        '''
+        Method used to get the `orderIndex` and `orderKey` of an item appended after every other item of `self.table`.
+
+        :param str `primary_key_field`: Primary key name of the table.
+        :return : Response 200 with a dictionary containing `orderIndex` and `orderKey` or Response 500 error.
+        '''
+        response = self.parallel_scan_items(projection=[primary_key_field, 'orderIndex', 'orderKey'])
+
+        if response['statusCode'] != 200:
             return {
                 "statusCode": 500,
-                "body": f"Error rearranging item. DynamoDB returned status code {response['ResponseMetadata']['HTTPStatusCode']}."
+                "body": "Error while retrieving items."
             }
-    
+
+        items = [item for item in response['body'] if 'orderIndex' in item or 'orderKey' in item]
+        last_key = max((order_key_of(item) for item in items), default=None)
+
+        return {
+            "statusCode": 200,
+            "body": {
+                "orderIndex": str(len(response['body'])),
+                "orderKey": key_between(last_key, None)
+            }
+        }
+
+    @staticmethod
+    def apply_order(items: list):
+        '''
+        Method used to set the `orderIndex` of every item to its position when sorted by `orderKey`.
+        The list itself is left in scan order, which is the order `rearrange_items` expects new indices in.
+
+        :param list `items`: List of items containing `orderKey` or `orderIndex`.
+        :return : The same list of items.
+        '''
+        if not all('orderKey' in item or 'orderIndex' in item for item in items):
+            return items
+
+        for order_index, item in enumerate(sorted(items, key=order_key_of)):
+            item['orderIndex'] = str(order_index)
+
+        return items
+
+    @error_handler
+    def scan_ordered_items(self, projection: list = None):
+        '''
+        Method used to get all items of `self.table` with their `orderIndex` derived from `orderKey` (see `apply_order`).
+
+        :param list `projection`: Attribute names to read, `None` to read whole items.
+        :return : Response 200 containing the items in body or Response 500 error.
+        '''
+        if projection and 'orderIndex' in projection and 'orderKey' not in projection:
+            projection = [*projection, 'orderKey']
+
+        response = self.scan_items(projection=projection)
+
+        if response['statusCode'] == 200 and (not projection or 'orderIndex' in projection):
+            self.apply_order(response['body'])
+
+        return response
+
+
+    @error_handler
+    def rearrange_list(self, key: dict, list_name: str, new_order: list):
+        '''
+        Method used to reorder the list `list_name` of the item with `key`.
+
+        :param dict `key`: Key of the item to update.
+        :param str `list_name`: Name of the column containing the list to reorder.
+        :param list `new_order`: Indices of the current elements in their new order.
+        :return : Response 200, Response 400 if `new_order` is invalid, Response 404, Response 409 if the item kept changing or Response 500 error.
+        '''
+        def reorder(items: list):
+            if len(items) != len(new_order) or set(new_order) != set(range(0,len(items))):
+                return {
+                    "statusCode": 400,
+                    "body": "Indices list is invalid."
+                }
+
+            return [items[i] for i in new_order]
+
+        return self._rewrite_list(key, list_name, reorder, {"statusCode": 200, "body": "List Successfully Rearranged."})
+
     @error_handler
     def clean_order_indexes(self, primary_key_field: str):
         '''
         If we delete an item the middle item on a list w/ order indexes [0,1,2], then the order indexes of the list will be [0,2].
         This method cleans the list so there are no gaps in between.
+        Reads order items by `orderKey` and derive `orderIndex` with `apply_order`, so deletes no longer need this,
+        it is kept to compact stored indexes of tables written before `orderKey` existed.
         '''
-        response = self.scan_items()
+        response = self.parallel_scan_items(projection=[primary_key_field, 'orderIndex'])
 
         if not check_response(response):
             return {
@@ -438,7 +1375,8 @@ class ObjectDynamodb:
 
             item_to_update = {
                 "Key": {primary_key_field: item[primary_key_field]},
-                "Item": {":orderIndex": str(new_index)},
+                "old": item['orderIndex'],
+                "new": str(new_index),
             }
             items_to_update.append(item_to_update)
         
@@ -447,31 +1385,74 @@ class ObjectDynamodb:
                 "statusCode": 400,
                 "body": "Invalid request, no items to rearrange."
             }
-        
 
-        transaction_items = [
-            {
-                'Update': {
-                    'TableName': self.table,
-                    'Key': serialize_item(item["Key"]),
-                    'UpdateExpression': "SET orderIndex = :orderIndex",
-                    'ExpressionAttributeValues': serialize_item(item["Item"]),
+        return self._order_response(self._write_order_values(items_to_update, 'orderIndex'), "Items cleaned successfully.")
+
+    def _write_order_values(self, updates: list, attribute: str, max_workers: int = MAX_SCAN_WORKERS):
+        '''
+        Method used to write new values of the order attribute `attribute` (`orderIndex` or `orderKey`) with transactions of at most 100 items, running the transactions concurrently.
+        Every update is conditional on the value that was read (or on the attribute not existing yet), so a conflicting concurrent reorder cancels the transaction instead of interleaving with it.
+
+        :param list `updates`: List of dictionaries containing `Key`, the `old` value (`None` if unset) and the `new` value.
+        :param str `attribute`: Name of the order attribute to write.
+        :param int `max_workers`: Maximum number of transactions running at the same time.
+        :return : Dictionary with the keys that were `updated`, the keys that `failed` and the keys that caused `conflicts`.
+        '''
+        def write_chunk(chunk: list):
+            transaction_items = [
+                {
+                    'Update': {
+                        'TableName': self.table,
+                        'Key': serialize_item(update["Key"]),
+                        'UpdateExpression': "SET #order = :new",
+                        'ConditionExpression': "#order = :old" if update["old"] is not None else "attribute_not_exists(#order)",
+                        'ExpressionAttributeNames': {"#order": attribute},
+                        'ExpressionAttributeValues': serialize_item({":new": update["new"]} if update["old"] is None else
+                                                                    {":new": update["new"], ":old": update["old"]}),
+                    }
                 }
-            }
-            for item in items_to_update
-        ]
-        
-        response = self.dynamo_db.transact_write_items(
-            TransactItems=transaction_items
-        )
+                for update in chunk
+            ]
+            keys = [update["Key"] for update in chunk]
+            try:
+                self.dynamo_db.transact_write_items(TransactItems=transaction_items)
+                return {"updated": keys, "failed": [], "conflicts": []}
+            except ClientError as e:
+                reasons = e.response.get('CancellationReasons', [])
+                conflicts = [key for key, reason in zip(keys, reasons) if reason.get('Code') == 'ConditionalCheckFailed']
+                return {"updated": [], "failed": keys, "conflicts": conflicts}
+            finally:
+                for key in keys:
+                    self._invalidate(key)
+
+        update_chunks = chunks(updates, TRANSACTION_SIZE)
+
+        with ThreadPoolExecutor(max_workers=min(len(update_chunks), max_workers)) as executor:
+            results = list(executor.map(write_chunk, update_chunks))
+
+        return {outcome: [key for result in results for key in result[outcome]] for outcome in ("updated", "failed", "conflicts")}
+
+    @staticmethod
+    def _order_response(result: dict, success_message: str):
+        '''
+        Method used to turn the result of `_write_order_values` into a response.
 
-        if response["ResponseMetadata"]["HTTPStatusCode"] == 200:
+        :param dict `result`: Result returned by `_write_order_values`.
+        :param str `success_message`: Body of the response when every update was written.
+        :return : Response 200, Response 409 if concurrent reorders conflicted or Response 500 with the partial-failure details.
+        '''
+        if not result["failed"]:
             return {
                 "statusCode": 200,
-                "body": "Items cleaned successfully."
+                "body": success_message
             }
-        else :
-            return {
-                "statusCode": 500,
-                "body": "Unexpected error while cleaning items."
-            }
\ No newline at end of file
+
+        return {
+            "statusCode": 409 if result["conflicts"] else 500,
+            "body": {
+                "message": "Some items could not be rearranged, they were changed concurrently." if result["conflicts"] else "Unexpected error while rearranging items.",
+                "updated": result["updated"],
+                "failed": result["failed"],
+                "conflicts": result["conflicts"]
+            }
+        }
\ No newline at end of file
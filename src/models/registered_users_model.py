@@ -5,6 +5,8 @@ from ..utils.helpers import error_handler, check_response
 from ..utils.errors import ResponseError
 
 class RegisteredUsersModel(ObjectDynamodb):
+    KEY_SCHEMA = {"partition_key": "userEmail", "sort_key": None}
+
     def __init__(self, users_table: str):
 
         self.validator = RegisteredUsersValidator()
@@ -1,54 +1,181 @@
 import re
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from .mixins import ObjectDynamodb
+from .mixins.model_mixin import MAX_SCAN_WORKERS, VERSION_MAX_RETRIES
+from .buttons_model import ButtonsModel
 from .validators import RemotesValidator
-from ..utils.helpers import error_handler, check_response
+from ..utils.helpers import error_handler, check_response, serialize_item, backoff_delay
 from ..utils.errors import ResponseError
+from ..utils.ir_codec import unpack_code
+from ..utils.order_keys import keys_between, order_key_of
+
+CACHE_TTL = float(os.getenv("REMOTES_CACHE_TTL", "10"))
+CLICKS_FLUSH_INTERVAL = float(os.getenv("REMOTES_CLICKS_FLUSH_INTERVAL", "30"))
+CLICKS_BUFFER_SIZE = int(os.getenv("REMOTES_CLICKS_BUFFER_SIZE", "50"))
+BUTTONS_TABLE = os.getenv("BUTTONS_TABLE_NAME", "")
 
 class RemotesModel(ObjectDynamodb):
     '''
     Class used to handle remote control commands.
     This class provides capability to store, retrieve, update and delete remotes from AWS DynamoDB.
+    Buttons are stored as their own items through `ButtonsModel`. Remotes created before that keep a `buttons` list, which
+    is still read until the first write to the buttons of the remote, or `migrate_buttons`, moves it to the buttons table.
     '''
-    def __init__(self, remote_table: str):
+    KEY_SCHEMA = {"partition_key": "remoteName", "sort_key": None}
+    VERSION_ATTRIBUTE = "version"
+
+    # Attributes list views show, their buttons are read per remote through `get_remotes` with the remote's key.
+    SUMMARY_ATTRIBUTES = ['remoteName', 'category', 'macAddress', 'buttonClicks', 'orderIndex', 'orderKey']
+
+    # Remotes of a device, so per-device reads query its remotes instead of scanning every remote.
+    INDEXES = {
+        "macAddress-index": {"partition_key": "macAddress", "sort_key": "remoteName", "projection": "ALL"}
+    }
+
+    def __init__(self, remote_table: str, buttons_table: str = None):
 
         self.validator = RemotesValidator()
+        self.buttons = ButtonsModel(buttons_table or BUTTONS_TABLE)
 
-        super().__init__(remote_table)
+        super().__init__(remote_table, cache_ttl=CACHE_TTL,
+                         counter_flush_interval=CLICKS_FLUSH_INTERVAL, counter_buffer_size=CLICKS_BUFFER_SIZE)
         
  
     @error_handler
-    def get_remotes(self, remote: dict = None):
+    def get_remotes(self, remote: dict = None, projection: list = None, with_buttons: bool = False):
         '''
         Method used to get a remote by its' key or all remotes if None.
         :param dict `remote`: Dictionary containing remote.
+        :param list `projection`: Attribute names to read (e.g. list views that don't need `buttons`), `None` to read whole remotes.
+        :param bool `with_buttons`: Whether to return every remote with its `buttons` (from the buttons table and legacy lists)
+                                    with codes in text form, as shown to clients. Otherwise only legacy lists are returned, as stored.
         :returns: Response 200 containing remotes in body or Response 500 error.
         '''
+        with_buttons = with_buttons and (not projection or 'buttons' in projection)
+
+        # Buttons are matched to their remote by `remoteName`, which is only returned if it was asked for
+        strip_name = with_buttons and projection and 'remoteName' not in projection
+        if strip_name:
+            projection = [*projection, 'remoteName']
+
         if remote:
             
             self.validator.validate(remote, params=['remoteName'])
 
-            return self.get_item(remote)
+            response = self.get_item(remote, projection)
+        else:
+
+            response = self.scan_ordered_items(projection=projection)
+
+        if with_buttons and response['statusCode'] == 200:
+            remotes = response['body'] if isinstance(response['body'], list) else [response['body']]
+            response = self._attach_buttons(response, remotes, every_remote=not remote)
+            if strip_name and response['statusCode'] == 200:
+                for item in remotes:
+                    item.pop('remoteName', None)
+
+        return response
+
+    @error_handler
+    def get_remotes_for_device(self, mac_address: dict, projection: list = None, with_buttons: bool = False):
+        '''
+        Method used to get the remotes of a device in display order, with a query of `macAddress-index`.
+        :param dict `mac_address`: Dictionary containing key `macAddress` of the device.
+        :param list `projection`: Attribute names to read, `None` to read whole remotes.
+        :param bool `with_buttons`: Whether to return every remote with its `buttons` with codes in text form (see `get_remotes`).
+        :returns: Response 200 containing the remotes of the device in body or Response 500 error.
+        '''
+        self.validator.validate(mac_address, params=['macAddress'])
+
+        with_buttons = with_buttons and (not projection or 'buttons' in projection)
+
+        # Remotes are sorted by their order attributes and matched to their buttons by `remoteName`, which are only returned if they were asked for
+        read_attributes = ('orderKey', 'orderIndex', 'remoteName') if with_buttons else ('orderKey', 'orderIndex')
+        extra_attributes = [attribute for attribute in read_attributes if projection and attribute not in projection]
+        if extra_attributes:
+            projection = [*projection, *extra_attributes]
+
+        response = self.query_items("macAddress-index", {'macAddress': mac_address['macAddress']}, projection=projection)
+        if response['statusCode'] != 200:
+            return response
+
+        response['body'].sort(key=order_key_of)
+
+        if with_buttons:
+            response = self._attach_buttons(response, response['body'])
+            if response['statusCode'] != 200:
+                return response
+
+        for item in response['body']:
+            for attribute in extra_attributes:
+                item.pop(attribute, None)
+
+        return response
+
+    def _attach_buttons(self, response: dict, remotes: list, every_remote: bool = False):
+        '''
+        Method used to set the `buttons` of `remotes` to their legacy list followed by their buttons from the buttons table, with codes in text form.
+        :param dict `response`: Response containing `remotes`, returned once they have their buttons.
+        :param list `remotes`: List of remotes.
+        :param bool `every_remote`: Whether `remotes` are all the remotes, so the buttons table is scanned instead of queried per remote.
+        :returns: `response` or Response 500 error.
+        '''
+        buttons_response = self._buttons_of(remotes, every_remote)
+        if buttons_response['statusCode'] != 200:
+            return buttons_response
+
+        for item in remotes:
+            item['buttons'] = [{**btn, 'buttonCode': unpack_code(btn['buttonCode'])}
+                               for btn in item.get('buttons', []) + buttons_response['body'].get(item['remoteName'], [])]
+
+        return response
+
+    def _buttons_of(self, remotes: list, every_remote: bool = False):
+        '''
+        Method used to read the buttons of `remotes` from the buttons table, with a parallel scan for every remote or concurrent queries otherwise.
+        :param list `remotes`: List of remotes.
+        :param bool `every_remote`: Whether `remotes` are all the remotes.
+        :returns: Response 200 with a dictionary of the buttons in display order by `remoteName` in body or Response 500 error.
+        '''
+        if every_remote and len(remotes) > 1:
+            response = self.buttons.parallel_scan_items()
+            if response['statusCode'] == 200:
+                response['body'].sort(key=lambda button: button.get('orderKey', ''))
+        elif len(remotes) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(remotes), MAX_SCAN_WORKERS)) as executor:
+                responses = list(executor.map(lambda item: self.buttons.get_buttons({'remoteName': item['remoteName']}), remotes))
+            failed = [res for res in responses if res['statusCode'] != 200]
+            response = failed[0] if failed else {"statusCode": 200,
+                                                 "body": [btn for res in responses for btn in res['body']]}
         else:
+            response = self.buttons.get_buttons({'remoteName': remotes[0]['remoteName']}) if remotes else {"statusCode": 200, "body": []}
+        if response['statusCode'] != 200:
+            return response
+
+        buttons = {}
+        for btn in response['body']:
+            buttons.setdefault(btn['remoteName'], []).append({k: v for k, v in btn.items() if k not in ('remoteName', 'orderKey')})
 
-            return self.scan_items()
+        return {"statusCode": 200,
+                "body": buttons}
 
     @error_handler
     def add_remote(self, remote: dict):
 
-        response = self.get_remotes()
+        response = self.next_order_values('remoteName')
         if response['statusCode'] != 200:
             return {
                 'statusCode': 500,
                 'body': 'Error while retrieving remotes.'
             }
-        
-        new_order_index = str(len(response["body"]))
 
-        button_clicks = {"buttonClicks": "0"}
+        button_clicks = {"buttonClicks": 0}
         remote = {
             **remote, 
             **button_clicks,
-            "orderIndex": new_order_index
+            **response["body"]
             }
 
         self.validator.validate(remote, params=['remoteName', 
@@ -56,14 +183,21 @@ class RemotesModel(ObjectDynamodb):
                                                 'macAddress', 
                                                 'buttonClicks',
                                                 'orderIndex',
+                                                'orderKey',
                                                 'buttons'])
-        
-        return self.add_item(remote)
+
+        buttons = remote.pop('buttons')
+        response = self.add_item(remote)
+        if response['statusCode'] != 201 or not buttons:
+            return response
+
+        return self.buttons.put_buttons([{**btn, 'remoteName': remote['remoteName']} for btn in buttons],
+                                        keys_between(None, None, len(buttons)))
 
     @error_handler
     def add_button(self, body: dict):
         '''
-        Method used to add button to the list of buttons in a specific remote.
+        Method used to add button to the buttons of a specific remote, replacing the button with the same name.
         This method also checks if given button matches the protocol's commandsize for given remote.
         :param dict `body`: Body passed as argument containing `remoteName`, `buttonName` and `buttonCode`.
         :returns: Response 200 or Response 500 error 
@@ -73,7 +207,7 @@ class RemotesModel(ObjectDynamodb):
         self.validator.validate(remote, params=['remoteName'])
 
         #Check what the protocol command size of this remote is to validate the buttonCode
-        response = self.get_remotes(remote)
+        response = self.get_remotes(remote, projection=['remoteName'])
         
         if not check_response(response):
             raise ResponseError(f"Unexpected response error when using `get_remotes`, received status code {response['statusCode']} and body {response['body']}.")
@@ -89,16 +223,20 @@ class RemotesModel(ObjectDynamodb):
                                                 'commandSize',
                                                 'buttonState'])
         
-        #Button code is back to how it should be
+        #Button code is back to how it should be, it's stored packed (see `src.utils.ir_codec`)
         button['buttonCode'] = body["buttonCode"]
 
-        return self.append_to_list(remote, "buttons", button)
+        response = self._migrate_before_write(remote)
+        if response['statusCode'] != 201:
+            return response
+
+        return self.buttons.add_button({**remote, **button})
     
 
     @error_handler
     def delete_button(self, body: dict):
         '''
-        Method used to delete a button from the list of buttons in a specific remote.
+        Method used to delete a button from the buttons of a specific remote.
         :param dict `body`: Body passed as argument containing `remoteName` and `buttonName` to delete from.
         :returns: Response 200 or Response 500 error 
         '''
@@ -106,7 +244,7 @@ class RemotesModel(ObjectDynamodb):
 
         self.validator.validate(remote, params=['remoteName'])
 
-        response = self.get_remotes(remote)
+        response = self.get_remotes(remote, projection=['remoteName'])
         
         if not check_response(response):
             raise ResponseError(f"Unexpected response error when using `get_remotes`, received status code {response['statusCode']} and body {response['body']}.")
@@ -114,8 +252,29 @@ class RemotesModel(ObjectDynamodb):
         button = {'buttonName' : body['buttonName']}
 
         self.validator.validate(button, ['buttonName'])
-        
-        return self.delete_from_list(remote, 'buttons', button) 
+
+        response = self._migrate_before_write(remote)
+        if response['statusCode'] != 201:
+            return response
+
+        return self.buttons.delete_button({**remote, **button})
+
+    @error_handler
+    def rearrange_buttons(self, remote: dict, new_order: list):
+        '''
+        Method used to reorder the buttons of a specific remote.
+        :param dict `remote`: Dictionary containing `remoteName`.
+        :param list `new_order`: New position of every button, in current display order.
+        :returns: Response 200, Response 400 if `new_order` is invalid or Response 500 error.
+        '''
+        self.validator.validate(remote, params=['remoteName'])
+
+        # `new_order` indexes the legacy list followed by the buttons table, which is the order the list is moved in
+        response = self._migrate_before_write(remote)
+        if response['statusCode'] != 201:
+            return response
+
+        return self.buttons.rearrange_buttons(remote, new_order)
         
 
     @error_handler
@@ -123,37 +282,137 @@ class RemotesModel(ObjectDynamodb):
         
         self.validator.validate(remote, params=['remoteName'])
 
+        # The remote goes first, so a failure never leaves a remote without its buttons
         response = self.delete_item(remote)
+        if response['statusCode'] != 200:
+            return response
 
-        if response['statusCode'] == 200:
-            res = self.clean_order_indexes('remoteName')
+        response = self.buttons.delete_buttons(remote)
+        if response['statusCode'] != 200:
+            return response
 
-        return response
+        return {"statusCode": 200,
+                "body": "Item successfully deleted."}
 
     @error_handler
     def get_button(self, remote: dict, button: dict):
-
+        '''
+        Method used to get a button of a remote with its code in text form, as sent to devices.
+        :param dict `remote`: Remote containing `remoteName` and its legacy `buttons` list if it has one.
+        :param dict `button`: Dictionary containing `buttonName`.
+        :returns: Response 200 containing the button in body, Response 404 or Response 500 error.
+        '''
         self.validator.validate(button, params=['buttonName'])
 
-        for btn in remote['buttons']:
+        for btn in remote.get('buttons', []):
             if btn['buttonName'] == button['buttonName']:
 
                 return {"statusCode": 200,
-                        "body": btn}
-            
-        return {"statusCode": 404,
-                "body": "Button does not exist."}
+                        "body": {**btn, 'buttonCode': unpack_code(btn['buttonCode'])}}
+
+        response = self.buttons.get_button({'remoteName': remote['remoteName'], 'buttonName': button['buttonName']})
+        if response['statusCode'] == 200:
+            btn = {k: v for k, v in response['body'].items() if k not in ('remoteName', 'orderKey')}
+            return {"statusCode": 200,
+                    "body": {**btn, 'buttonCode': unpack_code(btn['buttonCode'])}}
+        if response['statusCode'] == 404:
+            return {"statusCode": 404,
+                    "body": "Button does not exist."}
+
+        return response
     
     @error_handler
     def increment_counter(self, remote: dict):
 
         self.validator.validate(remote, params=['remoteName'])
 
-        remote_response = self.get_remotes(remote)
+        return self.atomic_add(remote, 'buttonClicks', 1)
 
-        if not check_response(remote_response):
-            return remote_response
-        
-        counter = int(remote_response['body']['buttonClicks']) + 1
+    def _migrate_remote(self, remote: dict):
+        '''
+        Method used to move the legacy `buttons` list of a remote to the buttons table, packing their codes.
+        Moved buttons keep their order and show before buttons added to the table since. The list is removed in the same
+        transaction as the buttons are written, conditional on the version of the remote that was read.
+        :param dict `remote`: Remote containing `remoteName`, `version` and its legacy `buttons` list if it has one.
+        :returns: Response 201, Response 409 if the remote changed since it was read or Response 500 error.
+        '''
+        if 'buttons' not in remote:
+            return {"statusCode": 201,
+                    "body": "Nothing to migrate."}
+
+        key = {'remoteName': remote['remoteName']}
+        buttons = remote['buttons']
+        version_clause, condition, names, values = self._version_expressions(remote)
+        remove_list = {'Update': {'TableName': self.table,
+                                  'Key': serialize_item(key),
+                                  'UpdateExpression': "REMOVE buttons" + version_clause,
+                                  'ConditionExpression': condition,
+                                  'ExpressionAttributeNames': names,
+                                  'ExpressionAttributeValues': serialize_item(values)}}
 
-        return self.update_item(remote, {'buttonClicks': str(counter)})
+        try:
+            return self.buttons.put_buttons([{**btn, **key} for btn in buttons],
+                                            self.buttons.keys_before_first(key, len(buttons)) if buttons else [], with_write=remove_list)
+        finally:
+            self._invalidate(key)
+
+    def _migrate_before_write(self, remote: dict):
+        '''
+        Method used to move the legacy `buttons` list of a remote (see `_migrate_remote`) before its buttons are written.
+        The remote is read with a consistent read, and read again if it changes before its list is moved.
+        :param dict `remote`: Dictionary containing `remoteName`.
+        :returns: Response 201, Response 404, Response 409 if the remote kept changing or Response 500 error.
+        '''
+        for attempt in range(VERSION_MAX_RETRIES + 1):
+            response = self.get_item(remote, ['remoteName', 'buttons', 'version'], consistent=True)
+            if response['statusCode'] != 200:
+                return response
+
+            response = self._migrate_remote(response['body'])
+            if response['statusCode'] != 409:
+                return response
+            if attempt < VERSION_MAX_RETRIES:
+                time.sleep(backoff_delay(attempt))
+
+        return response
+
+    @error_handler
+    def migrate_buttons(self):
+        '''
+        Method used to move the legacy `buttons` list of every remote to the buttons table (see `_migrate_remote`).
+        A remote whose list changes while it is moved keeps its list and is moved by a later run, running it again is safe.
+        :returns: Response 200 with the number of migrated remotes in body or Response 500 error.
+        '''
+        migrated = 0
+        for remote in self.iter_items(projection=['remoteName', 'buttons', 'version']):
+            if 'buttons' not in remote:
+                continue
+
+            response = self._migrate_remote(remote)
+            if response['statusCode'] == 201:
+                migrated += 1
+            elif response['statusCode'] != 409:
+                return response
+
+        return {"statusCode": 200,
+                "body": migrated}
+
+    @error_handler
+    def record_click(self, remote: dict):
+        '''
+        Method used to count a button press of a remote without waiting for the write.
+        Clicks are buffered and written by `flush_clicks`, which the websocket router calls after every invocation and on shutdown.
+        :param dict `remote`: Dictionary containing `remoteName`.
+        :returns: Response 200 or Response 500 error.
+        '''
+        self.validator.validate(remote, params=['remoteName'])
+
+        return self.buffer_add({'remoteName': remote['remoteName']}, 'buttonClicks', 1)
+
+    def flush_clicks(self, force: bool = False):
+        '''
+        Method used to write the buffered clicks of every remote.
+        :param bool `force`: Whether to write them even if neither the size nor the age threshold has been reached.
+        :returns: Response 200 with the number of updated remotes in body or Response 500 error.
+        '''
+        return self.flush_counters(force=force)
@@ -1,12 +1,22 @@
+import os
 import json
-import random
-import string
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from .mixins import ObjectDynamodb
 from .validators import RequestPoolValidator
 from ..utils.helpers import check_response, error_handler
+from ..utils.ids import time_ordered_id
+
+REQUEST_TTL = int(os.getenv("REQUEST_POOL_TTL", "40"))
 
 class RequestPoolModel(ObjectDynamodb):
+    '''
+    Class used to handle pending requests sent to devices.
+    Requests expire through the DynamoDB TTL attribute `expiresAt`. Since DynamoDB deletes expired items lazily,
+    reads treat expired requests as missing.
+    '''
+    KEY_SCHEMA = {"partition_key": "requestId", "sort_key": None}
+
     def __init__(self, request_pool_table: str):
 
         self.validator = RequestPoolValidator()
@@ -16,23 +26,25 @@ class RequestPoolModel(ObjectDynamodb):
     @error_handler
     def add_request(self, connection_id: str, request: dict):
         
-        time = datetime.now()
+        now = time.time()
 
-        request_id = ''.join(random.choices(string.ascii_letters + string.digits, k=3)) + '_' + str(time.timestamp())
+        request_id = time_ordered_id(now)
 
         request_body = json.dumps(request)
     
         item = {
             "requestId": request_id,
-            "timestamp": time.isoformat(),
+            "timestamp": datetime.fromtimestamp(now).isoformat(),
             "connectionId": connection_id,
-            "requestBody": request_body
+            "requestBody": request_body,
+            "expiresAt": int(now) + REQUEST_TTL
         }
 
         self.validator.validate(item, ['requestId',
                                        'connectionId',
                                        'timestamp',
-                                       'requestBody'])
+                                       'requestBody',
+                                       'expiresAt'])
         
         response = self.add_item(item)
 
@@ -42,15 +54,48 @@ class RequestPoolModel(ObjectDynamodb):
         return response
         
     @error_handler
-    def get_requests(self, request: dict = None):
+    def get_requests(self, request: dict = None, projection: list = None):
 
         if request:
             self.validator.validate(request, ['requestId'])
 
-            return self.get_item(request)
+            if projection:
+                projection = [*projection, 'expiresAt', 'timestamp']
+
+            response = self.get_item(request, projection)
+
+            if check_response(response) and self.is_expired(response['body']):
+                return {"statusCode": 404,
+                        "body": []}
+
+            return response
         
-        return self.scan_items()
+        if projection:
+            projection = [*projection, 'expiresAt', 'timestamp']
+
+        response = self.scan_items(projection=projection)
+
+        if check_response(response):
+            response['body'] = [item for item in response['body'] if not self.is_expired(item)]
+
+        return response
     
+    @staticmethod
+    def is_expired(request: dict):
+        '''
+        Method used to check if `request` has expired but may not have been deleted by DynamoDB TTL yet.
+        Requests created before `expiresAt` existed expire `REQUEST_TTL` seconds after their `timestamp`.
+        :param dict `request`: Request containing `expiresAt` or `timestamp`.
+        :returns : True if expired, False otherwise.
+        '''
+        if 'expiresAt' in request:
+            return int(request['expiresAt']) <= time.time()
+
+        if 'timestamp' in request:
+            return datetime.fromisoformat(request['timestamp']).timestamp() + REQUEST_TTL <= time.time()
+
+        return False
+
     @error_handler
     def delete_request(self, request: dict):
 
@@ -59,23 +104,24 @@ class RequestPoolModel(ObjectDynamodb):
         return self.delete_item(request)
     
     @error_handler
-    def clean_expired_requests(self):
-
-        expired_requests = []
-
-        requests_response = self.get_requests()
-
-        if not check_response(requests_response):
-            return requests_response
-
-        for request in requests_response["body"]:
-            request_time = datetime.fromisoformat(request['timestamp'])
-            if datetime.now() - request_time > timedelta(seconds=40):
-                expired_requests.append(request)
-
-
-        for request in expired_requests:
-            delete_response = self.delete_request({"requestId": request['requestId']})
+    def backfill_expires_at(self):
+        '''
+        Method used to set `expiresAt` on requests stored before it existed, so DynamoDB TTL deletes them too.
+        Requests expire `REQUEST_TTL` seconds after their `timestamp`, requests without one expire now.
+        :returns : Response 200 with the number of updated requests in body or Error
+        '''
+        updated = 0
+        for request in self.iter_items(projection=['requestId', 'timestamp', 'expiresAt']):
+            if 'expiresAt' in request:
+                continue
+
+            created = datetime.fromisoformat(request['timestamp']).timestamp() if 'timestamp' in request else time.time() - REQUEST_TTL
+            response = self.update_item({"requestId": request['requestId']}, {"expiresAt": int(created) + REQUEST_TTL},
+                                        condition={"expiresAt": None})
+            if response['statusCode'] == 201:
+                updated += 1
+            elif response['statusCode'] != 409:
+                return response
 
         return {"statusCode": 200,
-                "body": "Successfully cleaned requests."}
\ No newline at end of file
+                "body": updated}
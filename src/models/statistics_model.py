@@ -4,6 +4,8 @@ from ..utils.helpers import error_handler, check_response
 from ..utils.errors import ResponseError
 
 class StatisticsModel(ObjectDynamodb):
+    KEY_SCHEMA = {"partition_key": "statisticsId", "sort_key": None}
+
     def __init__(self, statistics_table: str):
 
         self.validator = StatisticsValidator()
@@ -3,6 +3,7 @@ import ast
 from typing import Tuple
 from datetime import datetime
 from .mixins import BaseValidator
+from ...utils.order_keys import is_order_key
 
 class AutomationsValidator(BaseValidator):
 
@@ -87,9 +88,10 @@ class AutomationsValidator(BaseValidator):
         return True
     
 
-    def check_executed_counter(self, executed_counter: str):
+    def check_executed_counter(self, executed_counter: int):
 
-        if not isinstance(executed_counter, str):
+        # Counters are native numbers, numeric strings are still accepted for automations not yet migrated
+        if isinstance(executed_counter, bool) or not isinstance(executed_counter, (int, str)):
             return False
         
         try:
@@ -192,6 +194,9 @@ class AutomationsValidator(BaseValidator):
         
         return True
 
+    def check_order_key(self, order_key: str):
+        return is_order_key(order_key)
+
     def validate(self, items: dict, params: list):
         check_attributes = {
             'automationId': self.check_automation_id,
@@ -206,7 +211,8 @@ class AutomationsValidator(BaseValidator):
             'errorMessage': self.check_error_message,
             'automationState': self.check_state,
             'runError': self.check_run_error,
-            'orderIndex': self.check_order_index
+            'orderIndex': self.check_order_index,
+            'orderKey': self.check_order_key
         }
         super().validate(check_attributes, items, params=params)
 
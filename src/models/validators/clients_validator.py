@@ -35,6 +35,17 @@ class ClientsValidator(BaseValidator):
 
         return True
     
+    def check_mac(self, mac: str):
+        '''
+        Method that checks if given argument is str and valid MAC address
+        '''
+        if not isinstance(mac, str):
+            return False
+        
+        pattern = '^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$'
+
+        return re.match(pattern, mac)
+    
     def validate(self, items: dict, params: list=None):
         '''
         Method used to validate types and values of items.
@@ -42,7 +53,8 @@ class ClientsValidator(BaseValidator):
         '''
         check_attributes = {
             'connectionId': self.check_connection_id, 
-            'deviceType': self.check_device_type
+            'deviceType': self.check_device_type,
+            'macAddress': self.check_mac
         }
         super().validate(check_attributes, items, params=params)
             
\ No newline at end of file
@@ -1,5 +1,6 @@
 import re
 from .mixins import BaseValidator
+from ...utils.order_keys import is_order_key
 
 class DevicesValidator(BaseValidator):
     def check_mac(self, item: str):
@@ -77,6 +78,9 @@ class DevicesValidator(BaseValidator):
         
         return True
     
+    def check_order_key(self, order_key: str):
+        return is_order_key(order_key)
+
     def validate(self, items: dict, params: list):
         check_attributes = {
             'deviceType': self.check_device_type,
@@ -85,6 +89,7 @@ class DevicesValidator(BaseValidator):
             'hashToken': self.check_hash_token,
             'macAddress': self.check_mac,
             'connectionId': self.check_connection_id,
-            'orderIndex': self.check_order_index
+            'orderIndex': self.check_order_index,
+            'orderKey': self.check_order_key
         }
         super().validate(check_attributes, items, params=params)
\ No newline at end of file
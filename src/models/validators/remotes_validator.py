@@ -1,7 +1,8 @@
 import re
-import ast
 from typing import Tuple
 from .mixins import BaseValidator
+from ...utils.order_keys import is_order_key
+from ...utils.ir_codec import is_packed, code_header, parse_text
 
 class RemotesValidator(BaseValidator):
     def check_mac(self, mac: str):
@@ -69,21 +70,18 @@ class RemotesValidator(BaseValidator):
         Method that checks if given argument button code is valid hex code and of bit length command size
         '''
         (button_code, command_size) = button_size_tuple
-        
-        if not isinstance(button_code, str):
-            return False
-        
+
+        # Packed codes carry their number of timings in their header
+        if is_packed(button_code):
+            try:
+                return code_header(button_code)[0] == int(command_size)
+            except:
+                return False
+
         try:
-            raw_list = ast.literal_eval(button_code)
+            parse_text(button_code, int(command_size))
         except:
             return False
-        
-        for item in raw_list:
-            if not isinstance(item, int):
-                return False
-            
-        if len(raw_list) != int(command_size):
-            return False
 
         return True
 
@@ -114,8 +112,9 @@ class RemotesValidator(BaseValidator):
         
         return True
     
-    def check_button_clicks(self, button_clicks: str):
-        if not isinstance(button_clicks, str):
+    def check_button_clicks(self, button_clicks: int):
+        # Counters are native numbers, numeric strings are still accepted for remotes not yet migrated
+        if isinstance(button_clicks, bool) or not isinstance(button_clicks, (int, str)):
             return False
         
         try:
@@ -146,6 +145,9 @@ class RemotesValidator(BaseValidator):
         
         return True
 
+    def check_order_key(self, order_key: str):
+        return is_order_key(order_key)
+
     def validate(self, items: dict, params: list):
         check_attributes = {
             'remoteName': self.check_remote_name,
@@ -158,6 +160,7 @@ class RemotesValidator(BaseValidator):
             'buttonCode': self.check_button_code,
             'buttonClicks': self.check_button_clicks,
             'buttonState': self.check_button_state,
-            'orderIndex': self.check_order_index
+            'orderIndex': self.check_order_index,
+            'orderKey': self.check_order_key
         }
         super().validate(check_attributes, items, params=params)
\ No newline at end of file
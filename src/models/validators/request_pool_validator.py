@@ -48,12 +48,17 @@ class RequestPoolValidator(BaseValidator):
         
         return True
 
+    def check_expires_at(self, expires_at: int):
+
+        return isinstance(expires_at, int) and not isinstance(expires_at, bool) and expires_at >= 0
+
     def validate(self, items: dict, params: list):
         check_attributes = {
             'requestId': self.check_request_id,
             'timestamp': self.check_timestamp,
             'connectionId': self.check_connection_id,
-            'requestBody': self.check_request
+            'requestBody': self.check_request,
+            'expiresAt': self.check_expires_at
         }
         super().validate(check_attributes, items, params=params)
 
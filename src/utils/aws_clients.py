@@ -0,0 +1,89 @@
+'''
+Factory of the boto3 clients used by the models, controllers and handlers.
+
+Every client is created with the same botocore configuration, read from the environment:
+`AWS_CLIENT_RETRY_MODE` (`adaptive`, `standard` or `legacy`), `AWS_CLIENT_MAX_ATTEMPTS`, `AWS_CLIENT_MAX_POOL_CONNECTIONS`,
+`AWS_CLIENT_CONNECT_TIMEOUT`, `AWS_CLIENT_READ_TIMEOUT` (seconds) and `AWS_CLIENT_TCP_KEEPALIVE`.
+Adaptive retries rate-limit the client on throttling instead of retrying into it, and the pool is sized for the
+concurrent batch and scan requests of the models instead of botocore's default of 10 connections.
+
+Clients are shared by the whole process through `get_client`, created on first use and kept across the invocations
+of a warm Lambda container, so their HTTPS connections are reused.
+'''
+import os
+import threading
+import boto3
+from botocore.config import Config
+
+RETRY_MODE = os.getenv("AWS_CLIENT_RETRY_MODE", "adaptive")
+MAX_ATTEMPTS = int(os.getenv("AWS_CLIENT_MAX_ATTEMPTS", "5"))
+MAX_POOL_CONNECTIONS = int(os.getenv("AWS_CLIENT_MAX_POOL_CONNECTIONS", "50"))
+CONNECT_TIMEOUT = float(os.getenv("AWS_CLIENT_CONNECT_TIMEOUT", "2"))
+READ_TIMEOUT = float(os.getenv("AWS_CLIENT_READ_TIMEOUT", "10"))
+TCP_KEEPALIVE = os.getenv("AWS_CLIENT_TCP_KEEPALIVE", "true").lower() in ("1", "true", "yes")
+
+
+def client_config(**overrides):
+    '''
+    Function used to build the botocore configuration of the clients.
+    :param `overrides`: `botocore.config.Config` arguments replacing the configured ones.
+    :return : The `botocore.config.Config`.
+    '''
+    options = {
+        "retries": {"mode": RETRY_MODE, "total_max_attempts": MAX_ATTEMPTS},
+        "max_pool_connections": MAX_POOL_CONNECTIONS,
+        "connect_timeout": CONNECT_TIMEOUT,
+        "read_timeout": READ_TIMEOUT,
+        "tcp_keepalive": TCP_KEEPALIVE,
+        **overrides
+    }
+    return Config(**options)
+
+
+def create_client(service: str, endpoint_url: str = None, **overrides):
+    '''
+    Function used to create a boto3 client with the configuration of `client_config`.
+    :param str `service`: Name of the AWS service (e.g. `dynamodb`).
+    :param str `endpoint_url`: Endpoint of the service, `None` for the default endpoint of the region.
+    :param `overrides`: `botocore.config.Config` arguments replacing the configured ones.
+    :return : The boto3 client.
+    '''
+    return boto3.client(service, endpoint_url=endpoint_url, config=client_config(**overrides))
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service: str, endpoint_url: str = None):
+    '''
+    Function used to get the client of `service` shared by the process, creating it on first use.
+    :param str `service`: Name of the AWS service (e.g. `dynamodb`).
+    :param str `endpoint_url`: Endpoint of the service, `None` for the default endpoint of the region.
+    :return : The boto3 client.
+    '''
+    key = (service, endpoint_url)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = create_client(service, endpoint_url)
+    return client
+
+
+class LazyClient:
+    '''
+    Stand-in for the shared client of a service, created on first attribute access.
+    Used for module level clients, so importing a handler doesn't pay for clients its route never calls.
+    '''
+    def __init__(self, service: str, endpoint_url: str = None):
+        '''
+        :param str `service`: Name of the AWS service (e.g. `cognito-idp`).
+        :param str `endpoint_url`: Endpoint of the service, `None` for the default endpoint of the region.
+        '''
+        self.service = service
+        self.endpoint_url = endpoint_url
+
+    def __getattr__(self, name: str):
+        return getattr(get_client(self.service, self.endpoint_url), name)
@@ -0,0 +1,116 @@
+'''
+Fast conversion between python values and DynamoDB attribute values.
+
+Most of what is stored are flat string maps, string lists and `buttons` lists of string maps,
+so those shapes are converted directly and only other types go through boto3's generic
+`TypeSerializer`/`TypeDeserializer`, which are created once per container.
+'''
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def serialize_value(value):
+    '''
+    Function used to convert a python value to a DynamoDB attribute value.
+    :param `value`: The value to convert.
+    :return : Attribute value in DynamoDB format.
+    '''
+    value_type = type(value)
+
+    if value_type is str:
+        return {'S': value}
+    if value is None:
+        return {'NULL': True}
+    if value_type is bool:
+        return {'BOOL': value}
+    if value_type is dict:
+        return {'M': serialize_map(value)}
+    if value_type is list:
+        return {'L': [serialize_value(element) for element in value]}
+    if value_type is bytes:
+        return {'B': value}
+
+    return _serializer.serialize(value)
+
+
+def serialize_map(item: dict):
+    '''
+    Function used to convert a python dict to the attribute map of a DynamoDB item.
+    :param dict `item`: The dict to convert.
+    :return : Dictionary of attribute values in DynamoDB format.
+    '''
+    for value in item.values():
+        if type(value) is not str:
+            return {k: serialize_value(v) for k, v in item.items()}
+
+    return {k: {'S': v} for k, v in item.items()}
+
+
+def deserialize_value(value: dict):
+    '''
+    Function used to convert a DynamoDB attribute value to a python value.
+    :param dict `value`: Attribute value in DynamoDB format.
+    :return : The python value.
+    '''
+    (tag, data), = value.items()
+
+    if tag == 'S':
+        return data
+    if tag == 'M':
+        return deserialize_map(data)
+    if tag == 'L':
+        return deserialize_elements(data)
+    if tag == 'NULL':
+        return None
+    if tag == 'BOOL':
+        return data
+    if tag == 'N':
+        return deserialize_number(data)
+    if tag == 'B':
+        return data
+
+    return _deserializer.deserialize(value)
+
+
+def deserialize_number(number: str):
+    '''
+    Function used to convert a DynamoDB number to `int` when it is integral (counters), or `Decimal` otherwise.
+    :param str `number`: The number in DynamoDB string format.
+    :return : The python number.
+    '''
+    if number.lstrip('-').isdigit():
+        return int(number)
+
+    return _deserializer.deserialize({'N': number})
+
+
+def deserialize_map(attributes: dict):
+    '''
+    Function used to convert the attribute map of a DynamoDB item to a python dict.
+    :param dict `attributes`: Dictionary of attribute values in DynamoDB format.
+    :return : The python dict.
+    '''
+    try:
+        return {k: v['S'] for k, v in attributes.items()}
+    except KeyError:
+        return {k: deserialize_value(v) for k, v in attributes.items()}
+
+
+def deserialize_elements(elements: list):
+    '''
+    Function used to convert the elements of a DynamoDB list to a python list.
+    String lists and lists of flat string maps (such as `buttons`) are converted without per-element dispatch.
+    :param list `elements`: List of attribute values in DynamoDB format.
+    :return : The python list.
+    '''
+    try:
+        return [element['S'] for element in elements]
+    except KeyError:
+        pass
+
+    try:
+        return [{k: v['S'] for k, v in element['M'].items()} for element in elements]
+    except KeyError:
+        return [deserialize_value(element) for element in elements]
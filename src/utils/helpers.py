@@ -1,15 +1,12 @@
-from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+import random
+from .codec import serialize_map, deserialize_map, deserialize_elements
 def serialize_item(dict: dict):
     '''
     Function used to serialize data in appropriate format for DynamoDB.
     :param dict `dict`: The item to serialize.
     :return : Item in format appropriate for dynamodb.
     '''
-    serializer = TypeSerializer()
-    return {
-        k: serializer.serialize(v)
-        for k, v in dict.items()
-    }
+    return serialize_map(dict)
 
 def serialize_items(list: list):
     '''
@@ -17,7 +14,7 @@ def serialize_items(list: list):
     :param list `list`: The list of items to serialize.
     :return : List of items in format appropriate for dynamodb.
     '''
-    return [serialize_item(item) for item in list]
+    return [serialize_map(item) for item in list]
 
 
 def deserialize_item(dynamo_obj: dict):
@@ -26,11 +23,7 @@ def deserialize_item(dynamo_obj: dict):
     :param dict `dynamo_obj`: The item to deserialize.
     :return : Item in python dict format.
     '''
-    deserializer = TypeDeserializer()
-    return {
-        k: deserializer.deserialize(v) 
-        for k, v in dynamo_obj.items()
-    } 
+    return deserialize_map(dynamo_obj)
 
 def deserialize_items(dynamo_obj_list: list):
     '''
@@ -38,28 +31,19 @@ def deserialize_items(dynamo_obj_list: list):
     :param list `dynamo_obj_list`: A list of items in DynamoDB format to be deserialized.
     :return : List of items in python dict format.
     '''
-    return [deserialize_item(item) for item in dynamo_obj_list]
+    return [deserialize_map(item) for item in dynamo_obj_list]
 
 def deserialize_list(dynamo_obj_list: list):
     '''
     Temporary fuction to deserialize buttons list
     '''
-    dynamo_obj_list = dynamo_obj_list['L']
-    new_list = []
-    for obj in dynamo_obj_list:
-        obj = obj['M']
-        obj = deserialize_item(obj)
-        new_list.append(obj)
-    return new_list
+    return deserialize_elements(dynamo_obj_list['L'])
 
 def serialize_list(dynamo_obj_list: list):
     '''
     Temporary fuction to serialize buttons list
     '''
-    res = {'L': []}
-    for button in dynamo_obj_list:
-        res['L'].append({'M': serialize_item(button)})
-    return res
+    return {'L': [{'M': serialize_map(button)} for button in dynamo_obj_list]}
 
 def check_response(response: dict):
     '''
@@ -72,6 +56,25 @@ def check_response(response: dict):
         return True
     return False
 
+def backoff_delay(attempt: int, base: float = 0.05, cap: float = 2.0):
+    '''
+    Function used to compute the sleep before retrying a throttled or partially processed DynamoDB request (exponential backoff with full jitter).
+    :param int `attempt`: Number of retries already performed.
+    :param float `base`: Delay in seconds of the first retry.
+    :param float `cap`: Maximum delay in seconds.
+    :returns : Seconds to sleep before the next attempt.
+    '''
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def chunks(items: list, size: int):
+    '''
+    Function used to split `items` into consecutive lists of at most `size` elements.
+    :param list `items`: The list to split.
+    :param int `size`: Maximum length of every chunk.
+    :returns : List of chunks.
+    '''
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
 def error_handler(func):
     '''
     Decorator used to wrap a function in a try catch block and return a 500 response with the error in body if thrown.
@@ -0,0 +1,47 @@
+'''
+Time-sortable identifiers.
+
+An id is a 10 character timestamp in milliseconds followed by 16 random characters, both in Crockford base-32 (like ULIDs),
+so ids compare in creation order as plain strings. Ids created in the same millisecond by one container increment the random
+part instead of drawing a new one, so they stay strictly increasing.
+'''
+import time
+import secrets
+import threading
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+TIME_LENGTH = 10
+RANDOM_LENGTH = 16
+
+_lock = threading.Lock()
+_last_time = -1
+_last_random = 0
+
+
+def _encode(value: int, length: int):
+    digits = ''
+    for _ in range(length):
+        value, digit = divmod(value, len(ALPHABET))
+        digits = ALPHABET[digit] + digits
+    return digits
+
+
+def time_ordered_id(timestamp: float = None):
+    '''
+    Function used to generate a new time-sortable id.
+    :param float `timestamp`: Creation time in seconds since the epoch, `None` for now.
+    :return : The id.
+    '''
+    global _last_time, _last_random
+
+    milliseconds = int((time.time() if timestamp is None else timestamp) * 1000)
+
+    with _lock:
+        if milliseconds <= _last_time:
+            milliseconds, random_part = _last_time, _last_random + 1
+        else:
+            random_part = secrets.randbits(5 * RANDOM_LENGTH - 1)
+        _last_time, _last_random = milliseconds, random_part
+
+    return _encode(milliseconds, TIME_LENGTH) + _encode(random_part, RANDOM_LENGTH)
+
@@ -0,0 +1,184 @@
+'''
+Compact binary encoding of IR button codes.
+
+Devices learn and replay codes as the text of a list of mark/space timings in microseconds (e.g. `"[9000, 4500, 560]"`).
+Stored as text, a 1024 timings code takes ~6 KB of every remote item. Packed codes are stored as a DynamoDB binary
+attribute laid out as:
+
+    version (1 byte) | number of timings (varint) | timings (zigzag varints)
+
+Each timing is stored as the difference with the timing two positions before it, so marks are diffed with marks and
+spaces with spaces and most deltas fit in one or two bytes. The number of timings is in the header, so a packed code
+is validated without decoding it.
+
+Codes stored as text before packing was introduced keep working: `unpack_code` accepts both forms.
+'''
+import re
+from array import array
+
+FORMAT_VERSION = 1
+MAX_TIMING = 0xFFFF
+
+# A list of at most 5 digit unsigned integers, matched in one pass of the regex engine
+TEXT_CODE_PATTERN = re.compile(r'\[\s*(?:[0-9]{1,5}\s*(?:,\s*[0-9]{1,5}\s*)*)?\]')
+
+
+def _write_varint(value: int, out: bytearray):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, position: int):
+    value = shift = 0
+    while True:
+        if position >= len(data):
+            raise ValueError("Truncated button code.")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+def is_packed(code):
+    '''
+    Function used to check whether a button code is stored packed.
+    :param `code`: Button code as stored in a button.
+    :return : `True` if `code` is a packed binary code.
+    '''
+    return isinstance(code, (bytes, bytearray))
+
+
+def parse_text(text: str, expected_length: int = None):
+    '''
+    Function used to read the timings of a button code in text form straight into an `array('H')`.
+    The syntax is checked in bulk by a regex and the number of timings by counting separators, so malformed codes and
+    codes of the wrong length are rejected before any timing is converted; the 16 bit range is checked by the array.
+    :param str `text`: Text of the list of timings.
+    :param int `expected_length`: Number of timings the code must have, `None` to accept any length.
+    :return : The timings as an `array('H')`.
+    :raises ValueError: If `text` isn't a list of integers between 0 and 65535 (of `expected_length` elements).
+    '''
+    if not isinstance(text, str) or not TEXT_CODE_PATTERN.fullmatch(text):
+        raise ValueError("Button code isn't a list of integers.")
+
+    body = text[1:-1]
+    length = body.count(',') + 1 if body.strip() else 0
+    if expected_length is not None and length != expected_length:
+        raise ValueError(f"Button code has {length} timings, expected {expected_length}.")
+
+    if not length:
+        return array('H')
+    try:
+        return array('H', map(int, body.split(',')))
+    except OverflowError:
+        raise ValueError(f"Button code timings must be between 0 and {MAX_TIMING}.")
+
+
+def format_text(timings):
+    '''
+    Function used to write timings as a button code in text form, as sent to devices.
+    :param `timings`: Sequence of timings.
+    :return : Text of the list of timings.
+    '''
+    return "[" + ", ".join(map(str, timings)) + "]"
+
+
+def encode_code(timings):
+    '''
+    Function used to pack timings into a binary button code.
+    :param `timings`: Sequence of timings between 0 and 65535.
+    :return : The packed code.
+    '''
+    out = bytearray((FORMAT_VERSION,))
+    _write_varint(len(timings), out)
+
+    previous = [0, 0]
+    for i, timing in enumerate(timings):
+        delta = timing - previous[i & 1]
+        previous[i & 1] = timing
+        _write_varint((delta << 1) ^ (delta >> 63), out)
+
+    return bytes(out)
+
+
+def decode_code(data: bytes):
+    '''
+    Function used to unpack the timings of a binary button code.
+    :param bytes `data`: The packed code.
+    :return : The timings as an `array('H')`.
+    :raises ValueError: If `data` isn't a valid packed code.
+    '''
+    length, position = code_header(data)
+
+    timings = array('H', bytes(2 * length))
+    previous = [0, 0]
+    for i in range(length):
+        value, position = _read_varint(data, position)
+        timing = previous[i & 1] + ((value >> 1) ^ -(value & 1))
+        if not 0 <= timing <= MAX_TIMING:
+            raise ValueError("Invalid timing in button code.")
+        timings[i] = previous[i & 1] = timing
+
+    if position != len(data):
+        raise ValueError("Trailing bytes in button code.")
+
+    return timings
+
+
+def code_header(data: bytes):
+    '''
+    Function used to read the header of a binary button code.
+    :param bytes `data`: The packed code.
+    :return : Tuple of the number of timings and the offset of the first timing.
+    :raises ValueError: If `data` doesn't start with a valid header.
+    '''
+    if not data or data[0] != FORMAT_VERSION:
+        raise ValueError("Unknown button code format.")
+
+    length, position = _read_varint(data, 1)
+    # Every timing takes at least one byte
+    if len(data) - position < length:
+        raise ValueError("Truncated button code.")
+
+    return length, position
+
+
+def code_length(code):
+    '''
+    Function used to get the number of timings of a button code, packed or in text form.
+    :param `code`: Button code as stored in a button.
+    :return : The number of timings.
+    :raises ValueError: If `code` isn't a valid button code.
+    '''
+    if is_packed(code):
+        return code_header(code)[0]
+
+    return len(parse_text(code))
+
+
+def pack_code(code):
+    '''
+    Function used to get the packed form of a button code.
+    :param `code`: Button code, packed or in text form.
+    :return : The packed code.
+    '''
+    if is_packed(code):
+        return bytes(code)
+
+    return encode_code(parse_text(code))
+
+
+def unpack_code(code):
+    '''
+    Function used to get the text form of a button code, as sent to devices and clients.
+    :param `code`: Button code, packed or in text form.
+    :return : Text of the list of timings.
+    '''
+    if is_packed(code):
+        return format_text(decode_code(code))
+
+    return code
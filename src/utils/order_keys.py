@@ -0,0 +1,153 @@
+'''
+Lexicographic rank keys used to order items (`orderKey`).
+
+A key is a base-62 fraction written without the leading "0." and without trailing zeros, so plain string
+comparison orders keys and there is always room for another key between any two of them. Moving an item
+only rewrites its own key, instead of the `orderIndex` of every item in between.
+'''
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(ALPHABET)
+DIGITS = {digit: value for value, digit in enumerate(ALPHABET)}
+
+MAX_KEY_LENGTH = 24
+LEGACY_KEY_WIDTH = 5
+
+
+def _midpoint(lower: str, upper: str = None):
+    '''
+    Function used to find a key strictly between `lower` and `upper` (`None` meaning the end of the key space).
+    :param str `lower`: Lower bound, `''` for the start of the key space.
+    :param str `upper`: Upper bound, `None` for the end of the key space.
+    :return : Key between the bounds.
+    '''
+    if upper is not None:
+        prefix = 0
+        while prefix < len(upper) and (lower[prefix] if prefix < len(lower) else ALPHABET[0]) == upper[prefix]:
+            prefix += 1
+        if prefix > 0:
+            return upper[:prefix] + _midpoint(lower[prefix:], upper[prefix:])
+
+    lower_digit = DIGITS[lower[0]] if lower else 0
+    upper_digit = DIGITS[upper[0]] if upper is not None else BASE
+
+    if upper_digit - lower_digit > 1:
+        return ALPHABET[(lower_digit + upper_digit) // 2]
+
+    if upper is not None and len(upper) > 1:
+        return upper[0]
+
+    return ALPHABET[lower_digit] + _midpoint(lower[1:], None)
+
+
+def key_between(before: str = None, after: str = None):
+    '''
+    Function used to generate a key that sorts after `before` and before `after`.
+    :param str `before`: Key of the preceding item, `None` if the item goes first.
+    :param str `after`: Key of the following item, `None` if the item goes last.
+    :return : The new key.
+    '''
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"Order key `{before}` must sort before `{after}`.")
+
+    return _midpoint(before or '', after)
+
+
+def keys_between(before: str, after: str, count: int):
+    '''
+    Function used to generate `count` increasing keys between `before` and `after`, splitting the gap evenly so keys stay short.
+    :param str `before`: Key of the preceding item, `None` for the start of the key space.
+    :param str `after`: Key of the following item, `None` for the end of the key space.
+    :param int `count`: Number of keys to generate.
+    :return : List of keys.
+    '''
+    if count <= 0:
+        return []
+
+    middle = key_between(before, after)
+    half = (count - 1) // 2
+
+    return keys_between(before, middle, half) + [middle] + keys_between(middle, after, count - 1 - half)
+
+
+def spaced_keys(count: int):
+    '''
+    Function used to generate `count` evenly spaced keys of equal length, used when rebalancing keys that grew too long.
+    :param int `count`: Number of keys to generate.
+    :return : List of increasing keys.
+    '''
+    width = 1
+    while BASE ** width < 8 * (count + 1):
+        width += 1
+
+    keys = []
+    for position in range(1, count + 1):
+        value = position * BASE ** width // (count + 1)
+        digits = ''
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits = ALPHABET[digit] + digits
+        keys.append(digits.rstrip(ALPHABET[0]))
+
+    return keys
+
+
+def order_key_of(item: dict):
+    '''
+    Function used to get the key an item sorts by. Items created before rank keys existed only have `orderIndex`,
+    which is mapped to a key sorting before every generated key while keeping their relative order.
+    :param dict `item`: Item containing `orderKey` or `orderIndex`.
+    :return : The order key of the item.
+    '''
+    if item.get('orderKey'):
+        return item['orderKey']
+
+    value = int(item['orderIndex'])
+    digits = ''
+    for _ in range(LEGACY_KEY_WIDTH):
+        value, digit = divmod(value, BASE)
+        digits = ALPHABET[digit] + digits
+
+    return ALPHABET[0] + digits + ALPHABET[BASE // 2]
+
+
+def is_order_key(key: str):
+    '''
+    Function used to check if `key` is a valid order key.
+    :param str `key`: The key to check.
+    :return : True if valid, False otherwise.
+    '''
+    return isinstance(key, str) and 0 < len(key) and all(digit in DIGITS for digit in key) and not key.endswith(ALPHABET[0])
+
+
+def longest_increasing_run(keys: list):
+    '''
+    Function used to find the positions of the longest strictly increasing subsequence of `keys`.
+    Items at those positions are already in order relative to each other and don't need a new key.
+    :param list `keys`: List of keys.
+    :return : Set of positions in the subsequence.
+    '''
+    tails, tails_positions, previous = [], [], [-1] * len(keys)
+
+    for position, key in enumerate(keys):
+        low, high = 0, len(tails)
+        while low < high:
+            middle = (low + high) // 2
+            if tails[middle] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(tails):
+            tails.append(key)
+            tails_positions.append(position)
+        else:
+            tails[low] = key
+            tails_positions[low] = position
+        previous[position] = tails_positions[low - 1] if low > 0 else -1
+
+    kept = set()
+    position = tails_positions[-1] if tails_positions else -1
+    while position != -1:
+        kept.add(position)
+        position = previous[position]
+
+    return kept
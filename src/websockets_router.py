@@ -1,7 +1,11 @@
 import os
+import sys
 import json
+import signal
+import threading
 from .models import RemotesModel, ClientsModel, DevicesModel, RequestPoolModel, AutomationsModel
 from .controllers.websocket_controllers.cmd_controller import CMDController
+from .controllers.websocket_controllers.mixins.websocket_mixins import WebSocketMixinV2
 from .controllers.websocket_controllers.ack_controller import ACKController
 from .controllers.websocket_controllers.error_controller import ErrorController
 from .utils.helpers import error_handler, check_response
@@ -10,10 +14,24 @@ from .auth.utils import send_response
 from .controllers.security_controllers.token_controller import validate_websocket_jwt
 
 WSSAPIGATEWAYENDPOINT = os.getenv("WSSAPIGATEWAYENDPOINT")
+CLICKS_SHUTDOWN_TIMEOUT = float(os.getenv("REMOTES_CLICKS_SHUTDOWN_TIMEOUT", "0.4"))
 REMOTES_TABLE, CLIENTS_TABLE, DEVICES_TABLE, REQUEST_POOL_TABLE, AUTOMATIONS_TABLE = os.getenv("REMOTES_TABLE_NAME", ""), os.getenv("CLIENTS_TABLE_NAME", ""), os.getenv("IOT_DEVICES_TABLE_NAME", ""), os.getenv("REQUEST_POOL_TABLE_NAME", ""), os.getenv("AUTOMATIONS_TABLE_NAME", "")
 
 remotes_model, clients_model, devices_model, requestpool_model, automations_model = RemotesModel(REMOTES_TABLE), ClientsModel(CLIENTS_TABLE), DevicesModel(DEVICES_TABLE), RequestPoolModel(REQUEST_POOL_TABLE), AutomationsModel(AUTOMATIONS_TABLE)
 
+def flush_on_shutdown(signum, frame):
+    '''
+    Function handling the SIGTERM Lambda sends before shutting the container down, writing the button clicks still buffered.
+    Lambda gives the runtime about 500 ms (and only sends it when an extension is registered), so the flush waits at most
+    `REMOTES_CLICKS_SHUTDOWN_TIMEOUT` seconds.
+    '''
+    flush = threading.Thread(target=remotes_model.flush_clicks, kwargs={"force": True}, daemon=True)
+    flush.start()
+    flush.join(CLICKS_SHUTDOWN_TIMEOUT)
+    sys.exit(0)
+
+signal.signal(signal.SIGTERM, flush_on_shutdown)
+
 def connect(connection: dict, query_parameters: dict):
     '''
     Function handling new websocket connection by saving new clients and the device if it is a device
@@ -40,6 +58,7 @@ def connect(connection: dict, query_parameters: dict):
             
         
         response_devices = devices_model.set_device_status(connection, {"deviceType": query_parameters["deviceType"], "macAddress": query_parameters["macAddress"]})
+        WebSocketMixinV2.forget_route({"macAddress": query_parameters["macAddress"]})
         if not check_response(response_devices):
             return response_devices
         
@@ -65,7 +84,13 @@ def disconnect(connection: dict):
     '''
     Method handling websocket disconnects by deleting clients and setting device as disconnected (if it's a device).
     '''
-    response_devices = devices_model.remove_connection(connection) 
+    response_client = clients_model.get_client(connection)
+
+    if check_response(response_client) and response_client['body'].get('deviceType') == 'iot':
+        mac_address = response_client['body'].get('macAddress')
+        response_devices = devices_model.remove_connection(connection, {"macAddress": mac_address} if mac_address else None)
+        if mac_address:
+            WebSocketMixinV2.forget_route({"macAddress": mac_address})
     
     return clients_model.delete_client(connection)
 
@@ -87,19 +112,20 @@ def handle(event, context):
     body = json.loads(body) if body else ''
     connection = {"connectionId": connection_id}
 
-    cmd_controller = CMDController(WSSAPIGATEWAYENDPOINT, connection_id, requestpool_model, remotes_model, devices_model, automations_model)
-    ack_controller = ACKController(WSSAPIGATEWAYENDPOINT, connection_id, requestpool_model, remotes_model, devices_model, automations_model)
-    error_controller = ErrorController(WSSAPIGATEWAYENDPOINT, connection_id, requestpool_model, automations_model)
-
+    # Only the controller of the route is built, its gateway client is shared across invocations
     websocket_router = {
         '$connect': lambda: connect(connection, query_params),
         '$disconnect': lambda: disconnect(connection),
-        'cmd': lambda: cmd_controller.route(body),
-        'ack': lambda: ack_controller.route(body),
-        'error': lambda: error_controller.route(body)
+        'cmd': lambda: CMDController(WSSAPIGATEWAYENDPOINT, connection_id, requestpool_model, remotes_model, devices_model, automations_model).route(body),
+        'ack': lambda: ACKController(WSSAPIGATEWAYENDPOINT, connection_id, requestpool_model, remotes_model, devices_model, automations_model, clients_model).route(body),
+        'error': lambda: ErrorController(WSSAPIGATEWAYENDPOINT, connection_id, requestpool_model, automations_model, clients_model).route(body)
     }
 
-    return websocket_router[route_key]()
+    try:
+        return websocket_router[route_key]()
+    finally:
+        # Write the buffered button clicks once the age or size threshold is reached, after the command has been forwarded
+        _ = remotes_model.flush_clicks()
 
 
  
\ No newline at end of file
@@ -0,0 +1,73 @@
+import os
+import unittest
+
+os.environ["STORAGE_ENGINE"] = "memory"
+
+from src.models import RemotesModel
+from src.utils.helpers import serialize_item
+from src.utils.order_keys import spaced_keys
+
+BUTTONS_COUNT = 150
+
+
+def legacy_remote(name: str):
+    return {"remoteName": name, "category": "Smart TV", "macAddress": "AA:BB:CC:DD:EE:FF", "buttonClicks": 0, "orderKey": "V", "version": 1,
+            "buttons": [{"buttonName": f"b{index:03}", "buttonCode": f"[{index}]", "commandSize": "1", "buttonState": "NO"}
+                        for index in range(BUTTONS_COUNT)]}
+
+
+class ButtonMigrationTest(unittest.TestCase):
+    '''
+    Migrations of legacy remotes with more buttons than fit in one transaction, so some are written before the remote is updated.
+    '''
+    def setUp(self):
+        self.remotes = RemotesModel("MigrationRemotes", "MigrationButtons")
+        self.name = self.id().rsplit('.', 1)[-1].replace('_', '-')
+        self.remotes.dynamo_db.put_item(TableName="MigrationRemotes", Item=serialize_item(legacy_remote(self.name)))
+
+    def read(self):
+        return self.remotes.get_item({"remoteName": self.name}, ['remoteName', 'buttons', 'version'], consistent=True)['body']
+
+    def stored_buttons(self):
+        return self.remotes.buttons.get_buttons({"remoteName": self.name})['body']
+
+    def test_buttons_move_in_order(self):
+        self.assertEqual(self.remotes._migrate_remote(self.read())['statusCode'], 201)
+
+        self.assertEqual([button['buttonName'] for button in self.stored_buttons()], [f"b{index:03}" for index in range(BUTTONS_COUNT)])
+        remote = self.read()
+        self.assertNotIn('buttons', remote)
+        self.assertEqual(remote['version'], 2)
+
+    def test_buttons_are_deleted_when_the_remote_changed(self):
+        stale = self.read()
+        self.remotes.update_item({"remoteName": self.name}, {"version": 2})
+
+        self.assertEqual(self.remotes._migrate_remote(stale)['statusCode'], 409)
+
+        self.assertEqual(self.stored_buttons(), [])
+        self.assertEqual(len(self.read()['buttons']), BUTTONS_COUNT)
+
+    def test_buttons_are_deleted_when_the_write_fails(self):
+        remote = self.read()
+        failing_write = {'Update': {'TableName': "MissingRemotes", 'Key': serialize_item({"remoteName": self.name}),
+                                    'UpdateExpression': "REMOVE buttons"}}
+
+        response = self.remotes.buttons.put_buttons([{**button, "remoteName": self.name} for button in remote['buttons']],
+                                                    spaced_keys(BUTTONS_COUNT), with_write=failing_write)
+
+        self.assertEqual(response['statusCode'], 500)
+        self.assertEqual(self.stored_buttons(), [])
+
+    def test_legacy_buttons_stay_before_new_buttons(self):
+        response = self.remotes.add_button({"remoteName": self.name, "buttonName": "new", "buttonCode": "[7]", "commandSize": "1", "buttonState": "NO"})
+        self.assertIn(response['statusCode'], (200, 201), response)
+
+        names = [button['buttonName'] for button in self.stored_buttons()]
+        self.assertEqual(len(names), BUTTONS_COUNT + 1)
+        self.assertEqual(names[-1], "new")
+        self.assertNotIn('buttons', self.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
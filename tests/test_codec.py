@@ -0,0 +1,52 @@
+import unittest
+from decimal import Decimal
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer, Binary
+
+from src.utils.codec import serialize_value, serialize_map, deserialize_value, deserialize_map, deserialize_elements
+
+
+ITEMS = [
+    {},
+    {"remoteName": "tv", "category": "Smart TV"},
+    {"remoteName": "tv", "buttonClicks": 12, "orderIndex": 0, "version": 3},
+    {"remoteName": "tv", "buttons": [{"buttonName": "power", "buttonCode": "[1, 2]"}, {"buttonName": "mute", "buttonCode": "[3]"}]},
+    {"tags": ["a", "b"], "empty": [], "nested": {"a": {"b": ["c", 1, None]}}, "flag": True, "off": False, "missing": None},
+    {"ratio": Decimal("1.5"), "negative": -4, "big": 10 ** 20, "codes": {"a", "b"}},
+]
+
+
+class CodecTest(unittest.TestCase):
+
+    def test_serialization_matches_boto3(self):
+        serializer = TypeSerializer()
+        for item in ITEMS:
+            self.assertEqual(serialize_map(item), {k: serializer.serialize(v) for k, v in item.items()})
+
+    def test_round_trip(self):
+        for item in ITEMS:
+            self.assertEqual(deserialize_map(serialize_map(item)), item)
+
+    def test_deserialization_matches_boto3(self):
+        deserializer = TypeDeserializer()
+        for item in ITEMS:
+            attributes = serialize_map(item)
+            self.assertEqual(deserialize_map(attributes), {k: deserializer.deserialize(v) for k, v in attributes.items()})
+
+    def test_integral_numbers_are_ints(self):
+        self.assertIs(type(deserialize_value({'N': '42'})), int)
+        self.assertEqual(deserialize_value({'N': '-42'}), -42)
+        self.assertEqual(deserialize_value({'N': '4.2'}), Decimal('4.2'))
+
+    def test_binary_values(self):
+        self.assertEqual(serialize_value(b'\x01\x02'), {'B': b'\x01\x02'})
+        self.assertEqual(deserialize_value({'B': b'\x01\x02'}), b'\x01\x02')
+        self.assertEqual(serialize_value(Binary(b'\x01')), TypeSerializer().serialize(Binary(b'\x01')))
+
+    def test_mixed_lists(self):
+        elements = [{'S': 'a'}, {'M': {'b': {'S': 'c'}}}, {'N': '1'}]
+        self.assertEqual(deserialize_elements(elements), ['a', {'b': 'c'}, 1])
+        self.assertEqual(deserialize_elements([{'M': {'b': {'N': '1'}}}]), [{'b': 1}])
+
+
+if __name__ == '__main__':
+    unittest.main()
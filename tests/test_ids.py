@@ -0,0 +1,40 @@
+import time
+import unittest
+import threading
+
+from src.utils.ids import time_ordered_id, ALPHABET, TIME_LENGTH, RANDOM_LENGTH
+
+
+class TimeOrderedIdTest(unittest.TestCase):
+
+    def test_format(self):
+        identifier = time_ordered_id()
+        self.assertEqual(len(identifier), TIME_LENGTH + RANDOM_LENGTH)
+        self.assertTrue(all(character in ALPHABET for character in identifier))
+
+    def test_ids_are_strictly_increasing(self):
+        identifiers = [time_ordered_id() for _ in range(5000)]
+        self.assertTrue(all(a < b for a, b in zip(identifiers, identifiers[1:])))
+
+    def test_ids_sort_by_timestamp(self):
+        now = time.time()
+        self.assertLess(time_ordered_id(now + 10), time_ordered_id(now + 20))
+        self.assertLess(time_ordered_id(now + 20)[:TIME_LENGTH], time_ordered_id(now + 3600)[:TIME_LENGTH])
+
+    def test_ids_are_unique_across_threads(self):
+        identifiers = []
+
+        def generate():
+            identifiers.extend(time_ordered_id() for _ in range(1000))
+
+        threads = [threading.Thread(target=generate) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(identifiers)), 4000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import random
+import unittest
+from array import array
+
+os.environ["STORAGE_ENGINE"] = "memory"
+
+from src.models import RemotesModel
+from src.utils.ir_codec import pack_code, unpack_code, encode_code, decode_code, code_length, is_packed, format_text, parse_text, FORMAT_VERSION
+
+
+class PackCodeTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        rng = random.Random(3)
+        for timings in [[], [0], [65535], [9000, 4500], [9000, 4500, 560, 1690, 560, 560] * 50,
+                        [rng.randint(0, 65535) for _ in range(1024)]]:
+            code = format_text(timings)
+            packed = pack_code(code)
+            self.assertTrue(is_packed(packed))
+            self.assertEqual(unpack_code(packed), code)
+            self.assertEqual(list(decode_code(packed)), timings)
+            self.assertEqual(code_length(packed), len(timings))
+
+    def test_packed_code_is_smaller(self):
+        code = format_text([9000, 4500] + [560, 1690, 560, 560] * 256)
+        self.assertLess(len(pack_code(code)), len(code) // 3)
+
+    def test_packing_is_idempotent(self):
+        packed = pack_code("[9000, 4500, 560]")
+        self.assertEqual(pack_code(packed), packed)
+        self.assertEqual(pack_code(bytearray(packed)), packed)
+
+    def test_text_codes_are_returned_unchanged(self):
+        self.assertEqual(unpack_code("[9000, 4500, 560]"), "[9000, 4500, 560]")
+        self.assertEqual(code_length("[9000, 4500, 560]"), 3)
+
+    def test_invalid_packed_codes_are_rejected(self):
+        packed = encode_code(array('H', [9000, 4500, 560]))
+        for data in [b'', bytes((FORMAT_VERSION + 1,)) + packed[1:], packed[:-1], packed + b'\x00']:
+            with self.assertRaises(ValueError):
+                decode_code(data)
+
+    def test_out_of_range_timing_is_rejected(self):
+        # A single timing of 65536, zigzag encoded
+        with self.assertRaises(ValueError):
+            decode_code(bytes((FORMAT_VERSION, 1, 0x80, 0x80, 0x08)))
+
+
+class ParseTextTest(unittest.TestCase):
+
+    def test_valid_codes(self):
+        self.assertEqual(list(parse_text("[9000, 4500, 560]")), [9000, 4500, 560])
+        self.assertEqual(list(parse_text("[ 1,2 ,\t3 ]")), [1, 2, 3])
+        self.assertEqual(list(parse_text("[]")), [])
+        self.assertEqual(list(parse_text("[ ]")), [])
+        self.assertEqual(list(parse_text("[65535]")), [65535])
+
+    def test_malformed_codes_are_rejected(self):
+        for text in ["", "9000, 4500", "[9000, 4500", "[9000,, 4500]", "[9000, 4500,]", "[-1]", "[1.5]", "[0x10]",
+                     "[123456]", "[1] [2]", "[__import__('os')]", "(1, 2)", None, 12, [1, 2]]:
+            with self.assertRaises(ValueError, msg=repr(text)):
+                parse_text(text)
+
+    def test_out_of_range_timings_are_rejected(self):
+        with self.assertRaises(ValueError):
+            parse_text("[9000, 65536]")
+
+    def test_length_is_checked(self):
+        self.assertEqual(len(parse_text("[1, 2, 3]", expected_length=3)), 3)
+        self.assertEqual(len(parse_text("[]", expected_length=0)), 0)
+        with self.assertRaises(ValueError):
+            parse_text("[1, 2, 3]", expected_length=2)
+        with self.assertRaises(ValueError):
+            parse_text("[]", expected_length=1)
+
+
+class StoredCodeTest(unittest.TestCase):
+
+    def test_codes_are_stored_packed_and_read_as_text(self):
+        remotes = RemotesModel("IRCodecRemotes", "IRCodecButtons")
+        remotes.add_remote({"remoteName": "tv", "category": "Smart TV", "macAddress": "AA:BB:CC:DD:EE:FF", "buttons": []})
+        code = format_text([9000, 4500] + [560, 1690] * 16)
+        response = remotes.add_button({"remoteName": "tv", "buttonName": "power", "buttonCode": code, "commandSize": "34", "buttonState": "NO"})
+        self.assertIn(response['statusCode'], (200, 201), response)
+
+        stored = remotes.dynamo_db.get_item(TableName="IRCodecButtons", Key={"remoteName": {"S": "tv"}, "buttonName": {"S": "power"}})
+        self.assertIn("B", stored["Item"]["buttonCode"])
+
+        buttons = remotes.get_remotes({"remoteName": "tv"}, with_buttons=True)['body']['buttons']
+        self.assertEqual([button['buttonCode'] for button in buttons], [code])
+
+    def test_invalid_codes_are_not_stored(self):
+        remotes = RemotesModel("IRCodecRemotes", "IRCodecButtons")
+        remotes.add_remote({"remoteName": "ac", "category": "Air Conditioner", "macAddress": "AA:BB:CC:DD:EE:FF", "buttons": []})
+        for code, size in [("[1, 2", "2"), ("[1, 2]", "3"), ("[__import__('os')]", "1")]:
+            response = remotes.add_button({"remoteName": "ac", "buttonName": "power", "buttonCode": code, "commandSize": size, "buttonState": "NO"})
+            self.assertEqual(response['statusCode'], 500, code)
+
+        self.assertEqual(remotes.buttons.get_buttons({"remoteName": "ac"})['body'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
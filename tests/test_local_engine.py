@@ -0,0 +1,176 @@
+import unittest
+from botocore.exceptions import ClientError
+
+from src.models.engines import MemoryEngine, SQLiteEngine
+
+
+def string(value: str):
+    return {'S': value}
+
+
+def number(value: int):
+    return {'N': str(value)}
+
+
+class LocalEngineTest:
+    '''
+    Tests of the DynamoDB semantics shared by the local engines, run by one subclass per engine.
+    '''
+    def make_engine(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.engine = self.make_engine()
+        self.engine.ensure_table("Items", {"partition_key": "pk", "sort_key": "sk"},
+                                 {"group-index": {"partition_key": "group", "sort_key": None}})
+        for partition in range(3):
+            for sort in range(5):
+                item = {"pk": string(f"p{partition}"), "sk": number(sort), "value": number(partition * 10 + sort)}
+                if sort % 2 == 0:
+                    item["group"] = string("even")
+                self.engine.put_item(TableName="Items", Item=item)
+
+    def get(self, partition: str, sort: int):
+        return self.engine.get_item(TableName="Items", Key={"pk": string(partition), "sk": number(sort)}).get('Item')
+
+    def assertError(self, code: str, operation, **kwargs):
+        with self.assertRaises(ClientError) as context:
+            operation(**kwargs)
+        self.assertEqual(context.exception.response['Error']['Code'], code)
+        return context.exception
+
+    # Expressions
+
+    def test_conditional_put(self):
+        item = {"pk": string("p0"), "sk": number(0), "value": number(1)}
+        self.assertError('ConditionalCheckFailedException', self.engine.put_item, TableName="Items", Item=item,
+                         ConditionExpression="attribute_not_exists(pk)")
+        self.engine.put_item(TableName="Items", Item={**item, "sk": number(9)}, ConditionExpression="attribute_not_exists(pk)")
+        self.assertEqual(self.get("p0", 9)["value"], number(1))
+
+    def test_update_expressions(self):
+        response = self.engine.update_item(TableName="Items", Key={"pk": string("p1"), "sk": number(1)},
+                                           UpdateExpression="SET #tags = list_append(if_not_exists(#tags, :empty), :tags), #value = #value + :one REMOVE #group ADD #clicks :one",
+                                           ConditionExpression="#value BETWEEN :low AND :high AND NOT attribute_exists(#clicks)",
+                                           ExpressionAttributeNames={"#tags": "tags", "#value": "value", "#group": "group", "#clicks": "clicks"},
+                                           ExpressionAttributeValues={":empty": {'L': []}, ":tags": {'L': [string("a")]}, ":one": number(1),
+                                                                      ":low": number(10), ":high": number(20)},
+                                           ReturnValues="UPDATED_NEW")
+
+        self.assertEqual(response['Attributes'], {"tags": {'L': [string("a")]}, "value": number(12), "clicks": number(1)})
+        self.assertNotIn("group", self.get("p1", 1))
+
+    def test_failed_condition_leaves_item_unchanged(self):
+        before = self.get("p2", 3)
+        self.assertError('ConditionalCheckFailedException', self.engine.update_item, TableName="Items",
+                         Key={"pk": string("p2"), "sk": number(3)}, UpdateExpression="SET #value = :zero",
+                         ConditionExpression="#value < :zero OR begins_with(pk, :prefix)",
+                         ExpressionAttributeNames={"#value": "value"},
+                         ExpressionAttributeValues={":zero": number(0), ":prefix": string("q")})
+        self.assertEqual(self.get("p2", 3), before)
+
+    def test_key_attributes_cannot_be_updated(self):
+        self.assertError('ValidationException', self.engine.update_item, TableName="Items", Key={"pk": string("p0"), "sk": number(0)},
+                         UpdateExpression="SET sk = :one", ExpressionAttributeValues={":one": number(1)})
+
+    def test_projection(self):
+        item = self.engine.get_item(TableName="Items", Key={"pk": string("p0"), "sk": number(2)},
+                                    ProjectionExpression="#v, missing", ExpressionAttributeNames={"#v": "value"})['Item']
+        self.assertEqual(item, {"value": number(2)})
+
+    # Pagination
+
+    def scan_all(self, **kwargs):
+        items, pages, start = [], 0, None
+        while True:
+            response = self.engine.scan(TableName="Items", **kwargs, **({"ExclusiveStartKey": start} if start else {}))
+            items += response['Items']
+            pages += 1
+            start = response.get('LastEvaluatedKey')
+            if not start:
+                return items, pages
+
+    def test_scan_pages_cover_every_item_once(self):
+        items, pages = self.scan_all(Limit=4)
+        self.assertEqual(len(items), 15)
+        self.assertEqual(pages, 4)
+        self.assertEqual(len({(item["pk"]["S"], item["sk"]["N"]) for item in items}), 15)
+
+    def test_scan_limit_applies_before_filter(self):
+        response = self.engine.scan(TableName="Items", Limit=5, FilterExpression="#value >= :big",
+                                    ExpressionAttributeNames={"#value": "value"}, ExpressionAttributeValues={":big": number(100)})
+        self.assertEqual((response['ScannedCount'], response['Count'], response['Items']), (5, 0, []))
+        self.assertIn('LastEvaluatedKey', response)
+
+    def test_scan_segments_partition_the_table(self):
+        segments = [self.scan_all(Segment=segment, TotalSegments=4)[0] for segment in range(4)]
+        keys = [(item["pk"]["S"], item["sk"]["N"]) for segment in segments for item in segment]
+        self.assertEqual(len(keys), 15)
+        self.assertEqual(len(set(keys)), 15)
+
+    def test_query_orders_by_sort_key_and_pages(self):
+        query = {"TableName": "Items", "KeyConditionExpression": "pk = :pk AND sk > :one",
+                 "ExpressionAttributeValues": {":pk": string("p1"), ":one": number(1)}}
+        first = self.engine.query(**query, Limit=2, ScanIndexForward=False)
+        second = self.engine.query(**query, Limit=2, ScanIndexForward=False, ExclusiveStartKey=first['LastEvaluatedKey'])
+
+        self.assertEqual([item["sk"] for item in first['Items'] + second['Items']], [number(4), number(3), number(2)])
+        self.assertNotIn('LastEvaluatedKey', second)
+
+    def test_query_index_only_returns_indexed_items(self):
+        response = self.engine.query(TableName="Items", IndexName="group-index", KeyConditionExpression="#group = :even",
+                                     ExpressionAttributeNames={"#group": "group"}, ExpressionAttributeValues={":even": string("even")})
+        self.assertEqual(response['Count'], 9)
+
+        self.assertError('ValidationException', self.engine.query, TableName="Items", IndexName="missing-index",
+                         KeyConditionExpression="pk = :pk", ExpressionAttributeValues={":pk": string("p0")})
+
+    # Transactions
+
+    def test_transaction_is_all_or_nothing(self):
+        exception = self.assertError('TransactionCanceledException', self.engine.transact_write_items, TransactItems=[
+            {'Put': {'TableName': "Items", 'Item': {"pk": string("new"), "sk": number(0)}}},
+            {'Delete': {'TableName': "Items", 'Key': {"pk": string("p0"), "sk": number(0)}}},
+            {'Update': {'TableName': "Items", 'Key': {"pk": string("p0"), "sk": number(1)}, 'UpdateExpression': "SET #value = :zero",
+                        'ConditionExpression': "#value = :zero", 'ExpressionAttributeNames': {"#value": "value"},
+                        'ExpressionAttributeValues': {":zero": number(0)}}},
+        ])
+
+        self.assertEqual([reason['Code'] for reason in exception.response['CancellationReasons']], ['None', 'None', 'ConditionalCheckFailed'])
+        self.assertIsNone(self.get("new", 0))
+        self.assertIsNotNone(self.get("p0", 0))
+        self.assertEqual(self.get("p0", 1)["value"], number(1))
+
+    def test_transaction_applies_every_write(self):
+        self.engine.transact_write_items(TransactItems=[
+            {'Put': {'TableName': "Items", 'Item': {"pk": string("new"), "sk": number(0)}, 'ConditionExpression': "attribute_not_exists(pk)"}},
+            {'Delete': {'TableName': "Items", 'Key': {"pk": string("p0"), "sk": number(0)}}},
+            {'Update': {'TableName': "Items", 'Key': {"pk": string("p0"), "sk": number(1)}, 'UpdateExpression': "ADD #value :one",
+                        'ExpressionAttributeNames': {"#value": "value"}, 'ExpressionAttributeValues': {":one": number(1)}}},
+        ])
+
+        self.assertIsNotNone(self.get("new", 0))
+        self.assertIsNone(self.get("p0", 0))
+        self.assertEqual(self.get("p0", 1)["value"], number(2))
+
+    def test_deleted_items_leave_indexes(self):
+        self.engine.batch_write_item(RequestItems={"Items": [{'DeleteRequest': {'Key': {"pk": string("p0"), "sk": number(0)}}}]})
+        response = self.engine.query(TableName="Items", IndexName="group-index", KeyConditionExpression="#group = :even",
+                                     ExpressionAttributeNames={"#group": "group"}, ExpressionAttributeValues={":even": string("even")})
+        self.assertEqual(response['Count'], 8)
+
+
+class MemoryEngineTest(LocalEngineTest, unittest.TestCase):
+
+    def make_engine(self):
+        return MemoryEngine()
+
+
+class SQLiteEngineTest(LocalEngineTest, unittest.TestCase):
+
+    def make_engine(self):
+        return SQLiteEngine(":memory:")
+
+
+if __name__ == '__main__':
+    unittest.main()
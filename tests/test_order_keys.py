@@ -0,0 +1,90 @@
+import random
+import unittest
+
+from src.utils.order_keys import key_between, keys_between, spaced_keys, order_key_of, is_order_key, longest_increasing_run
+
+
+class KeyBetweenTest(unittest.TestCase):
+
+    def test_key_sorts_between_bounds(self):
+        for before, after in [(None, None), (None, "V"), ("V", None), ("A", "B"), ("A", "A1"), ("Az", "B"), ("1", "10001")]:
+            key = key_between(before, after)
+            self.assertTrue(is_order_key(key), key)
+            if before is not None:
+                self.assertLess(before, key)
+            if after is not None:
+                self.assertLess(key, after)
+
+    def test_repeated_inserts_keep_order(self):
+        rng = random.Random(7)
+        keys = [key_between()]
+        for _ in range(500):
+            position = rng.randint(0, len(keys))
+            before = keys[position - 1] if position > 0 else None
+            after = keys[position] if position < len(keys) else None
+            keys.insert(position, key_between(before, after))
+
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_inverted_bounds_are_rejected(self):
+        with self.assertRaises(ValueError):
+            key_between("B", "A")
+        with self.assertRaises(ValueError):
+            key_between("A", "A")
+
+    def test_keys_between_are_increasing(self):
+        keys = keys_between("A", "B", 20)
+        self.assertEqual(len(keys), 20)
+        self.assertEqual(keys, sorted(keys))
+        self.assertLess("A", keys[0])
+        self.assertLess(keys[-1], "B")
+        self.assertEqual(keys_between("A", "B", 0), [])
+
+    def test_spaced_keys_are_short_and_increasing(self):
+        keys = spaced_keys(100)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), 100)
+        self.assertTrue(all(is_order_key(key) and len(key) <= 2 for key in keys))
+
+
+class OrderKeyOfTest(unittest.TestCase):
+
+    def test_order_key_wins_over_order_index(self):
+        self.assertEqual(order_key_of({"orderKey": "V", "orderIndex": 3}), "V")
+
+    def test_legacy_indexes_keep_their_order_before_generated_keys(self):
+        legacy = [order_key_of({"orderIndex": index}) for index in [0, 1, 2, 61, 62, 1000, 10 ** 6]]
+        self.assertEqual(legacy, sorted(legacy))
+        self.assertTrue(all(is_order_key(key) for key in legacy))
+        self.assertLess(legacy[-1], key_between(None, None))
+        self.assertLess(legacy[-1], spaced_keys(1)[0])
+
+    def test_key_between_legacy_keys(self):
+        first, second = order_key_of({"orderIndex": 4}), order_key_of({"orderIndex": 5})
+        key = key_between(first, second)
+        self.assertLess(first, key)
+        self.assertLess(key, second)
+
+
+class LongestIncreasingRunTest(unittest.TestCase):
+
+    def test_sorted_keys_are_all_kept(self):
+        self.assertEqual(longest_increasing_run(["A", "B", "C"]), {0, 1, 2})
+
+    def test_moved_key_is_not_kept(self):
+        self.assertEqual(longest_increasing_run(["B", "C", "D", "A", "E"]), {0, 1, 2, 4})
+
+    def test_run_is_strictly_increasing_and_longest(self):
+        keys = ["D", "A", "E", "B", "C", "F", "A"]
+        kept = sorted(longest_increasing_run(keys))
+        run = [keys[position] for position in kept]
+        self.assertEqual(len(kept), 4)
+        self.assertTrue(all(a < b for a, b in zip(run, run[1:])))
+
+    def test_empty_keys(self):
+        self.assertEqual(longest_increasing_run([]), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+from unittest import mock
+from botocore.exceptions import ClientError
+
+from src.models.engines import MemoryEngine
+from src.models.mixins import ObjectDynamodb
+from src.models.mixins import model_mixin
+from src.utils.helpers import serialize_item
+
+
+class Lists(ObjectDynamodb):
+    KEY_SCHEMA = {"partition_key": "name", "sort_key": None}
+    VERSION_ATTRIBUTE = "version"
+
+
+class Unversioned(ObjectDynamodb):
+    KEY_SCHEMA = {"partition_key": "name", "sort_key": None}
+
+
+class InterleavingEngine(MemoryEngine):
+    '''
+    Engine applying `interleaved` (writes of another container) right before the next conditional updates.
+    '''
+    def __init__(self):
+        super().__init__()
+        self.interleaved = []
+
+    def update_item(self, **kwargs):
+        if self.interleaved and 'ConditionExpression' in kwargs:
+            super().update_item(**self.interleaved.pop(0))
+        return super().update_item(**kwargs)
+
+
+def conflict(code: str = 'ConditionalCheckFailedException'):
+    return ClientError({'Error': {'Code': code, 'Message': "The conditional request failed"}}, 'UpdateItem')
+
+
+class VersionExpressionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = Lists("VersionedLists", engine=MemoryEngine())
+
+    def test_unversioned_models_have_no_version_parts(self):
+        self.assertEqual(Unversioned("UnversionedLists", engine=MemoryEngine())._version_expressions({"version": 1}), ("", None, {}, {}))
+
+    def test_blind_writes_only_increment(self):
+        self.assertEqual(self.model._version_expressions(), (" ADD #ver :one", None, {"#ver": "version"}, {":one": 1}))
+
+    def test_writes_are_conditional_on_the_read_version(self):
+        clause, condition, names, values = self.model._version_expressions({"name": "a", "version": 4})
+        self.assertEqual((clause, condition, names, values), (" ADD #ver :one", "#ver = :ver", {"#ver": "version"}, {":one": 1, ":ver": 4}))
+
+    def test_items_without_version_require_it_to_be_missing(self):
+        self.assertEqual(self.model._version_expressions({"name": "a"})[1], "attribute_not_exists(#ver)")
+
+
+@mock.patch.object(model_mixin.time, "sleep")
+class RetryOnConflictTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = Lists("VersionedLists", engine=MemoryEngine())
+
+    def test_write_is_retried_until_it_succeeds(self, sleep):
+        outcomes = [conflict(), conflict('TransactionCanceledException'), {"statusCode": 200, "body": "done"}]
+
+        def write():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        self.assertEqual(self.model._retry_on_conflict(write), {"statusCode": 200, "body": "done"})
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_conflicts_end_in_409(self, sleep):
+        write = mock.Mock(side_effect=conflict())
+        self.assertEqual(self.model._retry_on_conflict(write)['statusCode'], 409)
+        self.assertEqual(write.call_count, model_mixin.VERSION_MAX_RETRIES + 1)
+
+    def test_other_errors_are_raised(self, sleep):
+        write = mock.Mock(side_effect=conflict('ProvisionedThroughputExceededException'))
+        with self.assertRaises(ClientError):
+            self.model._retry_on_conflict(write)
+        self.assertEqual(write.call_count, 1)
+
+
+@mock.patch.object(model_mixin.time, "sleep")
+class VersionedListTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = InterleavingEngine()
+        self.model = Lists("VersionedLists", engine=self.engine)
+        self.model.add_item({"name": "a", "items": [{"id": "1"}, {"id": "2"}, {"id": "3"}]})
+
+    def stored(self):
+        return self.model.get_item({"name": "a"}, consistent=True)['body']
+
+    def concurrent_append(self, element: str):
+        return {"TableName": "VersionedLists", "Key": serialize_item({"name": "a"}),
+                "UpdateExpression": "SET #lst = list_append(#lst, :val) ADD #ver :one",
+                "ExpressionAttributeNames": {"#lst": "items", "#ver": "version"},
+                "ExpressionAttributeValues": serialize_item({":val": [{"id": element}], ":one": 1})}
+
+    def test_writes_increment_the_version(self, sleep):
+        self.assertEqual(self.model.rearrange_list({"name": "a"}, "items", [2, 1, 0])['statusCode'], 200)
+        self.assertEqual(self.model.delete_from_list({"name": "a"}, "items", {"id": "2"})['statusCode'], 200)
+
+        stored = self.stored()
+        self.assertEqual(stored["items"], [{"id": "3"}, {"id": "1"}])
+        self.assertEqual(stored["version"], 2)
+
+    def test_concurrent_write_is_not_lost(self, sleep):
+        self.model.append_to_list({"name": "a"}, "items", {"id": "0"})
+        self.engine.interleaved.append(self.concurrent_append("4"))
+
+        self.assertEqual(self.model.delete_from_list({"name": "a"}, "items", {"id": "2"})['statusCode'], 200)
+
+        stored = self.stored()
+        self.assertEqual(stored["items"], [{"id": "1"}, {"id": "3"}, {"id": "0"}, {"id": "4"}])
+        self.assertEqual(stored["version"], 3)
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_rearrange_of_a_changed_list_is_retried_on_the_new_list(self, sleep):
+        self.engine.interleaved.append(self.concurrent_append("4"))
+
+        # The retry reads four elements, so three indices no longer describe the list
+        self.assertEqual(self.model.rearrange_list({"name": "a"}, "items", [2, 1, 0])['statusCode'], 400)
+        self.assertEqual(self.stored()["items"], [{"id": "1"}, {"id": "2"}, {"id": "3"}, {"id": "4"}])
+
+    def test_list_that_keeps_changing_ends_in_409(self, sleep):
+        self.engine.interleaved.extend(self.concurrent_append(str(element)) for element in range(model_mixin.VERSION_MAX_RETRIES + 1))
+
+        self.assertEqual(self.model.delete_from_list({"name": "a"}, "items", {"id": "2"})['statusCode'], 409)
+        self.assertIn({"id": "2"}, self.stored()["items"])
+
+
+if __name__ == '__main__':
+    unittest.main()
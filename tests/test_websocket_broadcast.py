@@ -0,0 +1,101 @@
+import os
+import unittest
+from botocore.exceptions import ClientError
+
+os.environ["STORAGE_ENGINE"] = "memory"
+
+from src.models import ClientsModel
+from src.controllers.websocket_controllers.mixins.websocket_mixins import WebSocketMixin
+
+
+class FakeGateway:
+    '''
+    Websocket gateway client answering `GoneException` for the connections in `gone`.
+    '''
+    def __init__(self, gone: set, failing: set = frozenset()):
+        self.gone = gone
+        self.failing = failing
+        self.posted = []
+
+    def post_to_connection(self, Data: str, ConnectionId: str):
+        if ConnectionId in self.gone:
+            raise ClientError({'Error': {'Code': 'GoneException', 'Message': "Gone"}}, 'PostToConnection')
+        if ConnectionId in self.failing:
+            raise ClientError({'Error': {'Code': 'LimitExceededException', 'Message': "Throttled"}}, 'PostToConnection')
+        self.posted.append(ConnectionId)
+
+
+class Broadcaster(WebSocketMixin):
+
+    def __init__(self, gateway: FakeGateway, connection_id: str = None):
+        self.gateway = gateway
+        super().__init__("https://example.com", connection_id)
+
+    @property
+    def api_gateway(self):
+        return self.gateway
+
+
+class SendBroadcastTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clients = ClientsModel(f"Clients-{self.id()}")
+        for connection_id in ("live", "gone"):
+            self.clients.add_client({"connectionId": connection_id}, {"deviceType": "client"})
+
+    def test_gone_connection_is_deleted(self):
+        gateway = FakeGateway(gone={"gone"})
+
+        response = Broadcaster(gateway).send_broadcast({"action": "ack"}, self.clients.get_clients()['body'], self.clients)
+
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(response['body'], {"sent": 1, "gone": 1, "failed": 0, "pruned": 1})
+        self.assertEqual(gateway.posted, ["live"])
+        self.assertEqual(self.clients.get_client({"connectionId": "gone"})['statusCode'], 404)
+        self.assertEqual(self.clients.get_client({"connectionId": "live"})['statusCode'], 200)
+
+    def test_gone_connection_is_kept_without_model(self):
+        response = Broadcaster(FakeGateway(gone={"gone"})).send_broadcast({"action": "ack"}, self.clients.get_clients()['body'])
+
+        self.assertEqual(response['body']['pruned'], 0)
+        self.assertEqual(self.clients.get_client({"connectionId": "gone"})['statusCode'], 200)
+
+    def test_sender_is_skipped(self):
+        gateway = FakeGateway(gone=set())
+
+        response = Broadcaster(gateway, connection_id="live").send_broadcast({"action": "ack"}, self.clients.get_clients()['body'], self.clients)
+
+        self.assertEqual(response['body']['sent'], 1)
+        self.assertEqual(gateway.posted, ["gone"])
+
+
+class SendMessageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clients = ClientsModel(f"Clients-{self.id()}")
+        for connection_id in ("live", "gone"):
+            self.clients.add_client({"connectionId": connection_id}, {"deviceType": "client"})
+
+    def test_reply_is_sent(self):
+        gateway = FakeGateway(gone=set())
+
+        response = Broadcaster(gateway, connection_id="device").send_message({"action": "ack"}, "live", self.clients)
+
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(gateway.posted, ["live"])
+
+    def test_gone_connection_is_deleted(self):
+        response = Broadcaster(FakeGateway(gone={"gone"})).send_message({"action": "ack"}, "gone", self.clients)
+
+        self.assertEqual(response['statusCode'], 500)
+        self.assertEqual(self.clients.get_client({"connectionId": "gone"})['statusCode'], 404)
+
+    def test_failed_connection_is_kept(self):
+        response = Broadcaster(FakeGateway(gone=set(), failing={"live"})).send_message({"action": "ack"}, "live", self.clients)
+
+        self.assertEqual(response['statusCode'], 500)
+        self.assertEqual(self.clients.get_client({"connectionId": "live"})['statusCode'], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()